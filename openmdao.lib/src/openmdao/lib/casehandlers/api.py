@@ -8,9 +8,13 @@ iterators, and case filters in the standard library.
 
 from openmdao.lib.casehandlers.caseset import CaseArray, CaseSet, caseiter_to_caseset
 
+from openmdao.lib.casehandlers.asynccase import AsyncCaseRecorder
+from openmdao.lib.casehandlers.binarycase import BinaryCaseIterator, \
+                                                 BinaryCaseRecorder
 from openmdao.lib.casehandlers.csvcase import CSVCaseIterator, CSVCaseRecorder
 from openmdao.lib.casehandlers.dbcase import DBCaseIterator, DBCaseRecorder, \
-                                             case_db_to_dict
+                                             case_db_to_dict, case_db_iter, \
+                                             case_db_chunks
 from openmdao.lib.casehandlers.dumpcase import DumpCaseRecorder
 from openmdao.lib.casehandlers.listcase import ListCaseRecorder, \
                                                ListCaseIterator
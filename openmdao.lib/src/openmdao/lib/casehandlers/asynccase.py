@@ -0,0 +1,154 @@
+"""A CaseRecorder that passes Cases to another recorder on a background
+thread, so that slow I/O in the wrapped recorder doesn't hold up the driver.
+"""
+
+import copy
+import sys
+import threading
+import Queue
+
+from numpy import ndarray
+
+# pylint: disable-msg=E0611,F0401
+from openmdao.main.case import CompactCase
+from openmdao.main.interfaces import implements, ICaseRecorder
+
+_IMMUTABLE = (basestring, int, long, float, complex, bool, type(None))
+
+
+def _snapshot(case):
+    """Return a copy of `case` whose values can't be changed by the model
+    while the case is waiting to be written.
+    """
+    snap = copy.copy(case)
+    if isinstance(case, CompactCase):
+        snap._values = [_copy_value(val) for val in case.values()]
+        return snap
+    snap._inputs = dict([(name, _copy_value(val))
+                         for name, val in case._inputs.items()])
+    if case._outputs is not None:
+        snap._outputs = dict([(name, _copy_value(val))
+                              for name, val in case._outputs.items()])
+    return snap
+
+
+def _copy_value(value):
+    if isinstance(value, _IMMUTABLE):
+        return value
+    if isinstance(value, ndarray):
+        return value.copy()
+    return copy.deepcopy(value)
+
+
+class AsyncCaseRecorder(object):
+    """Wraps another CaseRecorder and records Cases to it on a writer thread.
+    :meth:`record` puts a copy of the Case on a queue holding at most
+    `maxsize` Cases and blocks while the queue is full, so a slow recorder
+    throttles the driver rather than accumulating an unbounded backlog.
+
+    If the wrapped recorder raises an exception, it is re-raised in the
+    driver's thread by the next call to :meth:`record`, :meth:`flush` or
+    :meth:`close`, and any Cases still queued are discarded.
+    """
+
+    implements(ICaseRecorder)
+
+    def __init__(self, recorder, maxsize=100):
+        self.recorder = recorder
+        self.maxsize = maxsize
+        self._queue = None
+        self._thread = None
+        self._exc_info = None
+
+    def startup(self):
+        """Start up the wrapped recorder and the writer thread."""
+        self.recorder.startup()
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        self._queue = Queue.Queue(self.maxsize)
+        self._thread = threading.Thread(target=self._writer,
+                                        name='AsyncCaseRecorder')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _writer(self):
+        """Record each queued Case until a None is received."""
+        while True:
+            case = self._queue.get()
+            try:
+                if case is None:
+                    return
+                if self._exc_info is None:
+                    try:
+                        self.recorder.record(case)
+                    except Exception:
+                        self._exc_info = sys.exc_info()
+            finally:
+                self._queue.task_done()
+
+    def _check_error(self):
+        """Re-raise an exception from the writer thread."""
+        if self._exc_info is not None:
+            exc_type, exc, tback = self._exc_info
+            self._exc_info = None
+            raise exc_type, exc, tback
+
+    def record(self, case):
+        """Queue a copy of the given Case to be recorded."""
+        self._check_error()
+        if self._thread is None:
+            self._start()
+        self._queue.put(_snapshot(case))
+
+    def flush(self):
+        """Wait until all queued Cases have been recorded, then flush the
+        wrapped recorder if it supports that.
+        """
+        if self._queue is not None:
+            self._queue.join()
+        self._check_error()
+        if hasattr(self.recorder, 'flush'):
+            self.recorder.flush()
+
+    def close(self):
+        """Record any queued Cases, stop the writer thread and close the
+        wrapped recorder.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self._queue = None
+        try:
+            self._check_error()
+        finally:
+            self.recorder.close()
+
+    def get_iterator(self):
+        """Return the iterator of the wrapped recorder, after all queued
+        Cases have been recorded.
+        """
+        self.flush()
+        return self.recorder.get_iterator()
+
+    def get_attributes(self, io_only=True):
+        """ We need a custom get_attributes because we aren't using Traits to
+        manage our changeable settings. This is unfortunate and should be
+        changed to something that automates this somehow."""
+
+        attrs = self.recorder.get_attributes(io_only)
+        attrs['type'] = type(self).__name__
+        variables = attrs.setdefault('Inputs', [])
+
+        attr = {}
+        attr['name'] = "maxsize"
+        attr['id'] = attr['name']
+        attr['type'] = type(self.maxsize).__name__
+        attr['value'] = str(self.maxsize)
+        attr['connected'] = ''
+        attr['desc'] = 'Maximum number of Cases waiting to be recorded.'
+        variables.append(attr)
+
+        return attrs
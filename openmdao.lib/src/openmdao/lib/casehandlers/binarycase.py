@@ -0,0 +1,340 @@
+"""A CaseRecorder and CaseIterator that store the cases in a directory of
+binary column files. Each numeric variable gets its own file containing
+the raw data of its values for every case, so a whole column can be memory
+mapped as a numpy array without being read or converted.
+"""
+
+import json
+import os
+from cPickle import dump, load, HIGHEST_PROTOCOL
+
+import numpy
+
+# pylint: disable-msg=E0611,F0401
+from openmdao.main.interfaces import implements, ICaseRecorder, ICaseIterator
+from openmdao.main.case import Case
+
+_SCHEMA = 'schema.json'
+_CASES = 'cases.pkl'
+
+
+def _column_dtype(value):
+    """Return the dtype to store `value` in a column file, or None if it must
+    be pickled with the rest of the case data. Real numbers are stored as
+    doubles and complex ones as complex doubles, so that a variable whose
+    first value happens to be an int or a bool can hold floats later.
+    """
+    if isinstance(value, numpy.ndarray):
+        kind = value.dtype.kind
+        if kind not in 'biufc':
+            return None
+    elif isinstance(value, (bool, int, long, float, complex, numpy.number)):
+        kind = numpy.asarray(value).dtype.kind
+    else:
+        return None
+    if kind == 'c':
+        return numpy.dtype('<c16')
+    return numpy.dtype('<f8')
+
+
+class BinaryCaseIterator(object):
+    """Iterates over the Cases stored in a directory by a
+    :class:`BinaryCaseRecorder`. Whole columns of values can be retrieved
+    with :meth:`get_column` or :meth:`get_columns`.
+    """
+
+    implements(ICaseIterator)
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        schema = os.path.join(dirname, _SCHEMA)
+        if os.path.exists(schema):
+            with open(schema, 'r') as stream:
+                self._schema = json.load(stream)
+        else:
+            self._schema = []  # nothing recorded yet
+
+    def _read_cases(self):
+        """Generator which returns the pickled data of each case."""
+        path = os.path.join(self.dirname, _CASES)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as stream:
+            while True:
+                try:
+                    yield load(stream)
+                except EOFError:
+                    break
+
+    def __len__(self):
+        return sum(1 for _ in self._read_cases())
+
+    def __iter__(self):
+        return self._next_case()
+
+    def _next_case(self):
+        """ Generator which returns Cases one at a time. """
+        columns = self.get_columns([col['name'] for col in self._schema
+                                    if col['file']])
+        for i, (case_uuid, parent_uuid, label, msg, retries, timestamp,
+                objects) in enumerate(self._read_cases()):
+            inputs = []
+            outputs = []
+            for col in self._schema:
+                name = col['name']
+                if name in objects:
+                    value = objects[name]
+                else:
+                    value = columns[name][i]
+                    if value.shape:
+                        value = numpy.array(value)
+                    else:
+                        value = value.item()
+                if col['iotype'] == 'in':
+                    inputs.append((name, value))
+                else:
+                    outputs.append((name, value))
+            case = Case(inputs=inputs, outputs=outputs, retries=retries,
+                        msg=msg, label=label, case_uuid=case_uuid,
+                        parent_uuid=parent_uuid)
+            case.timestamp = timestamp
+            yield case
+
+    def get_column(self, name):
+        """Return the values of the given variable for all cases. For a
+        numeric variable this is a read-only array that is memory mapped
+        to the column file, with one entry per case along its first axis.
+        Otherwise it's a list.
+        """
+        for col in self._schema:
+            if col['name'] == name:
+                break
+        else:
+            raise KeyError("'%s' not found" % name)
+
+        if not col['file']:
+            return [objects.get(name) for _, _, _, _, _, _, objects
+                                      in self._read_cases()]
+
+        dtype = numpy.dtype(col['dtype'])
+        shape = tuple(col['shape'])
+        path = os.path.join(self.dirname, col['file'])
+        width = dtype.itemsize * int(numpy.prod(shape))
+        count = os.path.getsize(path) // width if width else 0
+        if count == 0:
+            return numpy.zeros((0,)+shape, dtype)
+        return numpy.memmap(path, dtype=dtype, mode='r', shape=(count,)+shape)
+
+    def get_columns(self, names=None):
+        """Return a dict of the columns of the given variables (by default,
+        all of them), keyed on variable name. The result can be passed
+        to :class:`CaseArray` or :class:`CaseSet`, though they copy the
+        values of each case rather than keeping the memory mapped arrays.
+        """
+        if names is None:
+            names = [col['name'] for col in self._schema]
+        return dict([(name, self.get_column(name)) for name in names])
+
+    def get_attributes(self, io_only=True):
+        """ We need a custom get_attributes because we aren't using Traits to
+        manage our changeable settings. This is unfortunate and should be
+        changed to something that automates this somehow."""
+
+        attrs = {}
+        attrs['type'] = type(self).__name__
+        variables = []
+
+        attr = {}
+        attr['name'] = "dirname"
+        attr['type'] = type(self.dirname).__name__
+        attr['value'] = str(self.dirname)
+        attr['connected'] = ''
+        attr['desc'] = 'Name of the directory containing the cases.'
+        variables.append(attr)
+
+        attrs["Inputs"] = variables
+        return attrs
+
+
+class BinaryCaseRecorder(object):
+    """Records Cases to a directory containing a binary column file for each
+    numeric variable, which holds its raw little-endian data for every case.
+    Real values are stored as doubles and complex values as complex doubles.
+    The names of the variables are fixed by the first Case recorded, and the
+    shape of each numeric variable by its first value that isn't None.
+    Every later Case must match them. Values that aren't numbers or numeric
+    arrays are pickled along with the case label, uuids and message.
+    """
+
+    implements(ICaseRecorder)
+
+    def __init__(self, dirname, append=False):
+        self.dirname = dirname
+        self._schema = None
+        self._files = {}
+        self._cases = None
+        self._count = 0  # number of cases in the directory
+        self._closed = False
+
+        schema = os.path.join(dirname, _SCHEMA)
+        if os.path.exists(schema):
+            if not append:
+                raise RuntimeError("'%s' already contains recorded cases"
+                                   % dirname)
+            with open(schema, 'r') as stream:
+                self._schema = json.load(stream)
+            self._count = len(BinaryCaseIterator(dirname))
+            self._open('ab')
+        elif not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+    def _open(self, mode):
+        for col in self._schema:
+            if col['file']:
+                self._files[col['name']] = \
+                    open(os.path.join(self.dirname, col['file']), mode)
+        self._cases = open(os.path.join(self.dirname, _CASES), mode)
+
+    def _create_schema(self, case):
+        """Use the variables of the first Case to define our columns."""
+        self._schema = []
+        for iotype in ('in', 'out'):
+            for name, value in case.items(iotype=iotype):
+                col = {'name': name, 'iotype': iotype, 'file': None}
+                if value is None:
+                    # no value to tell the type by, e.g., because the case
+                    # failed
+                    col['pending'] = True
+                else:
+                    self._set_column_type(col, len(self._schema), value)
+                self._schema.append(col)
+
+        self._write_schema()
+        self._open('wb')
+
+    def _set_column_type(self, col, index, value):
+        """Give column `col` a file if `value` can be stored in one."""
+        dtype = _column_dtype(value)
+        if dtype is not None:
+            col['file'] = 'col%d.bin' % index
+            col['dtype'] = dtype.str
+            col['shape'] = list(numpy.shape(value))
+
+    def _add_column_file(self, col, value):
+        """Type column `col`, which has had no value so far, by `value`. If
+        it gets a file, the cases already recorded are filled with zeros
+        there, as for any case without a value.
+        """
+        del col['pending']
+        self._set_column_type(col, self._schema.index(col), value)
+        if col['file']:
+            stream = open(os.path.join(self.dirname, col['file']), 'wb')
+            dtype = numpy.dtype(col['dtype'])
+            row = numpy.zeros(tuple(col['shape']), dtype).tostring()
+            for _ in range(self._count):
+                stream.write(row)
+            self._files[col['name']] = stream
+        self._write_schema()
+
+    def _write_schema(self):
+        with open(os.path.join(self.dirname, _SCHEMA), 'w') as stream:
+            json.dump(self._schema, stream, indent=1)
+
+    def startup(self):
+        """ Nothing needed for a binary case recorder."""
+        pass
+
+    def record(self, case):
+        """Record the given Case."""
+        if self._closed:
+            raise RuntimeError('Attempt to record on closed recorder')
+        if self._schema is None:
+            self._create_schema(case)
+
+        values = dict(case.items())
+        if len(values) != len(self._schema):
+            raise ValueError("Case '%s' doesn't have the same variables as"
+                             " the cases already recorded" % case.uuid)
+
+        data = []
+        objects = {}
+        for col in self._schema:
+            name = col['name']
+            try:
+                value = values[name]
+            except KeyError:
+                raise ValueError("Case '%s' doesn't contain '%s'"
+                                 % (case.uuid, name))
+            if col.get('pending') and value is not None:
+                self._add_column_file(col, value)
+            if not col['file']:
+                objects[name] = value
+                continue
+
+            dtype = numpy.dtype(col['dtype'])
+            shape = tuple(col['shape'])
+            if value is None:
+                # no output, e.g., because the case failed
+                objects[name] = None
+                value = numpy.zeros(shape, dtype)
+            else:
+                value = numpy.asarray(value)
+                if not numpy.can_cast(value.dtype, dtype):
+                    raise ValueError("can't store %s value of '%s' in Case"
+                                     " '%s' as the recorded type %s"
+                                     % (value.dtype, name, case.uuid, dtype))
+                value = value.astype(dtype)
+                if value.shape != shape:
+                    raise ValueError("shape %s of '%s' in Case '%s' differs"
+                                     " from the recorded shape %s"
+                                     % (value.shape, name, case.uuid, shape))
+            data.append((name, value))
+
+        for name, value in data:
+            self._files[name].write(value.tostring())
+        dump((case.uuid, case.parent_uuid, case.label, case.msg, case.retries,
+              case.timestamp, objects), self._cases, HIGHEST_PROTOCOL)
+        self._count += 1
+
+    def flush(self):
+        """Write any buffered data to the column files."""
+        for stream in self._files.values():
+            stream.flush()
+        if self._cases is not None:
+            self._cases.flush()
+
+    def close(self):
+        """Close all of the files."""
+        for stream in self._files.values():
+            stream.close()
+        self._files = {}
+        if self._cases is not None:
+            self._cases.close()
+            self._cases = None
+        self._closed = True
+
+    def get_iterator(self):
+        """Return a BinaryCaseIterator that reads our directory."""
+        self.flush()
+        return BinaryCaseIterator(self.dirname)
+
+    def get_attributes(self, io_only=True):
+        """ We need a custom get_attributes because we aren't using Traits to
+        manage our changeable settings. This is unfortunate and should be
+        changed to something that automates this somehow."""
+
+        attrs = {}
+        attrs['type'] = type(self).__name__
+        variables = []
+
+        attr = {}
+        attr['name'] = "dirname"
+        attr['id'] = attr['name']
+        attr['type'] = type(self.dirname).__name__
+        attr['value'] = str(self.dirname)
+        attr['connected'] = ''
+        attr['desc'] = 'Name of the directory the cases are recorded in.'
+        variables.append(attr)
+
+        attrs["Inputs"] = variables
+        return attrs
@@ -1,5 +1,5 @@
 
-from openmdao.main.case import Case
+from openmdao.main.case import Case, CompactCase
 from openmdao.main.interfaces import implements, ICaseRecorder, ICaseIterator
 
 class CaseArray(object):
@@ -38,7 +38,7 @@ class CaseArray(object):
         self._values = []
         if isinstance(obj, dict):
             self._add_dict_cases(obj)
-        elif isinstance(obj, Case):
+        elif isinstance(obj, (Case, CompactCase)):
             self.record(obj)
         elif obj is None:
             pass
@@ -154,6 +154,8 @@ class CaseArray(object):
         """Return a list of values for the case in the same order as our values.
         Raise a KeyError if any of our names are missing from the case.
         """
+        if isinstance(case, CompactCase):
+            return case.get_values(self._names)
         try:
             return [case[n] for n in self._names]
         except KeyError, err:
@@ -166,7 +168,7 @@ class CaseArray(object):
         return len(self._values)
     
     def __contains__(self, case):
-        if not isinstance(case, Case):
+        if not isinstance(case, (Case, CompactCase)):
             return False
         try:
             values = self._get_case_data(case)
@@ -242,7 +244,7 @@ class CaseSet(CaseArray):
             self._values.append(tup)
 
     def __contains__(self, case):
-        if not isinstance(case, Case):
+        if not isinstance(case, (Case, CompactCase)):
             return False
         try:
             values = tuple(self._get_case_data(case))
@@ -5,8 +5,14 @@ DB (Python's sqlite.)
 import sys
 import sqlite3
 from cPickle import dumps, loads, HIGHEST_PROTOCOL, UnpicklingError
+from cStringIO import StringIO
+from itertools import groupby
+from operator import itemgetter
 from optparse import OptionParser
 
+from numpy import array, ndarray
+from numpy.lib.format import read_array, write_array
+
 from traits.trait_handlers import TraitListObject, TraitDictObject
 
 # pylint: disable-msg=E0611,F0401
@@ -17,6 +23,41 @@ _casetable_attrs = set(['id', 'uuid', 'parent', 'label', 'msg', 'retries', \
                         'model_id', 'timeEnter'])
 _vartable_attrs = set(['var_id', 'name', 'case_id', 'sense', 'value'])
 
+# arrays are stored in .npy format, i.e., a header containing dtype and shape
+# followed by the raw data, rather than being pickled
+_NPY_MAGIC = '\x93NUMPY'
+
+def _encode_value(value):
+    """Return `value` in the form that is stored in the value column of the
+    casevars table.
+    """
+    if isinstance(value, (float, int, str)):
+        return value
+    if isinstance(value, ndarray) and value.dtype.kind in 'biufc':
+        buf = StringIO()
+        write_array(buf, value)
+        return sqlite3.Binary(buf.getvalue())
+    if isinstance(value, TraitDictObject):
+        value = dict(value)
+    elif isinstance(value, TraitListObject):
+        value = list(value)
+    return sqlite3.Binary(dumps(value, HIGHEST_PROTOCOL))
+
+def _decode_value(name, value):
+    """Return the value of variable `name` from the value stored in
+    the database.
+    """
+    if value is None or isinstance(value, (float, int, long, basestring)):
+        return value
+    value = str(value)
+    if value.startswith(_NPY_MAGIC):
+        return read_array(StringIO(value))
+    try:
+        return loads(value)
+    except UnpicklingError as err:
+        raise UnpicklingError("can't unpickle value '%s' from database: %s"
+                              % (name, str(err)))
+
 def _query_split(query):
     """Return a tuple of lhs, relation, rhs after splitting on 
     a list of allowed operators.
@@ -68,45 +109,32 @@ class DBCaseIterator(object):
 
     def _next_case(self):
         """ Generator which returns Cases one at a time. """
-        # figure out which selectors are for cases and which are for variables
-        sql = ["SELECT * FROM cases"]
-        if self.selectors is not None:
-            for sel in self.selectors:
-                rhs, rel, lhs = _query_split(sel)
-                if rhs in _casetable_attrs:
-                    if len(sql) == 1:
-                        sql.append("WHERE %s%s%s" % (rhs, rel, lhs))
-                    else:
-                        sql.append("AND %s%s%s" % (rhs, rel, lhs))
-            
-        casecur = self._connection.cursor()
-        casecur.execute(' '.join(sql))
-          
-        sql = ['SELECT var_id,name,case_id,sense,value from casevars WHERE case_id=%s']
+        # figure out which selectors are for cases and which are for
+        # variables. The column names of the two tables don't overlap,
+        # so they can all go into the WHERE clause of a single join.
+        sql = ["SELECT id,uuid,parent,label,msg,retries,name,sense,value"
+               " FROM cases JOIN casevars ON casevars.case_id=cases.id"]
+        where = []
         if self.selectors is not None:
             for sel in self.selectors:
                 rhs, rel, lhs = _query_split(sel)
-                if rhs in _vartable_attrs:
-                    sql.append("AND %s%s%s" % (rhs, rel, lhs))
-        combined = ' '.join(sql)
-        varcur = self._connection.cursor()
-        
-        for cid,text_id,parent,label,msg,retries,model_id,timeEnter in casecur:
-            varcur.execute(combined % cid)
+                if rhs in _casetable_attrs or rhs in _vartable_attrs:
+                    where.append("%s%s%s" % (rhs, rel, lhs))
+        if where:
+            sql.append("WHERE %s" % ' AND '.join(where))
+        sql.append("ORDER BY id, var_id")
+
+        cur = self._connection.cursor()
+        cur.execute(' '.join(sql))
+
+        for cid, rows in groupby(cur, itemgetter(0)):
             inputs = []
             outputs = []
-            for var_id, vname, case_id, sense, value in varcur:
-                if not isinstance(value, (float, int, str)):
-                    try:
-                        value = loads(str(value))
-                    except UnpicklingError as err:
-                        raise UnpicklingError("can't unpickle value '%s' for"
-                                              " case '%s' from database: %s"
-                                              % (vname, cname, str(err)))
+            for _, text_id, parent, label, msg, retries, vname, sense, value in rows:
                 if sense == 'i':
-                    inputs.append((vname, value))
+                    inputs.append((vname, _decode_value(vname, value)))
                 elif sense == 'o':
-                    outputs.append((vname, value))
+                    outputs.append((vname, _decode_value(vname, value)))
             if len(inputs) > 0 or len(outputs) > 0:
                 yield Case(inputs=inputs, outputs=outputs,
                            retries=retries,msg=msg,label=label,
@@ -143,15 +171,28 @@ class DBCaseIterator(object):
         
 
 class DBCaseRecorder(object):
-    """Records Cases to a relational DB (sqlite). Values other than floats,
-    ints or strings are pickled and are opaque to SQL queries.
+    """Records Cases to a relational DB (sqlite). Numeric arrays are stored
+    as their raw data preceded by their dtype and shape. Other values
+    besides floats, ints or strings are pickled. In both cases they are
+    opaque to SQL queries.
+
+    If `batch_size` is greater than 1, cases are buffered and written
+    `batch_size` at a time in a single transaction, and a file DB is switched
+    to write-ahead logging. Buffered cases are written when :meth:`flush`,
+    :meth:`close` or :meth:`get_iterator` is called.
     """
     
     implements(ICaseRecorder)
     
-    def __init__(self, dbfile=':memory:', model_id='', append=False):
+    def __init__(self, dbfile=':memory:', model_id='', append=False,
+                 batch_size=1):
         self.dbfile = dbfile  # this creates the connection
         self.model_id = model_id
+        self.batch_size = batch_size
+        self._buffer = []
+
+        if batch_size > 1 and dbfile != ':memory:':
+            self._connection.execute("PRAGMA journal_mode=WAL")
         
         if append:
             exstr = 'if not exists'
@@ -179,6 +220,10 @@ class DBCaseRecorder(object):
          value BLOB
          )""" % exstr)
 
+        self._connection.execute("""
+        create index if not exists casevars_case_name
+         on casevars(case_id, name)""")
+
     @property
     def dbfile(self):
         """The name of the database. This can be a filename or :memory: for
@@ -190,7 +235,8 @@ class DBCaseRecorder(object):
     def dbfile(self, value):
         """Set the DB file and connect to it."""
         self._dbfile = value
-        self._connection = sqlite3.connect(value)
+        # may be used from the writer thread of an AsyncCaseRecorder
+        self._connection = sqlite3.connect(value, check_same_thread=False)
         self._iter_conn = sqlite3.connect(value)
     
     def startup(self):
@@ -202,49 +248,44 @@ class DBCaseRecorder(object):
         if self._connection is None:
             raise RuntimeError('Attempt to record on closed recorder')
 
+        # encode now, so that arrays shared with the model are captured
+        # with the values they have when the case is recorded
+        case_row = (case.uuid, case.parent_uuid, case.label, case.msg or '',
+                    case.retries, self.model_id)
+        var_rows = [('timestamp', None, case.timestamp)]
+        for name, value in case.items(iotype='in'):
+            var_rows.append((name, 'i', _encode_value(value)))
+        for name, value in case.items(iotype='out'):
+            var_rows.append((name, 'o', _encode_value(value)))
+
+        self._buffer.append((case_row, var_rows))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write any buffered Cases to the DB in a single transaction."""
+        if not self._buffer:
+            return
+        cases, self._buffer = self._buffer, []
+
         cur = self._connection.cursor()
-        
-        cur.execute("""insert into cases(id,uuid,parent,label,msg,retries,model_id,timeEnter) 
+        rows = []
+        for case_row, var_rows in cases:
+            cur.execute("""insert into cases(id,uuid,parent,label,msg,retries,model_id,timeEnter) 
                            values (?,?,?,?,?,?,?,DATETIME('NOW'))""", 
-                                     (None, case.uuid, case.parent_uuid, case.label,
-                                      case.msg or '', case.retries, 
-                                      self.model_id))
-        case_id = cur.lastrowid
-        # insert the inputs and outputs into the vars table.  Pickle them if
-        # they're not one of the built-in types int, float, or str.
-        
-        v = (None, 'timestamp', case_id, None, case.timestamp )
-        cur.execute("insert into casevars(var_id,name,case_id,sense,value) values(?,?,?,?,?)", 
-                    v)
+                                     (None,) + case_row)
+            case_id = cur.lastrowid
+            for name, sense, value in var_rows:
+                rows.append((None, name, case_id, sense, value))
 
-        for name, value in case.items(iotype='in'):
-            if isinstance(value, (float, int, str)):
-                v = (None, name, case_id, 'i', value)
-            else:
-                if isinstance(value, TraitDictObject):
-                    value = dict(value)
-                elif isinstance(value, TraitListObject):
-                    value = list(value)
-                v = (None, name, case_id, 'i', 
-                     sqlite3.Binary(dumps(value,HIGHEST_PROTOCOL)))
-            cur.execute("insert into casevars(var_id,name,case_id,sense,value) values(?,?,?,?,?)", 
-                        v)
-        for name, value in case.items(iotype='out'):
-            if isinstance(value, (float, int, str)):
-                v = (None, name, case_id, 'o', value)
-            else:
-                if isinstance(value, TraitDictObject):
-                    value = dict(value)
-                elif isinstance(value, TraitListObject):
-                    value = list(value)
-                v = (None, name, case_id, 'o', 
-                     sqlite3.Binary(dumps(value, HIGHEST_PROTOCOL)))
-            cur.execute("insert into casevars(var_id,name,case_id,sense,value) values(?,?,?,?,?)", 
-                        v)
+        cur.executemany("insert into casevars(var_id,name,case_id,sense,value) values(?,?,?,?,?)", 
+                        rows)
         self._connection.commit()
     
     def close(self):
         """Commit and close DB connection if not using ``:memory:``."""
+        if self._connection is not None:
+            self.flush()
         if self._connection is not None and self._dbfile != ':memory:':
             self._connection.commit()
             self._connection.close()
@@ -252,6 +293,8 @@ class DBCaseRecorder(object):
 
     def get_iterator(self):
         """Return a DBCaseIterator that points to our current DB."""
+        if self._connection is not None:
+            self.flush()
         return DBCaseIterator(dbfile=self._dbfile, connection=self._connection)
 
     def get_attributes(self, io_only=True):
@@ -291,11 +334,95 @@ def list_db_vars(dbname):
     """
     connection = sqlite3.connect(dbname)
     varcur = connection.cursor()
-    varcur.execute("SELECT name from casevars")
-    varnames = set([v for v in varcur])
+    varcur.execute("SELECT DISTINCT name from casevars")
+    varnames = set([v[0] for v in varcur])
     return varnames
 
-def case_db_to_dict(dbname, varnames, case_sql='', var_sql='', include_errors=False):
+def case_db_iter(dbname, varnames, case_sql='', var_sql='', include_errors=False):
+    """
+    Generator that retrieves the values of specified variables from a sqlite
+    DB containing Case data, yielding a dict of values keyed on variable
+    name for each case. All of the data is fetched by a single query and
+    streamed, so the whole DB never has to be held in memory.
+    
+    Only cases containing ALL of the specified variables are returned.
+    
+    dbname: str
+        The name of the sqlite DB file.
+        
+    varnames: list[str]
+        Iterator of names of variables to be retrieved.
+        
+    case_sql: str (optional)
+        SQL syntax that will be placed in the WHERE clause for Case retrieval.
+        
+    var_sql: str (optional)
+        SQL syntax that will be placed in the WHERE clause for variable retrieval.
+    
+    include_errors: bool (optional) [False]
+        If True, include data from cases that reported an error.
+    """
+    names = list(set(varnames))
+    if not names:
+        return
+
+    sql = ["SELECT case_id, name, value FROM casevars"
+           " JOIN cases ON cases.id=casevars.case_id"
+           " WHERE name IN (%s)" % ','.join(['?']*len(names))]
+    if not include_errors:
+        sql.append("AND msg = ''")
+    if case_sql:
+        sql.append("AND (%s)" % case_sql)
+    if var_sql:
+        sql.append("AND (%s)" % var_sql)
+    sql.append("ORDER BY case_id")
+
+    connection = sqlite3.connect(dbname)
+    try:
+        cur = connection.cursor()
+        cur.execute(' '.join(sql), names)
+        for case_id, rows in groupby(cur, itemgetter(0)):
+            casedict = dict([(vname, _decode_value(vname, value))
+                             for _, vname, value in rows])
+            # skip cases that don't contain a complete set of the specified
+            # vars to avoid data mismatches
+            if len(casedict) == len(names):
+                yield casedict
+    finally:
+        connection.close()
+
+def case_db_chunks(dbname, varnames, chunk_size=10000, case_sql='', var_sql='',
+                   include_errors=False, as_arrays=False):
+    """
+    Generator that yields the data returned by :func:`case_db_iter` as
+    dicts of lists of values keyed on variable name, with at most
+    `chunk_size` cases in each. If `as_arrays` is True, each list is
+    converted to a numpy array.
+    
+    The remaining arguments are the same as for :func:`case_db_iter`.
+    """
+    names = list(set(varnames))
+    chunk = dict([(name, []) for name in names])
+    count = 0
+    for casedict in case_db_iter(dbname, names, case_sql, var_sql,
+                                 include_errors):
+        for name, value in casedict.items():
+            chunk[name].append(value)
+        count += 1
+        if count == chunk_size:
+            yield _finish_chunk(chunk, as_arrays)
+            chunk = dict([(name, []) for name in names])
+            count = 0
+    if count:
+        yield _finish_chunk(chunk, as_arrays)
+
+def _finish_chunk(chunk, as_arrays):
+    if as_arrays:
+        return dict([(name, array(lst)) for name, lst in chunk.items()])
+    return chunk
+
+def case_db_to_dict(dbname, varnames, case_sql='', var_sql='', include_errors=False,
+                    as_arrays=False):
     """
     Retrieve the values of specified variables from a sqlite DB containing
     Case data.
@@ -322,61 +449,15 @@ def case_db_to_dict(dbname, varnames, case_sql='', var_sql='', include_errors=Fa
     include_errors: bool (optional) [False]
         If True, include data from cases that reported an error.
         
+    as_arrays: bool (optional) [False]
+        If True, return a numpy array for each entry rather than a list.
     """
-    connection = sqlite3.connect(dbname)
     vardict = dict([(name, []) for name in varnames])
-
-    sql = ["SELECT id FROM cases"]
-    qlist = []
-    if case_sql:
-        qlist.append(case_sql)
-    if not include_errors:
-        qlist.append("msg = ''")
-            
-    if qlist:
-        sql.append("WHERE %s" % ' AND '.join(qlist))
-        
-    casecur = connection.cursor()
-    casecur.execute(' '.join(sql))
-    
-    sql = ["SELECT name, value from casevars WHERE case_id=%s"]
-    vars_added = False
-    for i, name in enumerate(vardict.keys()):
-        if i == 0:
-            sql.append("AND (")
-        else:
-            sql.append("OR")
-        sql.append("name='%s'" % name)
-        vars_added = True
-    if vars_added:
-        sql.append(")")
-    
-    if var_sql:
-        sql.append(" AND %s" % var_sql)
-    combined = ' '.join(sql)
-    
-    varcur = connection.cursor()
-    
-    for case_id in casecur:
-        casedict = {}
-        varcur.execute(combined % case_id)
-        for vname, value in varcur:
-            if not isinstance(value, (float, int, str)):
-                try:
-                    value = loads(str(value))
-                except UnpicklingError as err:
-                    raise UnpicklingError("can't unpickle value '%s' from"
-                                          " database: %s" % (vname, str(err)))
-            casedict[vname] = value
-        
-        if len(casedict) != len(vardict):
-            continue   # case doesn't contain a complete set of specified vars,
-                       # so skip it to avoid data mismatches
-        
+    for casedict in case_db_iter(dbname, varnames, case_sql, var_sql,
+                                 include_errors):
         for name, value in casedict.items():
             vardict[name].append(value)
-            
-    return vardict
+    return _finish_chunk(vardict, as_arrays)
 
 
 def _get_lines(dbname, xnames, ynames, case_sql=None, var_sql=None): 
@@ -0,0 +1,74 @@
+"""
+Test for AsyncCaseRecorder.
+"""
+
+import unittest
+
+import numpy
+
+from openmdao.main.api import Assembly, Case, set_as_top
+from openmdao.test.execcomp import ExecComp
+from openmdao.lib.casehandlers.api import AsyncCaseRecorder, DBCaseRecorder, \
+                                          ListCaseIterator, ListCaseRecorder
+from openmdao.lib.drivers.api import SimpleCaseIterDriver
+
+
+class FailingRecorder(ListCaseRecorder):
+    """Fails to record its third Case."""
+
+    def record(self, case):
+        if len(self.cases) == 2:
+            raise IOError('disk full')
+        super(FailingRecorder, self).record(case)
+
+
+class AsyncCaseRecorderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.top = top = set_as_top(Assembly())
+        driver = top.add('driver', SimpleCaseIterDriver())
+        top.add('comp1', ExecComp(exprs=['z=x+y']))
+        top.add('comp2', ExecComp(exprs=['z=x+1']))
+        top.connect('comp1.z', 'comp2.x')
+        driver.workflow.add(['comp1', 'comp2'])
+
+        outputs = ['comp1.z', 'comp2.z']
+        cases = []
+        for i in range(10):
+            inputs = [('comp1.x', i), ('comp1.y', i*2)]
+            cases.append(Case(inputs=inputs, outputs=outputs,
+                              label='case%s' % i))
+        driver.iterator = ListCaseIterator(cases)
+
+    def test_record(self):
+        recorder = AsyncCaseRecorder(DBCaseRecorder(), maxsize=2)
+        self.top.driver.recorders = [recorder]
+        self.top.run()
+
+        cases = list(recorder.get_iterator())
+        self.assertEqual(len(cases), 10)
+        for i, case in enumerate(sorted(cases, key=lambda c: c.label)):
+            self.assertEqual(case.label, 'case%s' % i)
+            self.assertEqual(case['comp2.z'], 3*i + 1)
+
+    def test_snapshot(self):
+        recorder = AsyncCaseRecorder(ListCaseRecorder())
+        value = numpy.zeros(3)
+        recorder.record(Case(inputs=[('x', value)]))
+        value[:] = 1.
+        recorder.flush()
+        self.assertTrue(all(recorder.recorder.cases[0]['x'] == 0.))
+        recorder.close()
+
+    def test_error(self):
+        self.top.driver.recorders = [AsyncCaseRecorder(FailingRecorder())]
+        try:
+            self.top.run()
+        except IOError as err:
+            self.assertEqual(str(err), 'disk full')
+        else:
+            self.fail('IOError expected')
+
+
+if __name__ == '__main__':
+    unittest.main()
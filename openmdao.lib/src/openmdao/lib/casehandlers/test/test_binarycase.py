@@ -0,0 +1,184 @@
+"""
+Test for BinaryCaseRecorder and BinaryCaseIterator.
+"""
+
+import unittest
+import tempfile
+import shutil
+
+import numpy
+
+from openmdao.main.api import Assembly, Case, set_as_top
+from openmdao.test.execcomp import ExecComp
+from openmdao.lib.casehandlers.api import BinaryCaseIterator, \
+                                          BinaryCaseRecorder, CaseArray, \
+                                          ListCaseIterator
+from openmdao.lib.drivers.api import SimpleCaseIterDriver
+from openmdao.main.datatypes.api import Array, Str
+from openmdao.util.testutil import assert_raises, assert_rel_error
+from openmdao.util.fileutil import onerror
+
+
+class BinaryCaseRecorderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.dirname = self.tempdir + '/cases'
+
+        self.top = top = set_as_top(Assembly())
+        driver = top.add('driver', SimpleCaseIterDriver())
+        top.add('comp1', ExecComp(exprs=['z=x+y']))
+        top.add('comp2', ExecComp(exprs=['z=x+1']))
+        top.comp1.add('a_array', Array(numpy.zeros(3), iotype='in'))
+        top.comp1.add('a_string', Str('', iotype='in'))
+        top.connect('comp1.z', 'comp2.x')
+        driver.workflow.add(['comp1', 'comp2'])
+
+        outputs = ['comp1.z', 'comp2.z']
+        cases = []
+        for i in range(10):
+            inputs = [('comp1.x', float(i)), ('comp1.y', i*2.),
+                      ('comp1.a_array', numpy.arange(3.) + i),
+                      ('comp1.a_string', 'case%s' % i)]
+            cases.append(Case(inputs=inputs, outputs=outputs,
+                              label='case%s' % i))
+        driver.iterator = ListCaseIterator(cases)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, onerror=onerror)
+
+    def test_round_trip(self):
+        recorder = BinaryCaseRecorder(self.dirname)
+        self.top.driver.recorders = [recorder]
+        self.top.run()
+        recorder.close()
+
+        cases = BinaryCaseIterator(self.dirname)
+        self.assertEqual(len(cases), 10)
+        for i, case in enumerate(cases):
+            self.assertEqual(case.label, 'case%s' % i)
+            self.assertEqual(case['comp1.x'], i)
+            self.assertEqual(case['comp1.a_string'], 'case%s' % i)
+            self.assertTrue(all(case['comp1.a_array'] == numpy.arange(3.) + i))
+            assert_rel_error(self, case['comp2.z'], 3.*i + 1., 1e-10)
+
+        # use the iterator to drive the model again
+        self.top.driver.iterator = cases
+        recorder = BinaryCaseRecorder(self.tempdir + '/rerun')
+        self.top.driver.recorders = [recorder]
+        self.top.run()
+        z = recorder.get_iterator().get_column('comp2.z')
+        self.assertTrue(all(z == 3.*numpy.arange(10) + 1.))
+
+    def test_columns(self):
+        recorder = BinaryCaseRecorder(self.dirname)
+        self.top.driver.recorders = [recorder]
+        self.top.run()
+
+        cases = recorder.get_iterator()
+        arr = cases.get_column('comp1.a_array')
+        self.assertTrue(isinstance(arr, numpy.memmap))
+        self.assertEqual(arr.shape, (10, 3))
+        self.assertTrue(all(arr[:, 0] == numpy.arange(10.)))
+        self.assertEqual(cases.get_column('comp1.a_string'),
+                         ['case%s' % i for i in range(10)])
+        assert_raises(self, "cases.get_column('foo')", globals(), locals(),
+                      KeyError, "\"'foo' not found")
+
+        names = ['comp1.x', 'comp2.z']
+        caseset = CaseArray(cases.get_columns(names))
+        self.assertEqual(len(caseset), 10)
+        self.assertEqual(caseset[3]['comp2.z'], 10.)
+
+    def test_append(self):
+        recorder = BinaryCaseRecorder(self.dirname)
+        self.top.driver.recorders = [recorder]
+        self.top.run()
+        recorder.close()
+        assert_raises(self, 'recorder.record(Case())', globals(), locals(),
+                      RuntimeError, 'Attempt to record on closed recorder')
+
+        try:
+            BinaryCaseRecorder(self.dirname)
+        except RuntimeError as err:
+            self.assertEqual(str(err), "'%s' already contains recorded cases"
+                                       % self.dirname)
+        else:
+            self.fail('RuntimeError expected')
+
+        recorder = BinaryCaseRecorder(self.dirname, append=True)
+        self.top.driver.recorders = [recorder]
+        self.top.run()
+
+        case = Case(inputs=[('comp1.x', 1.)])
+        try:
+            recorder.record(case)
+        except ValueError as err:
+            self.assertEqual(str(err), "Case '%s' doesn't have the same"
+                             " variables as the cases already recorded"
+                             % case.uuid)
+        else:
+            self.fail('ValueError expected')
+        recorder.close()
+
+        cases = BinaryCaseIterator(self.dirname)
+        self.assertEqual(len(cases), 20)
+        self.assertEqual(cases.get_column('comp1.y').shape, (20,))
+
+    def test_widen(self):
+        # an int first doesn't keep floats out of the column
+        recorder = BinaryCaseRecorder(self.dirname)
+        recorder.record(Case(inputs=[('x', 1), ('flag', True)],
+                             outputs=[('y', numpy.arange(3))]))
+        recorder.record(Case(inputs=[('x', 2.5), ('flag', 0.5)],
+                             outputs=[('y', numpy.array([.5, 1.5, 2.5]))]))
+        cases = recorder.get_iterator()
+        self.assertTrue(all(cases.get_column('x') == [1., 2.5]))
+        self.assertTrue(all(cases.get_column('flag') == [1., .5]))
+        y = cases.get_column('y')
+        self.assertTrue(all(y[0] == [0., 1., 2.]))
+        self.assertTrue(all(y[1] == [.5, 1.5, 2.5]))
+
+        case = Case(inputs=[('x', 1j), ('flag', 1.)], outputs=[('y', None)])
+        try:
+            recorder.record(case)
+        except ValueError as err:
+            self.assertEqual(str(err), "can't store complex128 value of 'x' in"
+                             " Case '%s' as the recorded type float64"
+                             % case.uuid)
+        else:
+            self.fail('ValueError expected')
+        recorder.close()
+
+    def test_missing_first(self):
+        # a first case without outputs doesn't force them to be pickled
+        recorder = BinaryCaseRecorder(self.dirname)
+        recorder.record(Case(inputs=[('x', 1.)],
+                             outputs=[('y', None), ('z', None)]))
+        recorder.record(Case(inputs=[('x', 2.)],
+                             outputs=[('y', numpy.array([1., 2.])),
+                                      ('z', 'done')]))
+        recorder.close()
+
+        recorder = BinaryCaseRecorder(self.dirname, append=True)
+        recorder.record(Case(inputs=[('x', 3.)],
+                             outputs=[('y', numpy.array([3., 4.])),
+                                      ('z', None)]))
+        recorder.close()
+
+        cases = BinaryCaseIterator(self.dirname)
+        y = cases.get_column('y')
+        self.assertTrue(isinstance(y, numpy.memmap))
+        self.assertEqual(y.shape, (3, 2))
+        self.assertTrue(all(y[2] == [3., 4.]))
+        self.assertEqual(cases.get_column('z'), [None, 'done', None])
+
+        cases = list(cases)
+        self.assertEqual(cases[0]['y'], None)
+        self.assertTrue(all(cases[1]['y'] == [1., 2.]))
+        self.assertEqual(cases[1]['z'], 'done')
+        self.assertTrue(all(cases[2]['y'] == [3., 4.]))
+
+
+if __name__ == '__main__':
+    unittest.main()
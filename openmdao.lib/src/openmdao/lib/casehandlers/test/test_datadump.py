@@ -186,6 +186,47 @@ class Data_Dump_TestCase(unittest.TestCase):
             else:
                 self.assertEqual(line, template)
         
+    def test_printvar_cache(self):
+
+        self.top.add('comp1', Basic_Component())
+        self.top.driver.workflow.add('comp1')
+
+        sout = StringIO.StringIO()
+        self.top.driver.recorders = [DumpCaseRecorder(sout)]
+        self.top.driver.printvars = ['comp*.x1']
+        self.top.run()
+        printvars = self.top.driver._get_printvars()
+        self.assertEqual([name for name, expr in printvars], ['comp1.x1'])
+
+        # expansion is reused until printvars or the configuration changes
+        self.top.run()
+        self.assertTrue(self.top.driver._get_printvars() is printvars)
+
+        self.top.add('comp2', Basic_Component())
+        self.top.driver.workflow.add('comp2')
+        self.top.run()
+        self.assertEqual([name for name, expr in self.top.driver._get_printvars()],
+                         ['comp1.x1', 'comp2.x1'])
+        self.assertTrue('comp2.x1: 0.0' in sout.getvalue().split('Case:')[-1])
+
+        # adding or removing an existing component doesn't change the
+        # configuration, but still changes the expansion
+        self.top.add('comp3', Basic_Component())
+        self.top.run()
+        self.top.driver.workflow.add('comp3')
+        self.top.run()
+        self.assertEqual([name for name, expr in self.top.driver._get_printvars()],
+                         ['comp1.x1', 'comp2.x1', 'comp3.x1'])
+        self.top.driver.workflow.remove('comp1')
+        self.top.run()
+        self.assertEqual([name for name, expr in self.top.driver._get_printvars()],
+                         ['comp2.x1', 'comp3.x1'])
+
+        self.top.driver.printvars = ['comp2.y1']
+        self.top.run()
+        self.assertEqual([name for name, expr in self.top.driver._get_printvars()],
+                         ['comp2.y1'])
+
     def test_nested_assy_match_wildcard(self):
         
         self.top.add('comp1', Basic_Component())
@@ -8,12 +8,15 @@ import StringIO
 import os
 import logging
 import shutil
+import sqlite3
+
+import numpy
 
 from openmdao.main.api import Assembly, Case, set_as_top
 from openmdao.test.execcomp import ExecComp
 from openmdao.lib.casehandlers.api import DBCaseIterator, ListCaseIterator, \
                                           DBCaseRecorder, DumpCaseRecorder, \
-                                          case_db_to_dict
+                                          case_db_to_dict, case_db_chunks
 from openmdao.lib.drivers.api import SimpleCaseIterDriver, CaseIteratorDriver
 from openmdao.main.uncertain_distributions import NormalDistribution
 from openmdao.main.datatypes.api import List, Dict
@@ -177,6 +180,12 @@ class DBCaseRecorderTestCase(unittest.TestCase):
         for name, lst in varinfo.items():
             self.assertEqual(len(lst), 3)
 
+        varinfo = case_db_to_dict(dfile, varnames, as_arrays=True)
+        self.assertEqual(varinfo['comp1.y'].tolist(), [4, 6, 8])
+
+        chunks = list(case_db_chunks(dfile, varnames, chunk_size=2))
+        self.assertEqual([chunk['comp1.x'] for chunk in chunks], [[2, 3], [4]])
+
         # now use caseiter_to_dict to grab the same data
         varinfo = caseiter_to_dict(recorder.get_iterator(), varnames)
         # each var list should have 3 data values in it (5 with the required variables minus
@@ -244,6 +253,56 @@ class DBCaseRecorderTestCase(unittest.TestCase):
             except OSError:
                 logging.error("problem removing directory %s" % tmpdir)
 
+    def test_batched(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            dfile = os.path.join(tmpdir, 'junk.db')
+            recorder = DBCaseRecorder(dfile, batch_size=4)
+            for i in range(10):
+                inputs = [('comp1.x', float(i)),
+                          ('comp1.arr', numpy.arange(6.).reshape((2, 3))*i)]
+                recorder.record(Case(inputs=inputs, outputs=[('comp1.z', i*1.5)],
+                                     label='case%s' % i))
+
+            # only whole batches have been written so far
+            connection = sqlite3.connect(dfile)
+            self.assertEqual(connection.execute('SELECT COUNT(*) FROM cases').fetchone()[0], 8)
+            value = connection.execute("SELECT value FROM casevars WHERE name='comp1.arr'").fetchone()[0]
+            self.assertTrue(str(value).startswith('\x93NUMPY'))
+            connection.close()
+
+            recorder.close()
+            cases = list(DBCaseIterator(dfile))
+            self.assertEqual(len(cases), 10)
+            for i, case in enumerate(cases):
+                self.assertEqual(case.label, 'case%s' % i)
+                self.assertEqual(case['comp1.x'], float(i))
+                self.assertEqual(case['comp1.z'], i*1.5)
+                self.assertEqual(case['comp1.arr'].shape, (2, 3))
+                self.assertEqual(case['comp1.arr'].tolist(),
+                                 (numpy.arange(6.).reshape((2, 3))*i).tolist())
+        finally:
+            try:
+                shutil.rmtree(tmpdir, onerror=onerror)
+            except OSError:
+                logging.error("problem removing directory %s" % tmpdir)
+
+    def test_batched_shared_array(self):
+        # the recorded values are those at record() time, even if the
+        # array is changed in place before the batch is written
+        recorder = DBCaseRecorder(batch_size=10)
+        arr = numpy.zeros(3)
+        for i in range(3):
+            arr[:] = i
+            recorder.record(Case(inputs=[('comp1.arr', arr)]))
+        arr[:] = -1.
+        recorder.flush()
+
+        cases = list(recorder.get_iterator())
+        self.assertEqual(len(cases), 3)
+        for i, case in enumerate(cases):
+            self.assertEqual(case['comp1.arr'].tolist(), [float(i)]*3)
+
 
 class NestedCaseTestCase(unittest.TestCase):
 
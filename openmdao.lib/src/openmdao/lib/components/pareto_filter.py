@@ -1,31 +1,78 @@
 """ Pareto Filter -- finds non-dominated cases. """
 
+import numpy
+
 # pylint: disable-msg=E0611,F0401
-from openmdao.main.datatypes.api import Instance, Slot, List, Str
+from openmdao.main.datatypes.api import Bool, Instance, Slot, List, Str
 from openmdao.lib.casehandlers.api import CaseSet, caseiter_to_caseset
 
 from openmdao.main.component import Component
 from openmdao.main.interfaces import ICaseIterator
 
 
+# number of points compared at a time by _nondominated
+_BLOCK_SIZE = 256
+
+
+def _dominates(y1, y2):
+    """Return a boolean array with an entry for each pair of rows of `y1`
+    and `y2` that is True if the row of `y1` dominates the row of `y2`,
+    i.e., it's no worse in every criterion and better in at least one.
+    """
+    y1 = y1[:, None, :]
+    y2 = y2[None, :, :]
+    return numpy.all(y1 <= y2, axis=2) & numpy.any(y1 < y2, axis=2)
+
+
+def _nondominated(y):
+    """Return a boolean array that is True for each row of `y` that isn't
+    dominated by any other row. Smaller is better for all columns.
+    """
+    npts, ncrit = y.shape
+    mask = numpy.zeros(npts, dtype=bool)
+    if npts == 0:
+        return mask
+
+    # a point can only be dominated by points that come before it when
+    # sorted lexicographically, or by points equal to it (which don't count)
+    order = numpy.lexsort(y.T[::-1])
+    ys = y[order]
+
+    if ncrit <= 2:
+        # sweep through the sorted points keeping the running minimum of the
+        # last criterion over all distinct points seen so far
+        last = ys[:, -1]
+        new = numpy.ones(npts, dtype=bool)
+        new[1:] = numpy.any(ys[1:] != ys[:-1], axis=1)
+        starts = numpy.maximum.accumulate(numpy.where(new, numpy.arange(npts), 0))
+        best = numpy.empty(npts)
+        best[0] = numpy.inf
+        best[1:] = numpy.minimum.accumulate(last)[:-1]
+        mask[order] = last < best[starts]
+        return mask
+
+    # compare each block of sorted points with the nondominated points found
+    # so far and with each other, which by transitivity is enough
+    front = numpy.zeros((0, ncrit))
+    for start in range(0, npts, _BLOCK_SIZE):
+        block = ys[start:start+_BLOCK_SIZE]
+        keep = ~numpy.any(_dominates(block, block), axis=0)
+        for fstart in range(0, len(front), _BLOCK_SIZE):
+            if not keep.any():
+                break
+            keep &= ~numpy.any(_dominates(front[fstart:fstart+_BLOCK_SIZE],
+                                          block), axis=0)
+        mask[order[start:start+_BLOCK_SIZE]] = keep
+        front = numpy.concatenate((front, block[keep]))
+    return mask
+
+
 class ParetoFilterBase(Component):
     """
     Base functionality for a pareto filter.
     Not to be instantiated directly. Should be subclassed.
     """
 
-    def _is_dominated(self, y1, y2):
-        """Tests to see if the point y1 is dominated by the point y2.
-        True if y1 is dominated by y2, False otherwise.
-        """
-        if y1 == y2:
-            return False
-        for a, b in zip(y1, y2):
-            if a < b:
-                return False
-
-        return True
-
     def execute(self):
         """Finds and removes pareto optimal points in the given case set.
         Returns a list of pareto optimal points. Smaller is better for all
@@ -47,27 +94,36 @@ class ParetoFilterBase(Component):
         criteria_count = len(self.criteria)
 
         try:
-            # need to transpose the list of outputs
-            y_list = zip(*[case_set[crit] for crit in self.criteria])
+            y = numpy.array([case_set[crit] for crit in self.criteria],
+                            dtype=float).T.reshape((len(case_set),
+                                                    criteria_count))
         except KeyError:
             self.raise_exception('no cases provided had all of the outputs '
                  'matching the provided criteria, %s' % self.criteria, ValueError)
 
-        y_temp = list(y_list)
+        cases = list(case_set)
+        pareto = _nondominated(y)
 
         self.dominated_set = CaseSet()
         self.pareto_set = CaseSet()  # TODO: need a way to copy casesets
-
-        for point1, case in zip(y_list, iter(case_set)):
-            dominated = False
-            for point2 in y_temp:
-                if self._is_dominated(point1, point2):
-                    self.dominated_set.record(case)
-                    y_temp.remove(point1)
-                    dominated = True
-                    break
-            if not dominated:
+        for case, is_pareto in zip(cases, pareto):
+            if is_pareto:
                 self.pareto_set.record(case)
+            else:
+                self.dominated_set.record(case)
+
+        fronts = []
+        if self.rank_fronts:
+            remaining = numpy.arange(len(cases))
+            mask = pareto
+            while len(remaining):
+                front = CaseSet()
+                for i in remaining[mask]:
+                    front.record(cases[i])
+                fronts.append(front)
+                remaining = remaining[~mask]
+                mask = _nondominated(y[remaining])
+        self.fronts = fronts
 
 class ConnectableParetoFilter(ParetoFilterBase):
     """
@@ -94,6 +150,14 @@ class ConnectableParetoFilter(ParetoFilterBase):
     dominated_set = Instance(CaseSet, iotype="out",
                            desc="Resulting collection of dominated cases.", copy="shallow")
 
+    rank_fronts = Bool(False, iotype="in",
+                       desc="If True, sort all of the cases into successive "
+                            "non-dominated fronts in 'fronts'.")
+
+    fronts = List(Instance(CaseSet), iotype="out",
+                  desc="The non-dominated fronts, best first, if rank_fronts "
+                       "is True.", copy="shallow")
+
 class ParetoFilter(ParetoFilterBase):
     """Takes a set of cases and filters out the subset of cases which are
     pareto optimal. Assumes that smaller values for model responses are
@@ -120,6 +184,14 @@ class ParetoFilter(ParetoFilterBase):
     dominated_set = Slot(CaseSet,
                            desc="Resulting collection of dominated cases.", copy="shallow")
 
+    rank_fronts = Bool(False, iotype="in",
+                       desc="If True, sort all of the cases into successive "
+                            "non-dominated fronts in 'fronts'.")
+
+    fronts = List(Slot(CaseSet),
+                  desc="The non-dominated fronts, best first, if rank_fronts "
+                       "is True.", copy="shallow")
+
 if __name__ == "__main__":  # pragma: no cover
 
     # pylint: disable-msg=C0103, E1101
@@ -2,6 +2,8 @@
 
 import unittest
 
+from numpy import array, random
+
 from openmdao.lib.components.pareto_filter import ParetoFilter
 from openmdao.lib.casehandlers.api import ListCaseIterator
 from openmdao.main.case import Case
@@ -63,6 +65,53 @@ class ParetoFilterTests(unittest.TestCase):
         self.assertEqual((1, 2, 2, 3, 3, 3),x_dom)
         self.assertEqual((3, 2, 3, 1, 2, 3),y_dom)
         
+    def test_3d_filter(self):
+        # compare with a brute force check, using enough points that they're
+        # compared in more than one block
+        random.seed(10)
+        pts = random.randint(0, 10, (600, 3))
+        cases = [Case(inputs=[('i', i)],
+                      outputs=[('x', x), ('y', y), ('z', z)])
+                 for i, (x, y, z) in enumerate(pts)]
+
+        pf = ParetoFilter()
+        pf.case_sets = [ListCaseIterator(cases),]
+        pf.criteria = ['x','y','z']
+        pf.rank_fronts = True
+        pf.execute()
+
+        def dominated(p):
+            return any(all(q <= p) and any(q < p) for q in pts)
+
+        expected = set([i for i, p in enumerate(pts) if not dominated(p)])
+        self.assertEqual(set(case['i'] for case in pf.pareto_set), expected)
+        self.assertEqual(len(pf.dominated_set), 600 - len(expected))
+
+        self.assertEqual(set(case['i'] for case in pf.fronts[0]), expected)
+        self.assertEqual(sum(len(front) for front in pf.fronts), 600)
+        for better, worse in zip(pf.fronts[:-1], pf.fronts[1:]):
+            for case in worse:
+                p = array([case['x'], case['y'], case['z']])
+                self.assertTrue(any(all(q <= p) and any(q < p)
+                                    for q in [array([c['x'], c['y'], c['z']])
+                                              for c in better]))
+
+    def test_2d_ties(self):
+        pf = ParetoFilter()
+        x = [1,1,2,2,3]
+        y = [3,3,1,2,1]
+        cases = [Case(inputs=[('i', i)], outputs=[("x",x_0),("y",y_0)])
+                 for i, (x_0, y_0) in enumerate(zip(x, y))]
+
+        pf.case_sets = [ListCaseIterator(cases),]
+        pf.criteria = ['x','y']
+        pf.execute()
+
+        # equal points don't dominate each other
+        self.assertEqual(sorted(case['i'] for case in pf.pareto_set),
+                         [0, 1, 2])
+        self.assertEqual(pf.fronts, [])
+
     def test_bad_case_set(self): 
         pf = ParetoFilter()
         x = [1,1,2,2,2,3,3,3,]
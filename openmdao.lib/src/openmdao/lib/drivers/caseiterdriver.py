@@ -3,20 +3,28 @@
 
 """
 
+import copy
+import errno
 import logging
 import os.path
 import Queue
+import select
 import sys
 import thread
 import threading
+import time
 import traceback
 
+from numpy import ndarray, array_equal
+
 from openmdao.main.datatypes.api import Bool, Dict, Enum, Instance, Int, Slot
 
 from openmdao.main.api import Driver
 from openmdao.main.exceptions import RunStopped, TracedError, traceback_str
-from openmdao.main.expreval import ExprEvaluator
+from openmdao.main.forkpool import can_fork, fork_call, fork_imap, \
+                                   max_local_workers
 from openmdao.main.interfaces import ICaseIterator, ICaseFilter
+from openmdao.main.mp_support import OpenMDAO_Proxy
 from openmdao.main.rbac import get_credentials, set_credentials
 from openmdao.main.resource import ResourceAllocationManager as RAM
 from openmdao.main.resource import LocalAllocator
@@ -28,11 +36,29 @@ _EMPTY     = 'empty'
 _LOADING   = 'loading'
 _EXECUTING = 'executing'
 
+_MAX_ALLOCATORS = 8  # Maximum number of threads allocating servers.
+
 class _ServerError(Exception):
     """ Raised when a server thread has problems. """
     pass
 
 
+def _differs(old, new):
+    """ Return True if input value `new` differs from `old`. """
+    try:
+        if isinstance(old, ndarray) or isinstance(new, ndarray):
+            return not array_equal(old, new)
+        return bool(old != new)
+    except Exception:
+        return True  # Can't tell, assume it changed.
+
+
+def _changes(old, new):
+    """ Return the items of dict `new` which differ from those in `old`. """
+    return dict([(path, value) for path, value in new.items()
+                 if path not in old or _differs(old[path], value)])
+
+
 class CaseIterDriverBase(Driver):
     """
     A base class for Drivers that run sets of cases in a manner similar
@@ -57,6 +83,36 @@ class CaseIterDriverBase(Driver):
     extra_resources = Dict(iotype='in',
                            desc='Extra resource requirements (unusual).')
 
+    cases_per_dispatch = Int(1, low=1, iotype='in',
+                             desc='Number of cases sent to a remote server'
+                                  ' in a single request during concurrent'
+                                  ' evaluation. Servers slower than the'
+                                  ' fastest are sent proportionally fewer.'
+                                  ' With 1, each server gets its next case'
+                                  ' as soon as it finishes one.')
+
+    speculative = Bool(False, iotype='in',
+                       desc='If True, during concurrent evaluation a server'
+                            ' with no new case to run may run a copy of the'
+                            ' case expected to finish last on another'
+                            ' server, including cases waiting in a batch.'
+                            ' The first result is used.')
+
+    local_fork = Bool(False, iotype='in',
+                      desc='If True, concurrent evaluation uses forked copies'
+                           ' of this process (as many as the local host'
+                           ' allows) rather than servers, so the model'
+                           ' needn\'t be saved to an egg and reloaded.'
+                           ' Ignored where processes can\'t be forked.')
+
+    keep_servers = Bool(False, iotype='in',
+                        desc='If True, servers and their loaded models are'
+                             ' kept between executions. The model is only'
+                             ' re-saved to an egg if its configuration'
+                             ' or an input connected from outside the'
+                             ' workflow changes, otherwise just the changed'
+                             ' inputs are sent to the servers.')
+
     ignore_egg_requirements = Bool(False, iotype='in',
                                    desc='If True, no distribution or orphan'
                                         ' requirements will be included in the'
@@ -72,15 +128,22 @@ class CaseIterDriverBase(Driver):
         self._egg_file = None
         self._egg_required_distributions = None
         self._egg_orphan_modules = None
+        self._egg_config = None  # Parent configuration saved in egg.
+        self._egg_inputs = {}    # Model inputs saved in egg.
+        self._model_inputs = {}  # Current model inputs.
+        self._egg_extern = {}    # Externally connected inputs saved in egg.
 
-        self._reply_q = None  # Replies from server threads.
-        self._server_lock = None  # Lock for server data.
+        self._alloc_q = None  # Replies from server allocation threads.
+        self._allocating = 0  # Number of allocations outstanding.
+        self._wakeup = None   # Pipe written to when an allocation completes.
+        self._replies = []    # Servers ready for their next request.
 
         # Various per-server data keyed by server name.
         self._servers = {}
         self._top_levels = {}
         self._server_info = {}
-        self._queues = {}
+        self._requests = {}  # Request in progress.
+        self._waiting = {}   # Proxy a request is waiting for a reply from.
         self._in_use = {}
         self._server_states = {}
         self._server_cases = {}
@@ -91,8 +154,28 @@ class CaseIterDriverBase(Driver):
         self._rerun = []  # Cases that failed and should be retried.
         self._generation = 0  # Used to keep worker names unique.
 
+        self._running = {}        # Servers running each case, by seqno.
+        self._dispatch_time = {}  # When each server was sent work.
+        self._throughput = {}     # (cases run, seconds) for each server.
+        self._abandoned = set()   # Servers running a case already recorded.
+
         self.error_policy = 'ABORT' # var wasn't showing up in parent depgraph without this
 
+    def __getstate__(self):
+        """ Return dict representing this driver's state. """
+        state = super(CaseIterDriverBase, self).__getstate__()
+        # Servers kept by `keep_servers` can't be copied.
+        state['_alloc_q'] = None
+        state['_allocating'] = 0
+        state['_wakeup'] = None
+        state['_replies'] = []
+        state['_servers'] = {}
+        state['_top_levels'] = {}
+        state['_server_info'] = {}
+        state['_requests'] = {}
+        state['_waiting'] = {}
+        return state
+
     def execute(self):
         """
         Runs all cases and records results in `recorder`.
@@ -125,6 +208,10 @@ class CaseIterDriverBase(Driver):
                         self.step()
                     except StopIteration:
                         break
+            elif self._fork_local():
+                self._logger.info('Start concurrent evaluation in forked'
+                                  ' workers.')
+                self._start_forked()
             else:
                 self._logger.info('Start concurrent evaluation.')
                 self._start()
@@ -176,10 +263,28 @@ class CaseIterDriverBase(Driver):
              If True, then replicate the model and save to an egg file
              first (for concurrent evaluation).
         """
-        self._cleanup(remove_egg=replicate)
+        use_servers = not self.sequential and not self._fork_local()
+        reuse_egg = self.keep_servers and use_servers and \
+                    self._egg_file is not None and \
+                    self._egg_config == self.parent._depgraph._config_count
+        if reuse_egg:
+            # Inputs set from outside the workflow can only be updated by
+            # re-saving the egg.
+            extern = self._get_extern_inputs()
+            reuse_egg = not _changes(self._egg_extern, extern)
+        if self._servers and not (self.keep_servers and use_servers):
+            self.release_servers()
+        self._cleanup(remove_egg=replicate and not reuse_egg)
+
+        if use_servers:
+            if self.keep_servers:
+                self._model_inputs = self._get_model_inputs()
+            if (replicate and not reuse_egg) or self._egg_file is None:
+                if self._egg_file and os.path.exists(self._egg_file):
+                    # Replacing egg of kept servers.
+                    os.remove(self._egg_file)
+                    self._egg_file = None
 
-        if not self.sequential:
-            if replicate or self._egg_file is None:
                 # Save model to egg.
                 # Must do this before creating any locks or queues.
                 self._replicants += 1
@@ -209,6 +314,10 @@ class CaseIterDriverBase(Driver):
                 self._egg_file = egg_info[0]
                 self._egg_required_distributions = egg_info[1]
                 self._egg_orphan_modules = [name for name, path in egg_info[2]]
+                self._egg_config = self.parent._depgraph._config_count
+                self._egg_inputs = self._model_inputs
+                if self.keep_servers:
+                    self._egg_extern = self._get_extern_inputs()
 
         self._iter = self.get_case_iterator()
         self._seqno = 0
@@ -217,8 +326,195 @@ class CaseIterDriverBase(Driver):
         """Returns a new iterator over the Case set."""
         raise NotImplementedError('get_case_iterator')
 
+    def _get_model_inputs(self):
+        """
+        Return copies of the values of the unconnected inputs of the
+        components in our workflow, keyed on pathname relative to our parent.
+        """
+        inputs = {}
+        for comp in self.workflow.get_components():
+            if not hasattr(comp, 'list_inputs'):
+                continue
+            for name in comp.list_inputs(connected=False):
+                inputs['%s.%s' % (comp.name, name)] = \
+                    copy.deepcopy(comp.get(name))
+        return inputs
+
+    def _get_extern_inputs(self):
+        """
+        Return copies of the values of the inputs of the components in our
+        workflow which are connected to sources outside of it, such as
+        components not in the workflow or boundary variables of our parent.
+        These are not transferred when the workflow runs in a server, so
+        they are only updated there by re-saving the egg.
+        """
+        names = set(self.workflow.get_names(full=True))
+        graph = self.parent._depgraph
+        inputs = {}
+        for comp in self.workflow.get_components():
+            if not hasattr(comp, 'list_inputs'):
+                continue
+            for name in comp.list_inputs(connected=True):
+                path = '%s.%s' % (comp.name, name)
+                for src in graph.get_sources(path):
+                    if '.' not in src or src.split('.', 1)[0] not in names:
+                        inputs[path] = copy.deepcopy(comp.get(name))
+                        break
+        return inputs
+
+    def _fork_local(self):
+        """ Return True if cases are to be evaluated in forked workers. """
+        return self.local_fork and can_fork()
+
+    def _start_forked(self):
+        """
+        Evaluate cases concurrently in forked copies of this process. Each
+        worker inherits the model as currently configured, so there's no egg
+        to save, transfer and load. Cases are handed to workers as they
+        become free, and with ABORT no more are handed out after a failure.
+        """
+        cases = self._todo + self._rerun
+        self._todo = []
+        self._rerun = []
+        while self._iter is not None:
+            try:
+                case = self._iter.next()
+            except StopIteration:
+                self._iter = None
+                self._seqno = 0
+            else:
+                self._seqno += 1
+                self._prepare_case(case, rerun=False)
+                cases.append((case, self._seqno))
+
+        n_workers = max_local_workers()
+        self._logger.debug('%d cases, %d workers', len(cases), n_workers)
+        results = fork_imap(self._run_forked_case, cases, n_workers)
+        try:
+            for index, case in results:
+                if case.msg is not None and self.error_policy == 'ABORT':
+                    if self._abort_exc is None:
+                        self._abort_exc = case.exc or RuntimeError(case.msg)
+                    self._stop = True
+                for recorder in self.recorders:
+                    recorder.record(case)
+                if self._stop:
+                    break  # Don't start any more cases.
+        finally:
+            results.close()
+
+    def _run_forked_case(self, item):
+        """
+        Evaluate a case in a forked worker, retrying failures if the error
+        policy allows. Returns the updated case.
+        """
+        case, seqno = item
+        while True:
+            if self.reload_model:
+                # Evaluate in a copy of the worker so its model is unchanged.
+                case = fork_call(self._run_local_case, (case, seqno))
+            else:
+                case = self._run_local_case((case, seqno))
+            if case.msg is None or self.error_policy == 'ABORT' or \
+               case.retries >= case.max_retries:
+                return case
+            case.msg = None
+            case.retries += 1
+
+    def _run_local_case(self, item):
+        """ Evaluate a case in this process. Returns the updated case. """
+        case, seqno = item
+        case.exc = None
+        try:
+            for event in self.get_events():
+                self._model_set(None, event, None, True)
+            case.apply_inputs(self.parent)
+        except Exception as exc:
+            case.msg = 'Exception setting case inputs: %s' % exc
+            return case
+
+        self._server_cases[None] = (case, seqno)
+        self._model_execute(None)
+        exc = self._model_status(None)
+        if exc is None:
+            try:
+                case.update_outputs(self.parent)
+            except Exception as exc:
+                msg = 'Exception getting case outputs: %s' % exc
+                case.msg = '%s: %s' % (self.get_pathname(), msg)
+        else:
+            case.msg = str(exc)
+            case.exc = exc
+        return case
+
     def _start(self):
-        """ Start evaluating cases concurrently. """
+        """
+        Start evaluating cases concurrently. Requests to all servers are
+        multiplexed by this thread, waiting on their connections for replies.
+        """
+        if self._servers:
+            self._restart_servers()
+        else:
+            self._start_servers()
+
+        # Continue until no servers are busy.
+        while self._busy():
+            if self._more_to_go():
+                timeout = None
+            else:
+                # Don't wait indefinitely for a server we don't need.
+                # This has happened with a server that got 'lost'
+                # in RAM.allocate()
+                timeout = 60
+            try:
+                name = self._next_reply(timeout)
+            # Hard to force worker to hang, which is handled here.
+            except Queue.Empty:  #pragma no cover
+                msgs = []
+                for name, in_use in self._in_use.items():
+                    if in_use:
+                        if self._servers.get(name) is None:
+                            msgs.append('%r: no startup reply' % name)
+                            self._in_use[name] = False
+                        else:
+                            state = self._server_states[name]
+                            if state not in (_LOADING, _EXECUTING) or \
+                               name not in self._requests:
+                                msgs.append('%r: %r %s %s'
+                                            % (name, self._servers[name],
+                                               state, self._server_info[name]))
+                                self._in_use[name] = False
+                if msgs:
+                    self._logger.error('Timeout waiting with nothing left to do:')
+                    for msg in msgs:
+                        self._logger.error('    %s', msg)
+            else:
+                self._abandoned.discard(name)
+                self._in_use[name] = self._server_ready(name)
+
+        # Servers still running copies of recorded cases aren't waited for.
+        for name in self._abandoned:
+            self._logger.debug('retiring worker %r', name)
+            self._requests.pop(name, None)
+            self._waiting.pop(name, None)
+            self._release_server(name)
+
+        # Wait for any allocations no longer needed, so they can be released.
+        while self._allocating:
+            try:
+                self._next_reply(60)
+            # Hard to force allocation to hang, which is handled here.
+            except Queue.Empty:  #pragma no cover
+                self._logger.warning('Timeout waiting for %d server'
+                                     ' allocations.', self._allocating)
+                break
+        self._replies = []
+
+        if not self.keep_servers:
+            self._shutdown_servers()
+
+    def _start_servers(self):
+        """ Start allocating servers and grab the initial wave of cases. """
         # Need credentials in case we're using a PublicKey server.
         credentials = get_credentials()
 
@@ -235,10 +531,12 @@ class CaseIterDriverBase(Driver):
             msg = 'No servers supporting required resources %s' % resources
             self.raise_exception(msg, RuntimeError)
 
-        # Kick off initial wave of cases.
-        self._server_lock = threading.Lock()
-        self._reply_q = Queue.Queue()
+        # Grab initial wave of cases.
+        self._alloc_q = Queue.Queue()
+        if sys.platform != 'win32':
+            self._wakeup = os.pipe()
         self._generation += 1
+        names = Queue.Queue()
         n_servers = 0
         while n_servers < max_servers:
             if not self._more_to_go():
@@ -256,109 +554,277 @@ class CaseIterDriverBase(Driver):
             self._seqno += 1
             self._todo.append((case, self._seqno))
 
-            # Start server worker thread.
             n_servers += 1
             name = '%s_%d_%d' % (self.name, self._generation, n_servers)
-            self._logger.debug('starting worker for %r', name)
+            self._logger.debug('allocating server for %r', name)
             self._servers[name] = None
             self._in_use[name] = True
             self._server_cases[name] = None
             self._server_states[name] = _EMPTY
             self._load_failures[name] = 0
-            server_thread = threading.Thread(target=self._service_loop,
-                                             args=(name, resources,
-                                                   credentials, self._reply_q))
-            server_thread.daemon = True
+            names.put(name)
+
+        # Allocate servers in the background, each is kicked off as soon
+        # as it's allocated.
+        self._allocating = n_servers
+        n_threads = 0
+        while n_threads < min(n_servers, _MAX_ALLOCATORS):
+            alloc_thread = threading.Thread(target=self._allocate_servers,
+                                            args=(names, resources, credentials,
+                                                  self._alloc_q, self._wakeup))
+            alloc_thread.daemon = True
             try:
-                server_thread.start()
+                alloc_thread.start()
             except thread.error:
-                self._logger.warning('worker thread startup failed for %r',
-                                     name)
-                self._in_use[name] = False
+                self._logger.warning('allocation thread startup failed')
                 break
+            n_threads += 1
 
-            if sys.platform != 'win32':
-                # Process any pending events.
-                while self._busy():
-                    try:
-                        name, result, exc = self._reply_q.get(True, 0.01)
-                    except Queue.Empty:
-                        break  # Timeout.
+        if n_servers and not n_threads:
+            self._allocating = 0
+            self.raise_exception('No allocation threads could be started',
+                                 RuntimeError)
+
+    def _allocate_servers(self, names, resource_desc, credentials, alloc_q,
+                          wakeup):
+        """ Allocation threads execute this until `names` is empty. """
+        set_credentials(credentials)
+        while True:
+            try:
+                name = names.get_nowait()
+            except Queue.Empty:
+                return
+
+            try:
+                server, server_info = RAM.allocate(resource_desc)
+            # Just being defensive, this should never happen.
+            except Exception as exc:  #pragma no cover
+                self._logger.error('Server allocation for %r failed: %r',
+                                   name, exc)
+                server, server_info = None, None
+
+            if alloc_q is not self._alloc_q:
+                # This can easily happen if we take a long time to allocate
+                # and we get 'cleaned-up' before we get started.
+                if server is not None:
+                    RAM.release(server)
+                continue
+
+            alloc_q.put((name, server, server_info))
+            if wakeup is not None:
+                try:
+                    os.write(wakeup[1], '.')
+                except OSError:  # Pipe closed by cleanup.
+                    pass
+
+    def _check_allocations(self):
+        """ Record any servers allocated, making them ready for requests. """
+        while True:
+            try:
+                name, server, server_info = self._alloc_q.get_nowait()
+            except Queue.Empty:
+                return
+
+            self._allocating -= 1
+            # Just being defensive, this should never happen.
+            if server is None:  #pragma no cover
+                self._logger.error('Server allocation for %r failed :-(', name)
+            else:
+                # Clear egg re-use indicator.
+                server_info['egg_file'] = None
+                self._logger.debug('%r using %r', name, server_info['name'])
+                try:
+                    if self._logger.level == logging.NOTSET:
+                        # By default avoid lots of protocol messages.
+                        server.set_log_level(logging.DEBUG)
                     else:
-                        # Difficult to force startup failure.
-                        if self._servers[name] is None:  #pragma nocover
-                            self._logger.debug('server startup failed for %r',
-                                               name)
-                            self._in_use[name] = False
-                        else:
-                            self._in_use[name] = self._server_ready(name)
+                        server.set_log_level(self._logger.level)
+                except Exception as exc:  #pragma no cover
+                    self._logger.error('%r: %r', name, exc)
+                self._servers[name] = server
+                self._server_info[name] = server_info
 
-        if sys.platform == 'win32':  #pragma no cover
+            if name in self._in_use:
+                self._replies.append(name)
+
+    def _next_reply(self, timeout=None):
+        """
+        Return the name of the next server to have been allocated or to
+        have completed its request, waiting up to `timeout` seconds.
+        Raises :class:`Queue.Empty` on timeout.
+        """
+        if timeout is not None:
+            deadline = time.time() + timeout
+        while not self._ready_replies():
+            if timeout is None:
+                wait = None
+            else:
+                wait = deadline - time.time()
+                if wait <= 0:
+                    raise Queue.Empty()
+            if not self._poll(wait):
+                raise Queue.Empty()  # Nothing to wait for.
+        return self._replies.pop(0)
+
+    def _ready_replies(self):
+        """ Return True if there are replies to be processed. """
+        if sys.platform == 'win32' and self._allocating:  #pragma no cover
             # Don't start server processing until all servers are started,
             # otherwise we have egg removal issues.
-            for name in self._in_use.keys():
-                name, result, exc = self._reply_q.get()
-                if self._servers[name] is None:
-                    self._logger.debug('server startup failed for %r', name)
-                    self._in_use[name] = False
+            return False
+        return bool(self._replies)
 
-            # Kick-off started servers.
-            for name in self._in_use.keys():
-                if self._in_use[name]:
-                    self._in_use[name] = self._server_ready(name)
+    def _poll(self, timeout):
+        """
+        Wait up to `timeout` seconds for replies from servers or for
+        allocations, and process them. Returns False if there's nothing to
+        wait for.
+        """
+        if self._alloc_q is not None:
+            self._check_allocations()
+            if self._ready_replies():
+                return True
 
-        # Continue until no servers are busy.
-        while self._busy():
-            if self._more_to_go():
-                timeout = None
+        if not self._waiting and not self._allocating:
+            return False
+
+        if sys.platform == 'win32':  #pragma no cover
+            # select() only supports sockets, so poll for replies.
+            if timeout is not None:
+                deadline = time.time() + timeout
+            while True:
+                ready = [server for server, proxy in self._waiting.items()
+                                if proxy._reply_ready()]
+                if ready or not self._alloc_q.empty():
+                    break
+                if timeout is not None and time.time() >= deadline:
+                    break
+                time.sleep(0.01)
+        else:
+            fds = dict([(proxy._fileno(), server)
+                        for server, proxy in self._waiting.items()])
+            rlist = fds.keys()
+            if self._wakeup is not None:
+                rlist.append(self._wakeup[0])
+            try:
+                rlist = select.select(rlist, [], [], timeout)[0]
+            except select.error as exc:  #pragma no cover
+                if exc.args[0] == errno.EINTR:
+                    return True
+                raise
+            if self._wakeup is not None and self._wakeup[0] in rlist:
+                os.read(self._wakeup[0], 512)
+            ready = [fds[fd] for fd in rlist if fd in fds]
+
+        for server in ready:
+            proxy = self._waiting.pop(server)
+            try:
+                result = proxy._recv_reply()
+            except Exception:
+                self._step_request(server, exc_info=sys.exc_info())
             else:
-                # Don't wait indefinitely for a server we don't need.
-                # This has happened with a server that got 'lost'
-                # in RAM.allocate()
-                timeout = 60
+                self._step_request(server, result)
+        return True
+
+    def _start_request(self, server, request):
+        """
+        Start `request` for `server`. The request is a generator method
+        which yields ``(obj, methodname, args, kwds)`` for each call to be
+        made on a remote `obj`, and is sent the result (or has the exception
+        thrown into it) when the reply arrives.
+        """
+        self._requests[server] = request(server)
+        self._step_request(server)
+
+    def _step_request(self, server, result=None, exc_info=None):
+        """
+        Resume the request for `server` with the result of its last call,
+        until it waits for a reply or completes.
+        """
+        request = self._requests[server]
+        while True:
             try:
-                name, result, exc = self._reply_q.get(timeout=timeout)
-            # Hard to force worker to hang, which is handled here.
-            except Queue.Empty:  #pragma no cover
-                msgs = []
-                for name, in_use in self._in_use.items():
-                    if in_use:
-                        try:
-                            server = self._servers[name]
-                            info = self._server_info[name]
-                        except KeyError:
-                            msgs.append('%r: no startup reply' % name)
-                            self._in_use[name] = False
-                        else:
-                            state = self._server_states[name]
-                            if state not in (_LOADING, _EXECUTING):
-                                msgs.append('%r: %r %s %s'
-                                            % (name, self._servers[name],
-                                               state, self._server_info[name]))
-                                self._in_use[name] = False
-                if msgs:
-                    self._logger.error('Timeout waiting with nothing left to do:')
-                    for msg in msgs:
-                        self._logger.error('    %s', msg)
+                if exc_info is None:
+                    call = request.send(result)
+                else:
+                    call = request.throw(*exc_info)
+            except StopIteration:
+                break
+            # Just being defensive, requests handle their own errors.
+            except Exception as exc:  #pragma no cover
+                self._logger.error('%r: request caused %r', server, exc)
+                self._exceptions[server] = TracedError(exc, traceback.format_exc())
+                break
+
+            obj, methodname, args, kwds = call
+            result = exc_info = None
+            if isinstance(obj, OpenMDAO_Proxy):
+                try:
+                    obj._send_call(methodname, args, kwds)
+                except Exception:
+                    exc_info = sys.exc_info()
+                else:
+                    self._waiting[server] = obj
+                    return
             else:
-                self._in_use[name] = self._server_ready(name)
+                try:
+                    result = getattr(obj, methodname)(*args, **kwds)
+                except Exception:
+                    exc_info = sys.exc_info()
+
+        del self._requests[server]
+        self._replies.append(server)
+
+    def _restart_servers(self):
+        """ Kick off the initial wave of cases on servers we've kept. """
+        for name in sorted(self._servers.keys()):
+            if not self._more_to_go():
+                break
 
-        # Shut-down (started) servers.
+            # Get next case. Limits servers used if servers > cases.
+            try:
+                case = self._iter.next()
+            except StopIteration:
+                if not self._rerun:
+                    self._iter = None
+                    self._seqno = 0
+                    break
+
+            self._seqno += 1
+            self._todo.append((case, self._seqno))
+
+            self._logger.debug('reusing worker %r', name)
+            self._in_use[name] = True
+            self._server_cases[name] = None
+            self._server_states[name] = _EMPTY
+            self._load_failures[name] = 0
+            self._in_use[name] = self._server_ready(name)
+
+    def release_servers(self):
+        """ Release any servers kept by `keep_servers`. """
+        if self._servers:
+            self._shutdown_servers()
+        self._cleanup()
+
+    def _shutdown_servers(self):
+        """ Release (started) servers. """
         self._logger.debug('Shut-down (started) servers')
-        for queue in self._queues.values():
-            queue.put(None)
-        for i in range(len(self._queues)):
+        for name in self._servers.keys():
+            self._release_server(name)
+
+    def _release_server(self, name):
+        """ Release server `name` and forget about it. """
+        server = self._servers.pop(name, None)
+        self._top_levels.pop(name, None)
+        self._server_info.pop(name, None)
+        self._throughput.pop(name, None)
+        if server is not None:
+            self._logger.debug('%r releasing server', name)
             try:
-                name, status, exc = self._reply_q.get(True, 60)
-            # Hard to force worker to hang, which is handled here.
-            except Queue.Empty:  #pragma no cover
-                pass
-            else:
-                if name in self._queues:  # 'Stale' worker can reply *late*.
-                    del self._queues[name]
-        # Hard to force worker to hang, which is handled here.
-        for name in self._queues.keys():  #pragma no cover
-            self._logger.warning('Timeout waiting for %r to shut-down.', name)
+                RAM.release(server)
+            # Just being defensive.
+            except Exception as exc:  #pragma no cover
+                self._logger.warning('%r: release failed: %r', name, exc)
 
     def _busy(self):
         """ Return True while at least one server is in use. """
@@ -369,14 +835,26 @@ class CaseIterDriverBase(Driver):
         Cleanup internal state, and egg file if necessary.
         Note: this happens unconditionally, so it will cause issues
               for workers which haven't shut down by now.
+              Servers kept by `keep_servers` (and their egg file) are
+              retained until :meth:`release_servers` is called.
         """
-        self._reply_q = None
-        self._server_lock = None
-
-        self._servers = {}
-        self._top_levels = {}
-        self._server_info = {}
-        self._queues = {}
+        keep = self.keep_servers and self._servers
+        if not keep:
+            self._alloc_q = None
+            self._allocating = 0
+            if self._wakeup is not None:
+                for fd in self._wakeup:
+                    os.close(fd)
+                self._wakeup = None
+
+            self._servers = {}
+            self._top_levels = {}
+            self._server_info = {}
+            self._throughput = {}
+
+        self._replies = []
+        self._requests = {}
+        self._waiting = {}
         self._in_use = {}
         self._server_states = {}
         self._server_cases = {}
@@ -386,7 +864,12 @@ class CaseIterDriverBase(Driver):
         self._todo = []
         self._rerun = []
 
-        if self._egg_file and os.path.exists(self._egg_file):
+        self._running = {}
+        self._dispatch_time = {}
+        self._abandoned = set()
+
+        if remove_egg and not keep and \
+           self._egg_file and os.path.exists(self._egg_file):
             os.remove(self._egg_file)
             self._egg_file = None
 
@@ -402,7 +885,7 @@ class CaseIterDriverBase(Driver):
         in_use = True
 
         if state == _EMPTY:
-            if server is None or server in self._queues:
+            if server is None or self._servers.get(server) is not None:
                 if self._more_to_go(stepping):
                     self._logger.debug('    load_model')
                     self._load_model(server)
@@ -435,9 +918,46 @@ class CaseIterDriverBase(Driver):
                         self._server_states[server] = _EMPTY
                         in_use = False
 
+        elif state == _EXECUTING and isinstance(self._server_cases[server],
+                                                list):
+            # A batch of cases from _start_next_cases().
+            batch = self._server_cases[server]
+            self._server_cases[server] = None
+            self._update_throughput(server, len(batch))
+            exc = self._model_status(server)
+            if exc is not None:
+                self._logger.debug('    exception while executing: %r', exc)
+            for case, seqno in batch:
+                if exc is not None:
+                    case.msg = str(exc)
+                    case.exc = exc
+
+                if not self._claim_result(server, seqno,
+                                          case.msg is not None):
+                    self._logger.debug('    discard result of case %s', seqno)
+                    continue
+
+                if case.msg is not None and self.error_policy == 'ABORT':
+                    if self._abort_exc is None:
+                        self._abort_exc = case.exc or RuntimeError(case.msg)
+                    self._stop = True
+
+                self._record_case(case, seqno)
+
+            # Cases dropped from the batch are no longer running here.
+            for seqno, servers in self._running.items():
+                if server in servers:
+                    servers.remove(server)
+                    if not servers:
+                        del self._running[seqno]
+
+            # Set up for next batch.
+            in_use = self._start_processing(server, stepping, reload=True)
+
         elif state == _EXECUTING:
             case, seqno = self._server_cases[server]
             self._server_cases[server] = None
+            self._update_throughput(server, 1)
             exc = self._model_status(server)
             if exc is None:
                 # Grab the data from the model.
@@ -453,13 +973,18 @@ class CaseIterDriverBase(Driver):
                 case.msg = str(exc)
                 case.exc = exc
 
-            if case.msg is not None and self.error_policy == 'ABORT':
-                if self._abort_exc is None:
-                    self._abort_exc = exc
-                self._stop = True
+            if server is not None and \
+               not self._claim_result(server, seqno, case.msg is not None):
+                self._logger.debug('    discard result of case %s', seqno)
 
-            # Record the data.
-            self._record_case(case, seqno)
+            else:
+                if case.msg is not None and self.error_policy == 'ABORT':
+                    if self._abort_exc is None:
+                        self._abort_exc = exc
+                    self._stop = True
+
+                # Record the data.
+                self._record_case(case, seqno)
 
             # Set up for next case.
             in_use = self._start_processing(server, stepping, reload=True)
@@ -491,7 +1016,8 @@ class CaseIterDriverBase(Driver):
         If there's something to do, start processing by either loading
         the model, or going straight to running it.
         """
-        if self._more_to_go(stepping):
+        if self._more_to_go(stepping) or \
+           (not stepping and self._straggler(server) is not None):
             if reload:
                 if self.reload_model:
                     self._logger.debug('    reload')
@@ -514,6 +1040,9 @@ class CaseIterDriverBase(Driver):
     def _start_next_case(self, server, stepping=False):
         """ Look for the next case and start it. """
 
+        if server is not None and self.cases_per_dispatch > 1:
+            return self._start_next_cases(server)
+
         if self._todo:
             self._logger.debug('    run startup case')
             case, seqno = self._todo.pop(0)
@@ -524,7 +1053,7 @@ class CaseIterDriverBase(Driver):
             in_use = self._run_case(case, seqno, server, rerun=True)
         elif self._iter is None:
             self._logger.debug('    no more cases')
-            in_use = False
+            in_use = self._speculate(server)
         elif stepping:
             in_use = False
         else:
@@ -534,7 +1063,7 @@ class CaseIterDriverBase(Driver):
                 self._logger.debug('    no more cases')
                 self._iter = None
                 self._seqno = 0
-                in_use = False
+                in_use = self._speculate(server)
             else:
                 self._logger.debug('    run next case')
                 self._seqno += 1
@@ -542,8 +1071,158 @@ class CaseIterDriverBase(Driver):
                 
         return in_use
 
-    def _run_case(self, case, seqno, server, rerun=False):
-        """ Setup and start a case. Returns True if started. """
+    def _start_next_cases(self, server):
+        """
+        Gather up to `cases_per_dispatch` cases and start them on `server`
+        with a single request. Returns True if any were started.
+        """
+        batch = []
+        size = self._batch_size(server)
+        while len(batch) < size:
+            rerun = False
+            if self._todo:
+                case, seqno = self._todo.pop(0)
+            elif self._rerun:
+                case, seqno = self._rerun.pop(0)
+                rerun = True
+            elif self._iter is None:
+                break
+            else:
+                try:
+                    case = self._iter.next()
+                except StopIteration:
+                    self._iter = None
+                    self._seqno = 0
+                    break
+                self._seqno += 1
+                seqno = self._seqno
+            self._prepare_case(case, rerun)
+            batch.append((case, seqno))
+
+        if not batch:
+            self._logger.debug('    no more cases')
+            return self._speculate(server)
+
+        self._logger.debug('    run %d cases', len(batch))
+        self._exceptions[server] = None
+        self._server_cases[server] = batch
+        for case, seqno in batch:
+            self._running.setdefault(seqno, []).append(server)
+        self._dispatch_time[server] = time.time()
+        self._start_request(server, self._remote_run_cases)
+        self._server_states[server] = _EXECUTING
+        return True
+
+    def _batch_size(self, server):
+        """
+        Return the number of cases to send to `server`: `cases_per_dispatch`
+        scaled by the server's throughput relative to the fastest server, so
+        slow servers don't hold up the end of the run with large batches.
+        """
+        case_time = self._case_time(server)
+        times = [t for t in (self._case_time(name)
+                             for name in self._throughput) if t]
+        if not case_time or not times:
+            return self.cases_per_dispatch
+        return max(1, int(round(self.cases_per_dispatch * min(times)
+                                                        / case_time)))
+
+    def _update_throughput(self, server, ncases):
+        """ Record the time `server` took to run `ncases` cases. """
+        start = self._dispatch_time.pop(server, None)
+        if start is not None and ncases:
+            count, seconds = self._throughput.get(server, (0, 0.))
+            self._throughput[server] = (count + ncases,
+                                        seconds + time.time() - start)
+
+    def _case_time(self, server):
+        """ Return average seconds per case for `server`, or None. """
+        count, seconds = self._throughput.get(server, (0, 0.))
+        return seconds / count if count else None
+
+    def _straggler(self, server):
+        """
+        If `speculative`, return the seqno of the running case expected to
+        finish last, provided a copy started now on `server` is expected to
+        finish sooner. Otherwise returns None.
+        """
+        if not self.speculative or self._stop or server is None:
+            return None
+        now = time.time()
+        case_time = self._case_time(server)
+        straggler = None
+        latest = None
+        for seqno, servers in self._running.items():
+            if len(servers) != 1 or servers[0] == server:
+                continue  # Already has a copy running.
+            other = servers[0]
+            other_time = self._case_time(other) or 0.
+            finish = self._dispatch_time[other] + \
+                     self._position(other, seqno) * other_time
+            if case_time is not None and now + case_time >= finish:
+                continue
+            if latest is None or finish > latest:
+                straggler = seqno
+                latest = finish
+        return straggler
+
+    def _position(self, server, seqno):
+        """
+        Return the number of cases `server` runs up to and including case
+        `seqno`, which is more than one if it's part of a batch.
+        """
+        cases = self._server_cases.get(server)
+        if isinstance(cases, list):
+            for i, (case, num) in enumerate(cases):
+                if num == seqno:
+                    return i + 1
+        return 1
+
+    def _running_case(self, server, seqno):
+        """ Return case `seqno`, which `server` is running. """
+        cases = self._server_cases[server]
+        if not isinstance(cases, list):
+            cases = [cases]
+        for case, num in cases:
+            if num == seqno:
+                return case
+
+    def _speculate(self, server):
+        """ Start a copy of a straggling case. Returns True if started. """
+        seqno = self._straggler(server)
+        if seqno is None:
+            return False
+        other = self._running[seqno][0]
+        case = copy.deepcopy(self._running_case(other, seqno))
+        self._logger.debug('    run copy of case %s from %r', seqno, other)
+        return self._run_case(case, seqno, server, rerun=True)
+
+    def _claim_result(self, server, seqno, failed):
+        """
+        Called when `server` has finished case `seqno`. Returns False if
+        the result should be discarded, because another copy of the case
+        has already been recorded or this copy failed while another copy
+        is still running. Otherwise servers running other copies of the
+        case are abandoned, unless they are running it as part of a batch
+        whose other cases are still needed.
+        """
+        servers = self._running.get(seqno)
+        if servers is None or server not in servers:
+            return False
+        servers.remove(server)
+        if failed and servers:
+            return False
+        del self._running[seqno]
+        for other in servers:
+            if isinstance(self._server_cases.get(other), list):
+                continue  # Its copy is discarded when the batch is done.
+            self._logger.debug('    abandon %r', other)
+            self._in_use[other] = False
+            self._abandoned.add(other)
+        return True
+
+    def _prepare_case(self, case, rerun):
+        """ Reset the status of `case` and add any printvars to it. """
         if not rerun:
             if not case.max_retries:
                 case.max_retries = self.max_retries
@@ -554,16 +1233,12 @@ class CaseIterDriverBase(Driver):
         # Additional user-requested variables
         # These must be added here so that the outputs are in the cases
         # before they are in the server list.
-        for printvar in self.printvars:
+        for var, expr in self._get_printvars():
+            case.add_output(var, expr.evaluate())
 
-            if  '*' in printvar:
-                printvars = self._get_all_varpaths(printvar)
-            else:
-                printvars = [printvar]
-
-            for var in printvars:
-                val = ExprEvaluator(var, scope=self.parent).evaluate()
-                case.add_output(var, val)
+    def _run_case(self, case, seqno, server, rerun=False):
+        """ Setup and start a case. Returns True if started. """
+        self._prepare_case(case, rerun)
 
         try:
             for event in self.get_events(): 
@@ -581,11 +1256,15 @@ class CaseIterDriverBase(Driver):
                 self._logger.debug('    %s', msg)
                 self.raise_exception(msg, _ServerError)
             self._server_cases[server] = (case, seqno)
+            if server is not None:
+                self._running.setdefault(seqno, []).append(server)
+                self._dispatch_time[server] = time.time()
             self._model_execute(server)
             self._server_states[server] = _EXECUTING
         except _ServerError as exc:
             case.msg = str(exc)
-            self._record_case(case, seqno)
+            if not self._running.get(seqno):  # No copy still running.
+                self._record_case(case, seqno)
             return self._start_processing(server, stepping=False)
         else:
             return True
@@ -601,68 +1280,23 @@ class CaseIterDriverBase(Driver):
             for recorder in self.recorders:
                 recorder.record(case)
 
-    def _service_loop(self, name, resource_desc, credentials, reply_q):
-        """ Each server has an associated thread executing this. """
-        set_credentials(credentials)
-
-        server, server_info = RAM.allocate(resource_desc)
-        # Just being defensive, this should never happen.
-        if server is None:  #pragma no cover
-            self._logger.error('Server allocation for %r failed :-(', name)
-            reply_q.put((name, False, None))
-            return
-        else:
-            # Clear egg re-use indicator.
-            server_info['egg_file'] = None
-            self._logger.debug('%r using %r', name, server_info['name'])
-            if self._logger.level == logging.NOTSET:
-                # By default avoid lots of protocol messages.
-                server.set_log_level(logging.DEBUG)
-            else:
-                server.set_log_level(self._logger.level)
-
-        request_q = Queue.Queue()
-
-        try:
-            with self._server_lock:
-                self._servers[name] = server
-                self._server_info[name] = server_info
-                self._queues[name] = request_q
-
-            reply_q.put((name, True, None))  # ACK startup.
-
-            while True:
-                request = request_q.get()
-                if request is None:
-                    break
-                try:
-                    result = request[0](request[1])
-                except Exception as req_exc:
-                    self._logger.error('%r: %s caused %r', name,
-                                       request[0], req_exc)
-                    result = None
-                else:
-                    req_exc = None
-                reply_q.put((name, result, req_exc))
-        except Exception as exc:  # pragma no cover
-            # This can easily happen if we take a long time to allocate and
-            # we get 'cleaned-up' before we get started.
-            if self._server_lock is not None:
-                self._logger.error('%r: %r', name, exc)
-        finally:
-            self._logger.debug('%r releasing server', name)
-            RAM.release(server)
-            reply_q.put((name, True, None))  # ACK shutdown.
-
     def _load_model(self, server):
         """ Load a model into a server. """
         self._exceptions[server] = None
         if server is not None:
-            self._queues[server].put((self._remote_load_model, server))
+            self._start_request(server, self._remote_load_model)
 
     def _remote_load_model(self, server):
         """ Load model into remote server. """
-        egg_file = self._server_info[server].get('egg_file', None)
+        info = self._server_info[server]
+        if self.keep_servers and not self.reload_model and \
+           self._top_levels.get(server) is not None and \
+           info.get('model_egg') is self._egg_file:
+            # Model kept from an earlier execution, just update it.
+            self._update_inputs(server)
+            return
+
+        egg_file = info.get('egg_file', None)
         if egg_file is None or egg_file is not self._egg_file:
             # Only transfer if changed.
             try:
@@ -678,7 +1312,8 @@ class CaseIterDriverBase(Driver):
             else:
                 self._server_info[server]['egg_file'] = self._egg_file
         try:
-            tlo = self._servers[server].load_model(self._egg_file)
+            tlo = yield (self._servers[server], 'load_model',
+                         (self._egg_file,), {})
         # Difficult to force load error.
         except Exception as exc:  #pragma nocover
             self._logger.error('server.load_model of %r failed: %r',
@@ -687,6 +1322,29 @@ class CaseIterDriverBase(Driver):
             self._exceptions[server] = TracedError(exc, traceback.format_exc())
         else:
             self._top_levels[server] = tlo
+            if self.keep_servers:
+                info['model_egg'] = self._egg_file
+                info['model_inputs'] = self._egg_inputs
+                self._update_inputs(server)
+
+    def _update_inputs(self, server):
+        """ Set inputs which have changed since the server's model was. """
+        info = self._server_info[server]
+        old = info['model_inputs']
+        try:
+            for path, value in self._model_inputs.items():
+                if path not in old or _differs(old[path], value):
+                    self._top_levels[server].set(path, value)
+        except Exception as exc:
+            self._logger.error('server %r update of %r failed: %r',
+                               server, path, exc)
+            self._exceptions[server] = TracedError(exc, traceback.format_exc())
+        else:
+            info['model_inputs'] = self._model_inputs
+
+    def _input_changes(self):
+        """ Return the inputs which differ from those saved in the egg. """
+        return _changes(self._egg_inputs, self._model_inputs)
 
     def _model_set(self, server, name, index, value):
         """ Set value in server's model. """
@@ -706,14 +1364,15 @@ class CaseIterDriverBase(Driver):
                 self._exceptions[server] = TracedError(exc, traceback.format_exc())
                 self._logger.critical('Caught exception: %r' % exc)
         else:
-            self._queues[server].put((self._remote_model_execute, server))
+            self._start_request(server, self._remote_model_execute)
 
     def _remote_model_execute(self, server):
         """ Execute model in remote server. """
         case, seqno = self._server_cases[server]
+        tlo = self._top_levels[server]
         try:
-            self._top_levels[server].set_itername(self.get_itername(), seqno)
-            self._top_levels[server].run(case_id=case.uuid)
+            yield (tlo, 'set_itername', (self.get_itername(), seqno), {})
+            yield (tlo, 'run', (), {'case_id': case.uuid})
         except Exception as exc:
             self._exceptions[server] = TracedError(exc, traceback.format_exc())
             self._logger.error('Caught exception from server %r, PID %d on %s: %r',
@@ -721,6 +1380,29 @@ class CaseIterDriverBase(Driver):
                                self._server_info[server]['pid'],
                                self._server_info[server]['host'], exc)
 
+    def _remote_run_cases(self, server):
+        """ Run a batch of cases in remote server. """
+        batch = self._server_cases[server]
+        cases = [case for case, seqno in batch]
+        seqnos = [seqno for case, seqno in batch]
+        egg_file = self._egg_file if self.reload_model else None
+        inputs = self._input_changes() if egg_file and self.keep_servers \
+                                       else None
+        try:
+            cases = yield (self._servers[server], 'run_cases',
+                           (cases, seqnos, self.get_itername(),
+                            self.get_events(), egg_file,
+                            self.error_policy == 'ABORT', inputs), {})
+        except Exception as exc:
+            self._exceptions[server] = TracedError(exc, traceback.format_exc())
+            self._logger.error('Caught exception from server %r, PID %d on %s: %r',
+                               self._server_info[server]['name'],
+                               self._server_info[server]['pid'],
+                               self._server_info[server]['host'], exc)
+        else:
+            # Cases not run due to an earlier failure are dropped.
+            batch[:] = zip(cases, seqnos)
+
     def _model_status(self, server):
         """ Return execute status from model. """
         return self._exceptions[server]
@@ -12,7 +12,7 @@ import logging
 from math import isnan
 
 try:
-    from numpy import zeros, array, hstack
+    from numpy import zeros, hstack
 except ImportError as err:
     logging.warn("In %s: %r", __file__, err)
     # to keep class decl from barfing before being stubbed out
@@ -157,7 +157,7 @@ class COBYLAdriver(Driver):
             self.raise_exception(msg, RuntimeError)
 
         # Constraints (COBYLA defines positive as satisfied)
-        cons = -1. * array(self.eval_ineq_constraints())
+        cons = -self.eval_ineq_constraint_array()
 
         # Side Constraints
         vals = self.eval_parameters(self.parent)
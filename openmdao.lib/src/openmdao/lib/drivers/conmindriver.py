@@ -407,8 +407,8 @@ class CONMINdriver(Driver):
             self.cnmn1.obj = self.eval_objective()
 
             # update constraint value array
-            self.constraint_vals[0:self.total_ineq_constraints()] = \
-                self.eval_ineq_constraints()
+            cons = self.eval_ineq_constraint_array()
+            self.constraint_vals[0:len(cons)] = cons
 
             #self._logger.debug('constraints = %s' % self.constraint_vals)
 
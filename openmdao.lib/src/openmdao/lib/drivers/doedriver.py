@@ -10,7 +10,7 @@ import csv
 # pylint: disable-msg=E0611,F0401
 from openmdao.main.datatypes.api import Bool, List, Slot, Float, Str, Instance
 
-from openmdao.main.case import Case
+from openmdao.main.case import Case, CaseSchema, CompactCase
 from openmdao.main.interfaces import IDOEgenerator, ICaseFilter, implements, \
                                      IHasParameters
 from openmdao.lib.drivers.caseiterdriver import CaseIterDriverBase
@@ -68,15 +68,21 @@ class DOEdriverBase(CaseIterDriverBase):
         lower = self.get_lower_bounds()
         delta = self.get_upper_bounds() - lower
 
+        # all of the cases have the same inputs and outputs
+        inputs = []
+        for param in self.get_parameters().values():
+            inputs.extend(param.targets)
+        schema = CaseSchema(inputs + list(events), outputs)
+
         for i, row in enumerate(self.DOEgenerator):
             if record_doe:
                 csv_writer.writerow(['%.16g' % val for val in row])
             vals = lower + delta*row
-            case = self.set_parameters(vals, Case(parent_uuid=self._case_id))
+            case = self.set_parameters(vals, CompactCase(schema,
+                                                parent_uuid=self._case_id))
             # now add events
             for varname in events:
                 case.add_input(varname, True)
-            case.add_outputs(outputs)
             if case_filter is None or case_filter.select(i, case):
                 yield case
 
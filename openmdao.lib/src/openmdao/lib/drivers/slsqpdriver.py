@@ -12,7 +12,7 @@ import logging
 from math import isnan
 
 try:
-    from numpy import zeros, array
+    from numpy import zeros
 except ImportError as err:
     logging.warn("In %s: %r", __file__, err)
     # to keep class decl from barfing before being stubbed out
@@ -188,7 +188,7 @@ class SLSQPdriver(Driver):
 
         # Constraints. Note that SLSQP defines positive as satisfied.
         if self.ncon > 0:
-            g = -1. * array(self.eval_constraints(self.parent))
+            g = -self.eval_constraint_array(self.parent)
 
         if self.iprint > 0:
             pyflush(self.iout)
@@ -2,9 +2,11 @@
 Test CaseIteratorDriver.
 """
 
+import cPickle
 import logging
 import os
 import pkg_resources
+import Queue
 import re
 import subprocess
 import sys
@@ -19,7 +21,7 @@ from openmdao.main.api import Assembly, Component, Case, VariableTree, \
                               set_as_top
 from openmdao.main.interfaces import ICaseIterator
 from openmdao.main.eggchecker import check_save_load
-from openmdao.main.exceptions import RunStopped
+from openmdao.main.exceptions import RunStopped, TracedError
 
 from openmdao.main.datatypes.api import Float, Bool, Array, Instance, Int, Slot, Str, \
                                         List, VarTree
@@ -28,6 +30,7 @@ from openmdao.lib.casehandlers.api import ListCaseRecorder, ListCaseIterator, \
                                           SequenceCaseFilter
 
 from openmdao.test.cluster import init_cluster
+from openmdao.test.execcomp import ExecComp
 
 from openmdao.util.testutil import assert_raises
 
@@ -79,6 +82,44 @@ class DrivenComponent(Component):
             self.parent.driver.stop()  # Only valid if sequential!
 
 
+class ArgsError(Exception):
+    """ An exception that can't be created from just a message. """
+
+    def __init__(self, code, text):
+        super(ArgsError, self).__init__('%s (code %d)' % (text, code))
+
+
+class Upstream(Component):
+    """ Feeds an input of a driven component from outside the workflow. """
+
+    inp = Float(0., iotype='in')
+    out = Float(0., iotype='out')
+
+    def execute(self):
+        self.out = self.inp
+
+
+class FDGradient(Component):
+    """ Finite differences a model of its own using worker processes. """
+
+    x = Float(1., iotype='in')
+    dydx = Float(0., iotype='out')
+    local_runs = Int(0, iotype='out')
+
+    def execute(self):
+        model = set_as_top(Assembly())
+        model.add('comp', ExecComp(exprs=['y=x1*x1+3.0*x2']))
+        model.driver.workflow.add('comp')
+        model.driver.gradient_options.fd_workers = 2
+        model.comp.x1 = self.x
+        model.run()
+        count = model.comp.exec_count
+        J = model.driver.workflow.calc_gradient(inputs=['comp.x1', 'comp.x2'],
+                                                outputs=['comp.y'])
+        self.dydx = J[0, 0]
+        self.local_runs = model.comp.exec_count - count
+
+
 def _get_driver():
     return CaseIteratorDriver()
     #return SimpleCaseIterDriver()
@@ -254,6 +295,284 @@ class TestCase(unittest.TestCase):
         self.run_cases(sequential=False, forced_errors=True, retry=False)
         self.run_cases(sequential=False, forced_errors=True, retry=True)
 
+    def test_concurrent_batched(self):
+        logging.debug('')
+        logging.debug('test_concurrent_batched')
+        init_cluster(encrypted=True, allow_shell=True)
+        self.model.driver.cases_per_dispatch = 3
+        self.run_cases(sequential=False)
+        self.generate_cases(force_errors=True)
+        self.run_cases(sequential=False, forced_errors=True, retry=True)
+
+    def test_traced_error_pickle(self):
+        logging.debug('')
+        logging.debug('test_traced_error_pickle')
+
+        class EggError(Exception):
+            """ Stands in for a class only found in the model's egg. """
+            pass
+
+        for exc, cls, msg in ((ValueError('bad value'), ValueError,
+                               'bad value'),
+                              (ArgsError(3, 'bad args'), RuntimeError,
+                               'ArgsError: bad args (code 3)'),
+                              (EggError('bad egg'), RuntimeError,
+                               'EggError: bad egg')):
+            err = cPickle.loads(cPickle.dumps(TracedError(exc, 'Traceback'),
+                                              cPickle.HIGHEST_PROTOCOL))
+            self.assertTrue(isinstance(err, TracedError))
+            self.assertEqual(err.orig_exc.__class__, cls)
+            self.assertEqual(str(err), msg)
+            self.assertEqual(err.traceback, 'Traceback')
+
+    def test_concurrent_forked(self):
+        logging.debug('')
+        logging.debug('test_concurrent_forked')
+        if sys.platform == 'win32':
+            raise nose.SkipTest("Can't fork on Windows")
+        init_cluster(encrypted=True, allow_shell=True)
+        self.model.driver.local_fork = True
+        for reload_model in (True, False):
+            self.model.driver.reload_model = reload_model
+            self.generate_cases()
+            self.run_cases(sequential=False)
+            self.assertEqual(self.model.driver._egg_file, None)
+            self.generate_cases(force_errors=True)
+            self.run_cases(sequential=False, forced_errors=True, retry=True)
+
+    def test_forked_abort(self):
+        logging.debug('')
+        logging.debug('test_forked_abort')
+        if sys.platform == 'win32':
+            raise nose.SkipTest("Can't fork on Windows")
+        init_cluster(encrypted=True, allow_shell=True)
+
+        # Cases still to be handed out aren't run after a failure.
+        cases = []
+        for i in range(40):
+            inputs = [('driven.x', numpy_random.normal(size=4)),
+                      ('driven.y', numpy_random.normal(size=10)),
+                      ('driven.raise_error', i == 0),
+                      ('driven.sleep', 0. if i == 0 else 0.2)]
+            outputs = ['driven.rosen_suzuki', 'driven.sum_y']
+            cases.append(Case(inputs, outputs, label=str(i)))
+        driver = self.model.driver
+        driver.sequential = False
+        driver.local_fork = True
+        driver.error_policy = 'ABORT'
+        driver.iterator = ListCaseIterator(cases)
+        driver.recorders = [ListCaseRecorder()]
+        try:
+            self.model.run()
+        except RuntimeError as exc:
+            self.assertTrue('Forced error' in str(exc))
+        else:
+            self.fail('Expected RuntimeError')
+        self.assertTrue(len(driver.recorders[0]) < len(cases))
+        labels = [case.label for case in driver.recorders[0].cases]
+        self.assertTrue('0' in labels)
+
+    def test_forked_fd_workers(self):
+        logging.debug('')
+        logging.debug('test_forked_fd_workers')
+        if sys.platform == 'win32':
+            raise nose.SkipTest("Can't fork on Windows")
+        init_cluster(encrypted=True, allow_shell=True)
+
+        # Cases evaluated in forked workers fork finite difference workers.
+        model = set_as_top(Assembly())
+        model.add('driver', CaseIteratorDriver())
+        model.add('grad', FDGradient())
+        model.driver.workflow.add('grad')
+        model.driver.sequential = False
+        model.driver.local_fork = True
+        cases = [Case([('grad.x', float(i))],
+                      ['grad.dydx', 'grad.local_runs'], label=str(i))
+                 for i in range(4)]
+        model.driver.iterator = ListCaseIterator(cases)
+        model.driver.recorders = [ListCaseRecorder()]
+        model.run()
+
+        results = model.driver.recorders[0].cases
+        self.assertEqual(len(results), len(cases))
+        for case in results:
+            self.assertEqual(case.msg, None)
+            self.assertAlmostEqual(case['grad.dydx'], 2.*int(case.label), 4)
+            self.assertEqual(case['grad.local_runs'], 0)
+
+    def test_concurrent_speculative(self):
+        logging.debug('')
+        logging.debug('test_concurrent_speculative')
+        init_cluster(encrypted=True, allow_shell=True)
+        self.model.driver.speculative = True
+        self.run_cases(sequential=False)
+        labels = [case.label for case in self.model.driver.recorders[0].cases]
+        self.assertEqual(sorted(labels), sorted(set(labels)))
+        self.generate_cases(force_errors=True)
+        self.run_cases(sequential=False, forced_errors=True, retry=True)
+
+    def test_scheduling(self):
+        driver = self.model.driver
+        driver.cases_per_dispatch = 8
+        self.assertEqual(driver._batch_size('a'), 8)
+
+        driver._throughput = {'a': (4, 2.), 'b': (2, 4.)}
+        self.assertEqual(driver._case_time('a'), 0.5)
+        self.assertEqual(driver._case_time('b'), 2.)
+        self.assertEqual(driver._case_time('c'), None)
+        self.assertEqual(driver._batch_size('a'), 8)
+        self.assertEqual(driver._batch_size('b'), 2)
+        self.assertEqual(driver._batch_size('c'), 8)
+
+        # 'b' is expected to finish its case well after 'a' could.
+        now = time.time()
+        driver._running = {1: ['b'], 2: ['c']}
+        driver._dispatch_time = {'b': now, 'c': now}
+        self.assertEqual(driver._straggler('a'), None)
+        driver.speculative = True
+        self.assertEqual(driver._straggler('a'), 1)
+        self.assertEqual(driver._straggler(None), None)
+
+        # First result wins, a failed copy doesn't while another runs.
+        driver._running = {1: ['b', 'a']}
+        driver._in_use = {'a': True, 'b': True}
+        self.assertFalse(driver._claim_result('a', 1, True))
+        self.assertEqual(driver._running, {1: ['b']})
+        driver._running = {1: ['b', 'a']}
+        self.assertTrue(driver._claim_result('a', 1, False))
+        self.assertEqual(driver._running, {})
+        self.assertEqual(driver._in_use, {'a': True, 'b': False})
+        self.assertEqual(driver._abandoned, set(['b']))
+        self.assertFalse(driver._claim_result('b', 1, False))
+
+        # The last case of a batch is expected to finish last.
+        driver._running = {1: ['b'], 2: ['b'], 3: ['c']}
+        driver._dispatch_time = {'b': now, 'c': now}
+        driver._server_cases = {'b': [('case1', 1), ('case2', 2)],
+                                'c': ('case3', 3)}
+        self.assertEqual(driver._position('b', 2), 2)
+        self.assertEqual(driver._position('c', 3), 1)
+        self.assertEqual(driver._straggler('a'), 2)
+        self.assertEqual(driver._running_case('b', 2), 'case2')
+
+        # A batch isn't abandoned when a copy of one of its cases wins.
+        driver._running = {2: ['b', 'a']}
+        driver._in_use = {'a': True, 'b': True}
+        driver._abandoned = set()
+        self.assertTrue(driver._claim_result('a', 2, False))
+        self.assertEqual(driver._in_use, {'a': True, 'b': True})
+        self.assertEqual(driver._abandoned, set())
+        self.assertFalse(driver._claim_result('b', 2, False))
+
+    def test_concurrent_batched_speculative(self):
+        logging.debug('')
+        logging.debug('test_concurrent_batched_speculative')
+        init_cluster(encrypted=True, allow_shell=True)
+        self.model.driver.cases_per_dispatch = 3
+        self.model.driver.speculative = True
+        self.run_cases(sequential=False)
+        labels = [case.label for case in self.model.driver.recorders[0].cases]
+        self.assertEqual(sorted(labels), sorted(set(labels)))
+        self.generate_cases(force_errors=True)
+        self.run_cases(sequential=False, forced_errors=True, retry=True)
+
+    def test_requests(self):
+        # Requests making calls on local objects complete immediately.
+        driver = self.model.driver
+        calls = []
+
+        class Target(object):
+            def echo(self, value):
+                return value
+            def fail(self):
+                raise ValueError('failed')
+
+        def request(server):
+            calls.append((yield (Target(), 'echo', (1,), {})))
+            try:
+                yield (Target(), 'fail', (), {})
+            except ValueError as exc:
+                calls.append(str(exc))
+
+        driver._start_request('s', request)
+        self.assertEqual(calls, [1, 'failed'])
+        self.assertEqual(driver._requests, {})
+        self.assertEqual(driver._next_reply(0), 's')
+        assert_raises(self, 'driver._next_reply(0)', globals(), locals(),
+                      Queue.Empty, '')
+
+    def test_keep_servers(self):
+        logging.debug('')
+        logging.debug('test_keep_servers')
+        init_cluster(encrypted=True, allow_shell=True)
+        driver = self.model.driver
+        driver.sequential = False
+        driver.keep_servers = True
+        driver.printvars = ['driven.extra']
+        try:
+            for reload_model in (True, False):
+                driver.reload_model = reload_model
+                egg_file = None
+                for sleep in (0.2, 0.1):
+                    # Run driver directly, a top-level run releases servers.
+                    self.model.driven.sleep = sleep
+                    driver.iterator = ListCaseIterator(self.cases)
+                    driver.recorders = [ListCaseRecorder()]
+                    driver.run()
+                    self.assertEqual(len(driver.recorders[0]), len(self.cases))
+                    self.verify_results()
+                    self.assertTrue(driver._servers)
+                    if egg_file is None:
+                        egg_file = driver._egg_file
+                    else:
+                        # Model not re-saved, but servers see changed input.
+                        self.assertTrue(driver._egg_file is egg_file)
+                        for name, info in driver._server_info.items():
+                            if driver._top_levels.get(name) is not None:
+                                self.assertEqual(
+                                    driver._top_levels[name].get('driven.sleep'),
+                                    sleep)
+                driver.release_servers()
+                self.assertEqual(driver._servers, {})
+                self.assertFalse(os.path.exists(egg_file))
+        finally:
+            driver.release_servers()
+
+    def test_keep_servers_extern(self):
+        logging.debug('')
+        logging.debug('test_keep_servers_extern')
+        init_cluster(encrypted=True, allow_shell=True)
+        self.model.add('upstream', Upstream())
+        self.model.connect('upstream.out', 'driven.sleep')
+        driver = self.model.driver
+        driver.sequential = False
+        driver.keep_servers = True
+        driver.printvars = ['driven.extra']
+        try:
+            egg_file = None
+            for sleep, resaved in ((0.2, True), (0.1, True), (0.1, False)):
+                # Change a connected input from outside the workflow.
+                self.model.upstream.inp = sleep
+                self.model.upstream.run()
+                self.model.update_inputs('driven')
+                self.assertEqual(driver._get_extern_inputs(),
+                                 {'driven.sleep': sleep})
+                driver.iterator = ListCaseIterator(self.cases)
+                driver.recorders = [ListCaseRecorder()]
+                driver.run()
+                self.assertEqual(len(driver.recorders[0]), len(self.cases))
+                self.verify_results()
+                # Model re-saved only if the input changed.
+                self.assertEqual(driver._egg_file is not egg_file, resaved)
+                egg_file = driver._egg_file
+                for name, info in driver._server_info.items():
+                    if driver._top_levels.get(name) is not None:
+                        self.assertEqual(
+                            driver._top_levels[name].get('driven.sleep'),
+                            sleep)
+        finally:
+            driver.release_servers()
+
     def test_unencrypted(self):
         logging.debug('')
         logging.debug('test_unencrypted')
@@ -31,7 +31,7 @@ from openmdao.main.interfaces import implements, Attribute, Interface
 
 from openmdao.main.file_supp import FileMetadata
 
-from openmdao.main.case import Case
+from openmdao.main.case import Case, CaseSchema, CompactCase
 
 from openmdao.main.arch import Architecture
 from openmdao.main.problem_formulation import ArchitectureAssembly, OptProblem
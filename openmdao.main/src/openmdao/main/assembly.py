@@ -124,6 +124,10 @@ class Assembly(Component):
         # parent depgraph may have to invalidate us multiple times per pass
         self._invalidation_type = 'partial'
 
+        # names collected between hold_invalidation and release_invalidation
+        self._held_invalidations = None
+        self._held_inputs = None
+
         # default Driver executes its workflow once
         self.add('driver', Run_Once())
 
@@ -708,6 +712,11 @@ class Assembly(Component):
             self.raise_exception(str(err), type(err))
 
     def _input_updated(self, name, fullpath=None):
+        if self._held_invalidations is not None:
+            self._held_invalidations.add(name)
+            self._held_inputs.add(name)
+            return
+
         outs = self.invalidate_deps([name])
         if self.parent:
             outs.add(name)
@@ -730,11 +739,50 @@ class Assembly(Component):
                     vnames.extend(self._depgraph._all_child_vars(name,
                                                                  direction='in'))
 
+        if self._held_invalidations is not None:
+            self._held_invalidations.update(vnames)
+            return []
+
         bouts = self.invalidate_deps(vnames)
         if bouts and self.parent:
             self.parent.child_invalidated(self.name, bouts)
         return bouts
 
+    @rbac(('owner', 'user'))
+    def hold_invalidation(self):
+        """Collect the variables passed to child_invalidated() and our own
+        updated inputs instead of invalidating everything that depends on
+        them right away. Call release_invalidation() to do it in one pass,
+        for example after setting many inputs at once. Returns False if
+        invalidation was already being held, in which case the caller should
+        leave the release to whoever started the hold.
+        """
+        if self._held_invalidations is None:
+            self._held_invalidations = set()
+            self._held_inputs = set()
+            return True
+        return False
+
+    @rbac(('owner', 'user'))
+    def release_invalidation(self):
+        """Invalidate everything that depends on the variables collected
+        since hold_invalidation() in a single pass, and notify our parent.
+        Returns a list of our newly invalidated boundary outputs.
+        """
+        vnames = self._held_invalidations
+        inputs = self._held_inputs
+        self._held_invalidations = self._held_inputs = None
+        if not vnames:
+            return []
+
+        bouts = self.invalidate_deps(list(vnames))
+        if self.parent:
+            outs = set(bouts)
+            outs.update(inputs)
+            if outs:
+                self.parent.child_invalidated(self.name, list(outs))
+        return bouts
+
     @rbac(('owner', 'user'))
     def child_run_finished(self, childname, outs=None):
         """Called by a child when it completes its run() function."""
@@ -0,0 +1,294 @@
+"""
+Forward mode differentiation of expressions. An expression that is
+evaluated with :class:`ADValue` objects in place of its variables produces
+an ADValue holding the value of the expression along with its full Jacobian
+with respect to each of those variables, so array-valued variables don't
+have to be perturbed one element at a time.
+"""
+
+import math
+
+import numpy
+from numpy import arange, identity, log, ravel, sign, size
+
+__all__ = ['ADValue', 'ADNamespace', 'AutoDiffError', 'seed', 'ad_functions']
+
+
+class AutoDiffError(Exception):
+    """Raised when an expression contains an operation that can't be
+    differentiated in forward mode.
+    """
+    pass
+
+
+def _value(obj):
+    if isinstance(obj, ADValue):
+        return obj.value
+    return obj
+
+
+def _is_object_array(obj):
+    return isinstance(obj, numpy.ndarray) and obj.dtype == object
+
+
+def _chain(value, terms):
+    """Return an ADValue for `value` whose derivatives are the sum of the
+    derivatives of each ADValue in `terms` scaled elementwise by its local
+    derivative. `terms` is a list of tuples of the form (local_deriv, obj).
+    Raises AutoDiffError if `value` or an operand is an object array, such
+    as numpy.dot() makes of ADValues, whose derivatives would be lost.
+    """
+    if _is_object_array(value):
+        raise AutoDiffError("can't differentiate an object array")
+    nrows = size(value)
+    derivs = {}
+    for local, obj in terms:
+        if not isinstance(obj, ADValue):
+            if _is_object_array(obj):
+                raise AutoDiffError("can't differentiate an object array")
+            continue
+        local = ravel(local)
+        if local.size not in (1, nrows):
+            raise AutoDiffError("can't broadcast derivative of size %d to"
+                                " size %d" % (local.size, nrows))
+        for name, J in obj.derivs.items():
+            if J.shape[0] != nrows:
+                if J.shape[0] != 1:
+                    raise AutoDiffError("can't broadcast derivative of size"
+                                        " %d to size %d" % (J.shape[0], nrows))
+                J = J.repeat(nrows, 0)
+            if local.size == 1:
+                J = local[0] * J
+            else:
+                J = local[:, None] * J
+            if name in derivs:
+                derivs[name] = derivs[name] + J
+            else:
+                derivs[name] = J
+    return ADValue(value, derivs)
+
+
+class ADValue(object):
+    """A value along with its derivatives with respect to some set of
+    variables. The derivatives are kept in a dict keyed on variable name.
+    Each one is a 2D array with a row for each entry of the flattened value
+    and a column for each entry of the flattened variable.
+    """
+
+    # make numpy arrays defer to our reflected operators
+    __array_priority__ = 100
+    __array_ufunc__ = None
+
+    def __init__(self, value, derivs):
+        self.value = value
+        self.derivs = derivs
+
+    def __len__(self):
+        return len(self.value)
+
+    def __iter__(self):
+        for i in range(len(self.value)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if not isinstance(self.value, numpy.ndarray):
+            raise AutoDiffError("can't index a scalar")
+        rows = ravel(arange(self.value.size).reshape(self.value.shape)[index])
+        return ADValue(self.value[index],
+                       dict([(name, J[rows]) for name, J in self.derivs.items()]))
+
+    # comparisons look only at the value, so branches in an expression take
+    # the same path they would if it were evaluated normally
+    def __lt__(self, other):
+        return self.value < _value(other)
+
+    def __le__(self, other):
+        return self.value <= _value(other)
+
+    def __gt__(self, other):
+        return self.value > _value(other)
+
+    def __ge__(self, other):
+        return self.value >= _value(other)
+
+    def __eq__(self, other):
+        return self.value == _value(other)
+
+    def __ne__(self, other):
+        return self.value != _value(other)
+
+    __hash__ = object.__hash__
+
+    def __pos__(self):
+        return self
+
+    def __neg__(self):
+        return _chain(-self.value, [(-1., self)])
+
+    def __abs__(self):
+        return _chain(abs(self.value), [(sign(self.value), self)])
+
+    def __add__(self, other):
+        return _chain(self.value + _value(other), [(1., self), (1., other)])
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return _chain(self.value - _value(other), [(1., self), (-1., other)])
+
+    def __rsub__(self, other):
+        return _chain(other - self.value, [(-1., self)])
+
+    def __mul__(self, other):
+        oval = _value(other)
+        return _chain(self.value * oval, [(oval, self), (self.value, other)])
+
+    __rmul__ = __mul__
+
+    def __div__(self, other):
+        oval = _value(other)
+        return _chain(self.value / oval,
+                      [(1. / oval, self), (-self.value / oval**2, other)])
+
+    __truediv__ = __div__
+
+    def __rdiv__(self, other):
+        return _chain(other / self.value, [(-other / self.value**2, self)])
+
+    __rtruediv__ = __rdiv__
+
+    def __pow__(self, other):
+        oval = _value(other)
+        value = self.value ** oval
+        terms = [(oval * self.value ** (oval - 1), self)]
+        if isinstance(other, ADValue):
+            terms.append((value * log(self.value), other))
+        return _chain(value, terms)
+
+    def __rpow__(self, other):
+        value = other ** self.value
+        return _chain(value, [(value * log(other), self)])
+
+
+def seed(name, value):
+    """Return an ADValue for the variable `name` whose derivative with
+    respect to itself is the identity.
+    """
+    return ADValue(value, {name: identity(size(value))})
+
+
+def _unary(func, deriv):
+    """Return a version of the elementwise function `func` that also handles
+    ADValues, given a function that computes its derivative.
+    """
+    def _func(x):
+        if isinstance(x, ADValue):
+            return _chain(func(x.value), [(deriv(x.value), x)])
+        return func(x)
+    return _func
+
+
+def _pow(x, y):
+    if isinstance(x, ADValue) or isinstance(y, ADValue):
+        return x ** y
+    return numpy.power(x, y)
+
+
+def _sum(x, start=0):
+    if isinstance(x, ADValue) and isinstance(x.value, numpy.ndarray):
+        return start + ADValue(numpy.sum(x.value),
+                               dict([(name, J.sum(0)[None, :])
+                                     for name, J in x.derivs.items()]))
+    return sum(x, start)
+
+
+def _extreme(func, argfunc):
+    def _func(*args):
+        if len(args) == 1:
+            x = args[0]
+            if isinstance(x, ADValue) and isinstance(x.value, numpy.ndarray):
+                return x[numpy.unravel_index(argfunc(x.value), x.value.shape)]
+            args = list(x)
+        if not any(isinstance(arg, ADValue) for arg in args):
+            return func(args)
+        return args[argfunc([_value(arg) for arg in args])]
+    return _func
+
+
+_derivs = {
+    'sin': (numpy.sin, numpy.cos),
+    'cos': (numpy.cos, lambda x: -numpy.sin(x)),
+    'tan': (numpy.tan, lambda x: 1. / numpy.cos(x)**2),
+    'sinh': (numpy.sinh, numpy.cosh),
+    'cosh': (numpy.cosh, numpy.sinh),
+    'tanh': (numpy.tanh, lambda x: 1. - numpy.tanh(x)**2),
+    'asin': (numpy.arcsin, lambda x: 1. / numpy.sqrt(1. - x**2)),
+    'acos': (numpy.arccos, lambda x: -1. / numpy.sqrt(1. - x**2)),
+    'atan': (numpy.arctan, lambda x: 1. / (1. + x**2)),
+    'asinh': (numpy.arcsinh, lambda x: 1. / numpy.sqrt(x**2 + 1.)),
+    'acosh': (numpy.arccosh, lambda x: 1. / numpy.sqrt(x**2 - 1.)),
+    'atanh': (numpy.arctanh, lambda x: 1. / (1. - x**2)),
+    'exp': (numpy.exp, numpy.exp),
+    'expm1': (numpy.expm1, numpy.exp),
+    'log': (numpy.log, lambda x: 1. / x),
+    'log10': (numpy.log10, lambda x: 1. / (x * math.log(10.))),
+    'log1p': (numpy.log1p, lambda x: 1. / (1. + x)),
+    'sqrt': (numpy.sqrt, lambda x: 0.5 / numpy.sqrt(x)),
+    'fabs': (numpy.fabs, numpy.sign),
+}
+
+# functions that can be called with ADValues, keyed on the names they have
+# in an expression
+ad_functions = {
+    'pow': _pow,
+    'sum': _sum,
+    'max': _extreme(max, numpy.argmax),
+    'min': _extreme(min, numpy.argmin),
+}
+for _name, (_f, _df) in _derivs.items():
+    ad_functions[_name] = _unary(_f, _df)
+
+
+def _numpy_reduction(name, adfunc):
+    """Return a version of the numpy reduction `name` that handles a single
+    ADValue argument with `adfunc`.
+    """
+    func = getattr(numpy, name)
+    def _func(x, *args, **kwargs):
+        if isinstance(x, ADValue):
+            if args or kwargs:
+                raise AutoDiffError("can't differentiate numpy.%s with"
+                                    " extra arguments" % name)
+            return adfunc(x)
+        return func(x, *args, **kwargs)
+    return _func
+
+# the versions found as attributes of numpy, which spells the inverse trig
+# functions differently
+_numpy_functions = dict([(name, ad_functions[name]) for name in _derivs])
+for _name in ('asin', 'acos', 'atan', 'asinh', 'acosh', 'atanh'):
+    _numpy_functions['arc' + _name[1:]] = ad_functions[_name]
+_numpy_functions['power'] = _pow
+for _name, _adname in (('sum', 'sum'), ('max', 'max'), ('amax', 'max'),
+                       ('min', 'min'), ('amin', 'min')):
+    _numpy_functions[_name] = _numpy_reduction(_name, ad_functions[_adname])
+
+
+class ADNamespace(object):
+    """Stands in for the math or numpy module in an expression, returning
+    versions of their functions that can handle ADValues where there are any.
+    """
+
+    def __init__(self, module):
+        self._module = module
+        if module is numpy:
+            self._functions = _numpy_functions
+        else:
+            self._functions = dict([(name, ad_functions[name])
+                                    for name in _derivs])
+
+    def __getattr__(self, name):
+        try:
+            return self._functions[name]
+        except KeyError:
+            return getattr(self._module, name)
@@ -5,12 +5,13 @@ from array import array
 import traceback
 from StringIO import StringIO
 from inspect import getmro
+from operator import itemgetter
 
 from openmdao.main.expreval import ExprEvaluator
 from openmdao.main.exceptions import TracedError, traceback_str
 from openmdao.main.variable import is_legal_name
 
-__all__ = ["Case"]
+__all__ = ["Case", "CaseSchema", "CompactCase"]
 
 _Missing = object()
 
@@ -42,6 +43,59 @@ flatteners = { # dict of functions that know how to 'flatten' a given object ins
        array: _flatten_lst,
     } 
 
+def _case_str(case):
+    """Return the string representation of a Case or CompactCase."""
+    outs = case.items(iotype='out')
+    outs.sort()
+    ins = case.items(iotype='in')
+    ins.sort()
+    stream = StringIO()
+    stream.write("Case: %s\n" % case.label)
+    stream.write("   uuid: %s\n" % case.uuid)
+    stream.write("   timestamp: %15f\n" % case.timestamp)
+    if case.parent_uuid:
+        stream.write("   parent_uuid: %s\n" % case.parent_uuid)
+
+    if ins:
+        stream.write("   inputs:\n")
+        for name,val in ins:
+            stream.write("      %s: %s\n" % (name,val))
+    if outs:
+        stream.write("   outputs:\n")
+        for name,val in outs:
+            stream.write("      %s: %s\n" % (name,val))
+    if case.max_retries is not None:
+        stream.write("   max_retries: %s\n" % case.max_retries)
+    if case.retries is not None:
+        stream.write("   retries: %s\n" % case.retries)
+    if case.msg:
+        stream.write("   msg: %s\n" % case.msg)
+    if case.exc is not None:
+        stream.write("   exc: %s\n" % traceback_str(case.exc))
+    return stream.getvalue()
+
+def _case_eq(case, other):
+    """Return True if two Cases or CompactCases have the same label, message
+    and values.
+    """
+    if case is other:
+        return True
+    try:
+        if case.msg != other.msg or case.label != other.label:
+            return False
+        if len(case) != len(other):
+            return False
+        # sort by name, the two may store their values in different orders
+        for selftup, othertup in zip(sorted(case.items(flatten=True),
+                                            key=itemgetter(0)),
+                                     sorted(other.items(flatten=True),
+                                            key=itemgetter(0))):
+            if selftup[0] != othertup[0] or selftup[1] != othertup[1]:
+                return False
+    except:
+        return False
+    return True
+
 def flatten_obj(name, obj):
     f = flatteners.get(type(obj))
     if f:
@@ -97,53 +151,10 @@ class Case(object):
             self.add_outputs(outputs)
 
     def __str__(self):
-        if self._outputs:
-            outs = self._outputs.items()
-            outs.sort()
-        else:
-            outs = []
-        ins = self._inputs.items()
-        ins.sort()
-        stream = StringIO()
-        stream.write("Case: %s\n" % self.label)
-        stream.write("   uuid: %s\n" % self.uuid)
-        stream.write("   timestamp: %15f\n" % self.timestamp)
-        if self.parent_uuid:
-            stream.write("   parent_uuid: %s\n" % self.parent_uuid)
-
-        if ins:
-            stream.write("   inputs:\n")
-            for name,val in ins:
-                stream.write("      %s: %s\n" % (name,val))
-        if outs:
-            stream.write("   outputs:\n")
-            for name,val in outs:
-                stream.write("      %s: %s\n" % (name,val))
-        if self.max_retries is not None:
-            stream.write("   max_retries: %s\n" % self.max_retries)
-        if self.retries is not None:
-            stream.write("   retries: %s\n" % self.retries)
-        if self.msg:
-            stream.write("   msg: %s\n" % self.msg)
-        if self.exc is not None:
-            stream.write("   exc: %s\n" % traceback_str(self.exc))
-        return stream.getvalue()
+        return _case_str(self)
     
     def __eq__(self, other): 
-        if self is other:
-            return True
-        try:
-            if self.msg != other.msg or self.label != other.label:
-                return False
-            if len(self) != len(other):
-                return False
-            for selftup, othertup in zip(self.items(flatten=True), 
-                                         other.items(flatten=True)):
-                if selftup[0] != othertup[0] or selftup[1] != othertup[1]:
-                    return False
-        except:
-            return False
-        return True
+        return _case_eq(self, other)
 
     def __getitem__(self, name):
         val = self._inputs.get(name, _Missing)
@@ -260,16 +271,25 @@ class Case(object):
         to the specified scope.
         """
         scope._case_id = self.uuid
-        if self._exprs:
-            for name,value in self._inputs.items():
-                expr = self._exprs.get(name)
-                if expr:
-                    expr.set(value, scope)
-                else:
+
+        # Invalidate everything downstream of the inputs in one pass
+        # once they have all been set.
+        batch = hasattr(scope, 'hold_invalidation') and \
+                scope.hold_invalidation()
+        try:
+            if self._exprs:
+                for name,value in self._inputs.items():
+                    expr = self._exprs.get(name)
+                    if expr:
+                        expr.set(value, scope)
+                    else:
+                        scope.set(name, value)
+            else:
+                for name,value in self._inputs.items():
                     scope.set(name, value)
-        else:
-            for name,value in self._inputs.items():
-                scope.set(name, value)
+        finally:
+            if batch:
+                scope.release_invalidation()
 
     def update_outputs(self, scope, msg=None):
         """Update the value of all outputs in this Case, using the given scope.
@@ -385,3 +405,392 @@ class Case(object):
                 self._exprs = {}
             self._exprs[s] = expr
 
+
+
+class CaseSchema(object):
+    """The names of the inputs and outputs of a set of :class:`CompactCase`
+    objects, which is kept once here rather than in every case.
+    """
+
+    def __init__(self, inputs=(), outputs=()):
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.names = self.inputs + self.outputs
+        self.index = dict([(name, i) for i, name in enumerate(self.names)])
+        if len(self.index) != len(self.names):
+            raise ValueError("duplicate names in case schema")
+        self.exprs = frozenset([name for name in self.names
+                                if not is_legal_name(name)])
+        self._extensions = {}
+        self._subschemas = {}
+        self._indices = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def extend(self, inputs=(), outputs=()):
+        """Return a schema with the given inputs and outputs added to ours.
+        Extensions are cached, so cases that are all extended the same way
+        still share a single schema.
+        """
+        key = (tuple(inputs), tuple(outputs))
+        try:
+            return self._extensions[key]
+        except KeyError:
+            schema = CaseSchema(self.inputs + key[0], self.outputs + key[1])
+            self._extensions[key] = schema
+            return schema
+
+    def subschema(self, inputs, outputs):
+        """Return a schema containing only the given inputs and outputs.
+        Like extensions, these are cached.
+        """
+        key = (tuple(inputs), tuple(outputs))
+        try:
+            return self._subschemas[key]
+        except KeyError:
+            schema = CaseSchema(*key)
+            self._subschemas[key] = schema
+            return schema
+
+    def indices(self, names):
+        """Return a list of the positions of the given names in our values."""
+        key = tuple(names)
+        try:
+            return self._indices[key]
+        except KeyError:
+            try:
+                idxs = [self.index[name] for name in key]
+            except KeyError as err:
+                raise KeyError("input or output is missing from case: %s"
+                               % str(err))
+            self._indices[key] = idxs
+            return idxs
+
+
+class CompactCase(object):
+    """A Case whose input and output names are held in a :class:`CaseSchema`
+    shared with other cases, so each case stores only its values. When all of
+    the values are floats they're packed into a flat buffer of doubles. The
+    uuid is only generated when it's first needed.
+
+    A CompactCase supports the same interface as :class:`Case`, and can be
+    used wherever a Case is produced or consumed.
+    """
+
+    __slots__ = ('_schema', '_values', '_uuid', 'parent_uuid', 'max_retries',
+                 'retries', 'msg', 'exc', 'label', 'timestamp')
+
+    def __init__(self, schema, values=None, max_retries=None, retries=None,
+                 label='', case_uuid=None, parent_uuid='', msg=None):
+        """`values` must contain a value for each name in `schema`, inputs
+        first. If it's None, inputs and outputs have no value.
+        """
+        self._schema = schema
+        if values is None:
+            self._values = [_Missing] * len(schema)
+        else:
+            if len(values) != len(schema):
+                raise ValueError("number of values (%d) != number of names in"
+                                 " case schema (%d)"
+                                 % (len(values), len(schema)))
+            self._values = values
+            self._pack()
+        self.max_retries = max_retries
+        self.retries = retries
+        self.msg = msg
+        self.exc = None
+        self.label = label
+        self._uuid = str(case_uuid) if case_uuid else None
+        self.parent_uuid = str(parent_uuid)
+        self.timestamp = time.time()
+
+    def __getstate__(self):
+        state = dict([(name, getattr(self, name))
+                      for name in self.__slots__ if name != '_uuid'])
+        state['_uuid'] = self.uuid
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @property
+    def schema(self):
+        """The :class:`CaseSchema` holding the names of our values."""
+        return self._schema
+
+    @property
+    def uuid(self):
+        """Unique identifier of this case."""
+        if self._uuid is None:
+            self._uuid = str(uuid1())
+        return self._uuid
+
+    @uuid.setter
+    def uuid(self, value):
+        self._uuid = value
+
+    def _pack(self):
+        """Store our values as a buffer of doubles if they're all floats."""
+        values = self._values
+        if not isinstance(values, array):
+            for val in values:
+                if not isinstance(val, float):
+                    if not isinstance(values, list):
+                        self._values = list(values)
+                    return
+            self._values = array('d', values)
+
+    def _set(self, idx, value):
+        if isinstance(self._values, array) and not isinstance(value, float):
+            self._values = list(self._values)
+        self._values[idx] = value
+
+    def _extend(self, inputs=(), outputs=()):
+        """Switch to a schema with more names, for which we have no values."""
+        old = self._schema
+        self._schema = old.extend(inputs, outputs)
+        values = list(self._values)
+        nins = len(old.inputs)
+        self._values = values[:nins] + [_Missing]*len(inputs) + \
+                       values[nins:] + [_Missing]*len(outputs)
+
+    def __str__(self):
+        return _case_str(self)
+
+    def __eq__(self, other):
+        return _case_eq(self, other)
+
+    def __getitem__(self, name):
+        try:
+            return self._values[self._schema.index[name]]
+        except KeyError:
+            raise KeyError("'%s' not found" % name)
+
+    def __setitem__(self, name, value):
+        try:
+            idx = self._schema.index[name]
+        except KeyError:
+            raise KeyError("'%s' not found" % name)
+        self._set(idx, value)
+
+    def __contains__(self, name):
+        return name in self._schema.index
+
+    def __len__(self):
+        return len(self._values)
+
+    def get_input(self, name):
+        if name in self._schema.inputs:
+            return self[name]
+        raise KeyError("'%s' not found" % name)
+
+    def get_output(self, name):
+        if name in self._schema.outputs:
+            return self[name]
+        raise KeyError("'%s' not found" % name)
+
+    def get_inputs(self, flatten=False):
+        return self._get_items(0, len(self._schema.inputs), flatten)
+
+    def get_outputs(self, flatten=False):
+        return self._get_items(len(self._schema.inputs), len(self._values),
+                               flatten)
+
+    def _get_items(self, start, end, flatten):
+        items = zip(self._schema.names[start:end], self._values[start:end])
+        if flatten:
+            ret = []
+            for k, v in items:
+                ret.extend(flatten_obj(k, v))
+            return ret
+        return items
+
+    def items(self, iotype=None, flatten=False):
+        """Return a list of (name,value) tuples for variables/expressions in this Case.
+        
+        iotype: str or None
+            If 'in', only inputs are returned.
+            If 'out', only outputs are returned.
+            If None (the default), inputs and outputs are returned.
+            
+        flatten: bool
+            If True, split multi-part Variables (like VariableTrees and Arrays) into
+            their constituents.
+        """
+        if iotype is None:
+            return self._get_items(0, len(self._values), flatten)
+        elif iotype == 'in':
+            return self.get_inputs(flatten)
+        elif iotype == 'out':
+            return self.get_outputs(flatten)
+        else:
+            raise NameError("invalid iotype arg (%s). Must be 'in','out',or None" % str(iotype))
+
+    def keys(self, iotype=None, flatten=False):
+        """Return a list of name/expression strings for this Case.
+        
+        iotype: str or None
+            If 'in', only inputs are returned.
+            If 'out', only outputs are returned.
+            If None (the default), inputs and outputs are returned.
+        """
+        if flatten:
+            return [k for k,v in self.items(iotype, flatten=flatten)]
+        schema = self._schema
+        if iotype is None:
+            return list(schema.names)
+        elif iotype == 'in':
+            return list(schema.inputs)
+        elif iotype == 'out':
+            return list(schema.outputs)
+        else:
+            raise NameError("invalid iotype arg (%s). Must be 'in','out',or None" % str(iotype))
+
+    def values(self, iotype=None, flatten=False):
+        """Return a list of values for this Case.
+        
+        iotype: str or None
+            If 'in', only inputs are returned.
+            If 'out', only outputs are returned
+            If None (the default), inputs and outputs are returned
+        """
+        return [v for k,v in self.items(iotype, flatten=flatten)]
+
+    def get_values(self, names):
+        """Return a list of the values of the given names."""
+        values = self._values
+        return [values[i] for i in self._schema.indices(names)]
+
+    def reset(self):
+        """Remove any saved output values, set retries to None, get a new uuid
+        and reset the parent_uuid.  Essentially this Case becomes like a new 
+        Case with the same set of inputs and outputs that hasn't been executed
+        yet.
+        """
+        self.parent_uuid = ''
+        self._uuid = None
+        self.retries = None
+        nins = len(self._schema.inputs)
+        self._values = list(self._values[:nins]) + \
+                       [_Missing] * len(self._schema.outputs)
+
+    def apply_inputs(self, scope):
+        """Take the values of all of the inputs in this case and apply them
+        to the specified scope.
+        """
+        scope._case_id = self.uuid
+        exprs = self._schema.exprs
+
+        # Invalidate everything downstream of the inputs in one pass
+        # once they have all been set.
+        batch = hasattr(scope, 'hold_invalidation') and \
+                scope.hold_invalidation()
+        try:
+            for name, value in zip(self._schema.inputs, self._values):
+                if name in exprs:
+                    ExprEvaluator(name).set(value, scope)
+                else:
+                    scope.set(name, value)
+        finally:
+            if batch:
+                scope.release_invalidation()
+
+    def update_outputs(self, scope, msg=None):
+        """Update the value of all outputs in this Case, using the given scope.
+        """
+        self.msg = msg
+        last_excpt = None
+        schema = self._schema
+        nins = len(schema.inputs)
+        if schema.outputs:
+            values = list(self._values)
+            for i, name in enumerate(schema.outputs):
+                try:
+                    if name in schema.exprs:
+                        values[nins+i] = ExprEvaluator(name).evaluate(scope)
+                    else:
+                        values[nins+i] = scope.get(name)
+                except Exception as err:
+                    last_excpt = TracedError(err, traceback.format_exc())
+                    values[nins+i] = _Missing
+                    if self.msg is None:
+                        self.msg = str(err)
+                    else:
+                        self.msg = self.msg + " %s" % err
+            self._values = values
+            self._pack()
+
+        self.timestamp = time.time()
+
+        if last_excpt is not None:
+            raise last_excpt
+
+    def add_input(self, name, value):
+        """Sets the value of an input, adding it to our schema if necessary.
+        
+        name: str
+            Name of the input.
+            
+        value: 
+            Value that the input will be assigned to.
+        """
+        idx = self._schema.index.get(name)
+        if idx is None:
+            self._extend(inputs=(name,))
+            idx = len(self._schema.inputs) - 1
+        elif idx >= len(self._schema.inputs):
+            raise ValueError("'%s' is an output of this case" % name)
+        self._set(idx, value)
+
+    def add_inputs(self, inp_iter):
+        """Adds multiple inputs to this case.
+        
+        inp_iter: Iterator returning (name,value)
+            Iterator of input names and values.
+        """
+        for name, value in inp_iter:
+            self.add_input(name, value)
+
+    def add_output(self, name, value=_Missing):
+        """Sets the value of an output, adding it to our schema if necessary.
+        
+        name: str
+            Name of the output.
+        """
+        idx = self._schema.index.get(name)
+        if idx is None:
+            self._extend(outputs=(name,))
+            idx = len(self._values) - 1
+        elif idx < len(self._schema.inputs):
+            raise ValueError("'%s' is an input of this case" % name)
+        self._set(idx, value)
+
+    def add_outputs(self, outputs):
+        """Adds outputs to this case.
+        
+        outputs: iterator returning names or tuples of the form (name,value)
+            outputs to be added
+        """
+        for entry in outputs:
+            if isinstance(entry, basestring):
+                self.add_output(entry)
+            else: # assume it's a tuple of the form (name, value)
+                self.add_output(entry[0], entry[1])
+
+    def subcase(self, names):
+        """Return a new CompactCase having a specified subset of this Case's
+        inputs and outputs.
+        """
+        for name in names:
+            if name not in self._schema.index:
+                raise KeyError("'%s' is not part of this Case" % name)
+        inputs = [name for name in self._schema.inputs if name in names]
+        outputs = [name for name in self._schema.outputs if name in names]
+        schema = self._schema.subschema(inputs, outputs)
+        sc = CompactCase(schema, self.get_values(schema.names),
+                         parent_uuid=self.parent_uuid,
+                         max_retries=self.max_retries)
+        sc.timestamp = self.timestamp
+        return sc
@@ -651,8 +651,14 @@ class Component(Container):
 
     def _run_terminated(self):
         """ Executed at end of top-level run. """
+        def _close(recorder):
+            """ Write out any buffered cases, then close. """
+            if hasattr(recorder, 'flush'):
+                recorder.flush()
+            recorder.close()
+
         def _recursive_close(container, visited):
-            """ Close all case recorders. """
+            """ Flush and close all case recorders, release kept servers. """
             # Using ._alltraits() since .items() won't pickle.
             # and we may be traversing a distributed tree.
             for name in container._alltraits():
@@ -662,9 +668,11 @@ class Component(Container):
                 visited.add(id(obj))
                 if obj_has_interface(obj, IDriver):
                     for recorder in obj.recorders:
-                        recorder.close()
+                        _close(recorder)
+                    if hasattr(obj, 'release_servers'):
+                        obj.release_servers()
                 elif obj_has_interface(obj, ICaseRecorder):
-                    obj.close()
+                    _close(obj)
                 if isinstance(obj, Container):
                     _recursive_close(obj, visited)
         visited = set((id(self),))
@@ -4,10 +4,10 @@ from ordereddict import OrderedDict
 
 import networkx as nx
 
-from openmdao.main.mp_support import has_interface
+from openmdao.main.mp_support import has_interface, OpenMDAO_Proxy
 from openmdao.main.interfaces import IDriver, IVariableTree, \
                                      IImplicitComponent, ISolver, \
-                                     IAssembly, IComponent
+                                     IAssembly, IComponent, IContainer
 from openmdao.main.expreval import ConnectedExprEvaluator
 from openmdao.main.array_helpers import is_differentiable_var, is_differentiable_val
 from openmdao.main.pseudoassembly import PseudoAssembly, from_PA_var, to_PA_var
@@ -32,6 +32,43 @@ def _is_expr(node):
     """
     return len(_exprchars.intersection(node)) > 0
 
+def _is_plain(node):
+    """Returns True if node is a boundary variable or a variable of a
+    child of the scope, with no indexing or vartree attributes.
+    """
+    return not (_is_expr(node) or '[' in node or node.count('.') > 1 or
+                node.startswith('parent.'))
+
+def _compile_transfer(scope, sexpr, dexpr):
+    """Returns a tuple of the form (srcobj, srcname, dstobj, dstname, src)
+    that lets a connection be evaluated with a getattr and a set() on the
+    destination component instead of going through the ExprEvaluators.
+    The objects are None for a side that must use its ExprEvaluator,
+    including any side that lives in a remote (proxied) object.
+    """
+    srcobj = srcname = dstobj = dstname = None
+    src = sexpr.text
+
+    if _is_plain(sexpr.text):
+        cname, _, vname = sexpr.text.rpartition('.')
+        obj = getattr(scope, cname, None) if cname else scope
+        if obj is not None and not isinstance(obj, OpenMDAO_Proxy) and \
+           hasattr(obj, vname):
+            srcobj, srcname = obj, vname
+
+    if _is_plain(dexpr.text):
+        cname, _, vname = dexpr.text.rpartition('.')
+        if cname:
+            # mimic Container.set() for a child
+            obj = getattr(scope, cname, None)
+            if has_interface(obj, IContainer) and \
+               not isinstance(obj, OpenMDAO_Proxy):
+                dstobj, dstname, src = obj, vname, 'parent.'+sexpr.text
+        else:
+            dstobj, dstname = scope, vname
+
+    return (srcobj, srcname, dstobj, dstname, src)
+
 def _sub_or_super(s1, s2):
     """Returns True if s1 is a subvar or supervar of s2."""
     if s2.startswith(s1 + '.'):
@@ -209,6 +246,7 @@ class DependencyGraph(nx.DiGraph):
         super(DependencyGraph, self).__init__()
         self._severed_edges = []
         self._allow_config_changed = True
+        self._config_count = 0
         self.config_changed()
 
     def base_var(self, node):
@@ -254,6 +292,7 @@ class DependencyGraph(nx.DiGraph):
         self._saved_loops = self._loops
 
         self._severed_edges = list(edges)
+        self._closures = {}
 
         self._allow_config_changed = False
         try:
@@ -275,12 +314,16 @@ class DependencyGraph(nx.DiGraph):
             self._allow_config_changed = True
 
         self._severed_edges = []
+        self._closures = {}
 
         self._loops = self._saved_loops
         self._component_graph = self._saved_comp_graph
 
     def config_changed(self):
         if self._allow_config_changed:
+            # Lets derived structures (e.g., cached derivative graphs) tell
+            # whether they are stale.
+            self._config_count += 1
             self._component_graph = None
             self._loops = None
             self._saved_loops = None
@@ -294,6 +337,7 @@ class DependencyGraph(nx.DiGraph):
             self._conns = {}
             self._indegs = {}
             self._dstvars = {}
+            self._closures = {}
 
     def child_config_changed(self, child, adding=True, removing=True):
         """A child has changed its input lists and/or output lists,
@@ -801,49 +845,104 @@ class DependencyGraph(nx.DiGraph):
         outset = set()  # set of changed boundary outputs
 
         ndata = self.node
-        stack = [(n, self.successors_iter(n), not is_comp_node(self, n))
-                        for n in vnames]
+        stack = [(n, None, not is_comp_node(self, n)) for n in vnames]
 
         visited = set()
         while(stack):
-            src, neighbors, checkvisited = stack.pop()
+            src, outs, checkvisited = stack.pop()
             if checkvisited and src in visited:
                 continue
-            else:
+
+            if outs is not None or is_comp_node(self, src):
+                # a component that has been invalidated
                 visited.add(src)
-            sdata = ndata[src]
-            oldvalid = sdata['valid']
-            if oldvalid is True:
-                if src.startswith('parent.'):
-                    ndata[src]['valid'] = False
-                else:
-                    indeg = self._indegs.get(src)
-                    if indeg is None:
-                        indeg = self.in_degree(src)
-                        self._indegs[src] = indeg
-                    if indeg:  # don't invalidate unconnected inputs
-                        ndata[src]['valid'] = False
-                if 'boundary' in sdata and sdata.get('iotype') == 'out':
-                    outset.add(src)
-
-            parsources = None
-            for node in neighbors:
+                sdata = ndata[src]
+                if sdata['valid'] is True and self._get_indeg(src):
+                    sdata['valid'] = False
+                if outs is None:
+                    outs = self.successors(src)
+                stack.extend([(n, None, True) for n in outs])
+                continue
+
+            # everything downstream of a var node up to the next
+            # components is known in advance
+            nodes, actions, frontier = self._get_closure(src)
+            visited.update(nodes)
+            for node, invalidate, boundary_out in actions:
+                sdata = ndata[node]
+                if sdata['valid'] is True:
+                    if invalidate:
+                        sdata['valid'] = False
+                    if boundary_out:
+                        outset.add(node)
+
+            for node, parsources in frontier:
                 ddata = ndata[node]
-                if 'comp' in ddata:
-                    if ddata['valid'] or ddata.get('invalidation')=='partial':
-                        if parsources is None:
-                            parsources = self.get_sources(src)
-                        outs = getattr(scope, node).invalidate_deps(['.'.join(('parent', n))
-                                                                      for n in parsources])
-                        if outs is None:
-                            stack.append((node, self.successors_iter(node), True))
-                        elif outs: # partial invalidation
-                            stack.append((node, ['.'.join((node,n)) for n in outs], False))
-                else:
-                    stack.append((node, self.successors_iter(node), True))
+                if ddata['valid'] or ddata.get('invalidation')=='partial':
+                    couts = getattr(scope, node).invalidate_deps(list(parsources))
+                    if couts is None:
+                        # mark it now so the rest of the frontier skips it
+                        if self._get_indeg(node):
+                            ddata['valid'] = False
+                        stack.append((node, None, True))
+                    elif couts: # partial invalidation
+                        stack.append((node, ['.'.join((node,n)) for n in couts],
+                                      False))
 
         return outset
 
+    def _get_indeg(self, node):
+        """Return the (cached) in degree of the given node."""
+        indeg = self._indegs.get(node)
+        if indeg is None:
+            indeg = self.in_degree(node)
+            self._indegs[node] = indeg
+        return indeg
+
+    def _get_closure(self, vname):
+        """Return a tuple of the form (nodes, actions, frontier) describing
+        everything invalidate_deps does when it reaches the given var node.
+        nodes is the set of var nodes reachable from vname without passing
+        through a component. actions is a list of (node, invalidate,
+        boundary_out) for those nodes that are connected inputs or boundary
+        outputs. frontier is a list of (compname, parsources) for the
+        components fed by those nodes, where parsources are the sources to
+        pass to the component's invalidate_deps.
+        """
+        closure = self._closures.get(vname)
+        if closure is None:
+            nodes = set([vname])
+            actions = []
+            frontier = []
+            ndata = self.node
+            stack = [vname]
+            while stack:
+                src = stack.pop()
+                sdata = ndata[src]
+
+                # don't invalidate unconnected inputs
+                invalidate = src.startswith('parent.') or \
+                             bool(self._get_indeg(src))
+                boundary_out = 'boundary' in sdata and \
+                               sdata.get('iotype') == 'out'
+                if invalidate or boundary_out:
+                    actions.append((src, invalidate, boundary_out))
+
+                parsources = None
+                for node in self.successors_iter(src):
+                    if 'comp' in ndata[node]:
+                        if parsources is None:
+                            parsources = ['.'.join(('parent', n))
+                                              for n in self.get_sources(src)]
+                        frontier.append((node, parsources))
+                    elif node not in nodes:
+                        nodes.add(node)
+                        stack.append(node)
+
+            closure = (nodes, actions, frontier)
+            self._closures[vname] = closure
+        return closure
+
     def get_boundary_inputs(self, connected=False):
         """Returns inputs that are on the component boundary.
         If connected is True, return a list of only those nodes
@@ -1113,13 +1212,25 @@ class DependencyGraph(nx.DiGraph):
                             dexprs.append(ddata['dexpr'])
                             sexprs.append(ddata['sexpr'])
                             valid_set.add(vv)
-            self._dstvars[vname] = (sexprs, dexprs, valid_set)
+
+            # Most connections are between plain variables, so resolve
+            # those down to the objects involved once per configuration.
+            plan = [(sexpr, dexpr) + _compile_transfer(scope, sexpr, dexpr)
+                    for sexpr, dexpr in zip(sexprs, dexprs)]
+            self._dstvars[vname] = (plan, valid_set)
         else:
-            sexprs, dexprs, valid_set = tup
+            plan, valid_set = tup
 
         try:
-            for sexpr, dexpr in zip(sexprs, dexprs):
-                dexpr.set(sexpr.evaluate(scope=scope), src=sexpr.text, scope=scope)
+            for sexpr, dexpr, srcobj, srcname, dstobj, dstname, src in plan:
+                if srcobj is None:
+                    val = sexpr.evaluate(scope=scope)
+                else:
+                    val = getattr(srcobj, srcname)
+                if dstobj is None:
+                    dexpr.set(val, src=sexpr.text, scope=scope)
+                else:
+                    dstobj.set(dstname, val, src=src)
         except Exception as err:
             raise err.__class__("cannot set '%s' from '%s': %s" %
                                  (dexpr.text, sexpr.text, str(err)))
@@ -1,7 +1,11 @@
 """ Some functions and objects that provide the backbone to OpenMDAO's
 differentiation capability.
 """
+import os
+import shutil
+from contextlib import contextmanager
 from sys import float_info
+from tempfile import mkdtemp
 
 from openmdao.main.array_helpers import flatten_slice, flattened_size, \
                                         flattened_value
@@ -12,9 +16,12 @@ from openmdao.util.graph import list_deriv_vars
 from openmdao.util.log import logger
 
 try:
-    from numpy import ndarray, zeros, ones, unravel_index, vstack, hstack
+    from numpy import ndarray, zeros, ones, unravel_index, vstack, hstack, \
+                      arange, atleast_1d, asarray
+    from numpy.random import RandomState
     # Can't solve derivatives without these
-    from scipy.sparse.linalg import gmres, LinearOperator
+    from scipy.sparse import csc_matrix, issparse
+    from scipy.sparse.linalg import gmres, lgmres, splu, spilu, LinearOperator
 
 except ImportError as err:
     logger.warn("In %s: %r", __file__, err)
@@ -28,11 +35,6 @@ def calc_gradient(wflow, inputs, outputs, n_edge, shape):
     all passed inputs.
     """
 
-    # Size the problem
-    A = LinearOperator((n_edge, n_edge),
-                       matvec=wflow.matvecFWD,
-                       dtype=float)
-
     J = zeros(shape)
 
     # Each comp calculates its own derivatives at the current
@@ -42,7 +44,17 @@ def calc_gradient(wflow, inputs, outputs, n_edge, shape):
     dgraph = wflow._derivative_graph
     options = wflow._parent.gradient_options
 
-    # Forward mode, solve linear system for each parameter
+    # Size the problem
+    if options.sparse_jacobian:
+        A = wflow.assemble_jacobian()
+    else:
+        A = LinearOperator((n_edge, n_edge),
+                           matvec=wflow.matvecFWD,
+                           dtype=float)
+
+    # Forward mode, gather one right-hand side for each parameter index so
+    # that the linear solver can share work among them.
+    rhs = []
     j = 0
     for param in inputs:
 
@@ -81,38 +93,36 @@ def calc_gradient(wflow, inputs, outputs, n_edge, shape):
             in_range = range(i1, i2)
 
         for irhs in in_range:
+            rhs.append((irhs, j, param))
+            j += 1
 
-            RHS = zeros((n_edge, 1))
-            RHS[irhs, 0] = 1.0
-
-            # Call GMRES to solve the linear system
-            dx, info = gmres(A, RHS,
-                             tol=options.gmres_tolerance,
-                             maxiter=options.gmres_maxiter)
-            if info > 0:
-                msg = "ERROR in calc_gradient in '%s': gmres failed to converge " \
-                      "after %d iterations for parameter '%s' at index %d"
-                logger.error(msg % (wflow._parent.get_pathname(), info, param, irhs))
-            elif info < 0:
-                msg = "ERROR in calc_gradient in '%s': gmres failed " \
-                      "for parameter '%s' at index %d"
-                logger.error(msg % (wflow._parent.get_pathname(), param, irhs))
-
-            i = 0
-            for item in outputs:
-                try:
-                    k1, k2 = wflow.get_bounds(item)
-                except KeyError:
-                    continue
-
-                if isinstance(k1, list):
-                    J[i:i+(len(k1)), j] = dx[k1]
-                    i += len(k1)
-                else:
-                    J[i:i+(k2-k1), j] = dx[k1:k2]
-                    i += k2-k1
+    solutions = solve_linear(A, n_edge, [item[0] for item in rhs], options)
+    for (irhs, j, param), (dx, info) in zip(rhs, solutions):
+
+        if info > 0:
+            msg = "ERROR in calc_gradient in '%s': %s failed to converge " \
+                  "after %d iterations for parameter '%s' at index %d"
+            logger.error(msg % (wflow._parent.get_pathname(),
+                                options.lin_solver, info, param, irhs))
+        elif info < 0:
+            msg = "ERROR in calc_gradient in '%s': %s failed " \
+                  "for parameter '%s' at index %d"
+            logger.error(msg % (wflow._parent.get_pathname(),
+                                options.lin_solver, param, irhs))
+
+        i = 0
+        for item in outputs:
+            try:
+                k1, k2 = wflow.get_bounds(item)
+            except KeyError:
+                continue
 
-            j += 1
+            if isinstance(k1, list):
+                J[i:i+(len(k1)), j] = dx[k1]
+                i += len(k1)
+            else:
+                J[i:i+(k2-k1), j] = dx[k1:k2]
+                i += k2-k1
 
     #print inputs, '\n', outputs, '\n', J
     return J
@@ -122,10 +132,6 @@ def calc_gradient_adjoint(wflow, inputs, outputs, n_edge, shape):
     all passed inputs. Calculation is done in adjoint mode.
     """
 
-    # Size the problem
-    A = LinearOperator((n_edge, n_edge),
-                       matvec=wflow.matvecREV,
-                       dtype=float)
     J = zeros(shape)
 
     # Each comp calculates its own derivatives at the current
@@ -135,7 +141,17 @@ def calc_gradient_adjoint(wflow, inputs, outputs, n_edge, shape):
     dgraph = wflow._derivative_graph
     options = wflow._parent.gradient_options
 
-    # Adjoint mode, solve linear system for each output
+    # Size the problem
+    if options.sparse_jacobian:
+        A = wflow.assemble_jacobian().T.tocsr()
+    else:
+        A = LinearOperator((n_edge, n_edge),
+                           matvec=wflow.matvecREV,
+                           dtype=float)
+
+    # Adjoint mode, gather one right-hand side for each output index so
+    # that the linear solver can share work among them.
+    rhs = []
     j = 0
     for output in outputs:
 
@@ -153,68 +169,158 @@ def calc_gradient_adjoint(wflow, inputs, outputs, n_edge, shape):
             out_range = range(i1, i2)
 
         for irhs in out_range:
+            rhs.append((irhs, j, output))
+            j += 1
 
-            RHS = zeros((n_edge, 1))
-            RHS[irhs, 0] = 1.0
+    solutions = solve_linear(A, n_edge, [item[0] for item in rhs], options)
+    for (irhs, j, output), (dx, info) in zip(rhs, solutions):
 
-            # Call GMRES to solve the linear system
-            dx, info = gmres(A, RHS,
-                             tol=options.gmres_tolerance,
-                             maxiter=options.gmres_maxiter)
-
-            if info > 0:
-                msg = "ERROR in calc_gradient_adjoint in '%s': gmres failed to converge " \
-                      "after %d iterations for output '%s' at index %d"
-                logger.error(msg % (wflow._parent.get_pathname(), info, output, irhs))
-            elif info < 0:
-                msg = "ERROR in calc_gradient_adjoint in '%s': gmres failed " \
-                      "for output '%s' at index %d"
-                logger.error(msg % (wflow._parent.get_pathname(), output, irhs))
-
-            i = 0
-
-            for param in inputs:
-
-                # You can ask for derivatives of broadcast inputs in cases
-                # where some of the inputs aren't in the relevance graph.
-                # Find the one that is.
-                if isinstance(param, tuple):
-                    for bcast_param in param:
-                        if bcast_param in dgraph and 'bounds' in dgraph.node[bcast_param]:
-                            param = bcast_param
-                            break
-                    else:
-                        param = param[0]
-                        #raise RuntimeError("didn't find any of '%s' in derivative graph for '%s'" %
-                                           #(param, wflow._parent.get_pathname()))
-
-                try:
-                    k1, k2 = wflow.get_bounds(param)
-                except KeyError:
-                    
-                    # If you end up here, it is usually because you have a
-                    # tuple of broadcast inputs containing only non-relevant
-                    # variables. Derivative is zero, so take one and increment
-                    # by its width.
-                    
-                    # TODO - We need to cache these when we remove
-                    # boundcaching from the graph
-                    val = wflow.scope.get(param)
-                    i += flattened_size(param, val, wflow.scope)   
-                    continue
+        if info > 0:
+            msg = "ERROR in calc_gradient_adjoint in '%s': %s failed to converge " \
+                  "after %d iterations for output '%s' at index %d"
+            logger.error(msg % (wflow._parent.get_pathname(),
+                                options.lin_solver, info, output, irhs))
+        elif info < 0:
+            msg = "ERROR in calc_gradient_adjoint in '%s': %s failed " \
+                  "for output '%s' at index %d"
+            logger.error(msg % (wflow._parent.get_pathname(),
+                                options.lin_solver, output, irhs))
 
-                if isinstance(k1, list):
-                    J[j, i:i+(len(k1))] = dx[k1:k2]
-                    i += len(k1)
+        i = 0
+
+        for param in inputs:
+
+            # You can ask for derivatives of broadcast inputs in cases
+            # where some of the inputs aren't in the relevance graph.
+            # Find the one that is.
+            if isinstance(param, tuple):
+                for bcast_param in param:
+                    if bcast_param in dgraph and 'bounds' in dgraph.node[bcast_param]:
+                        param = bcast_param
+                        break
                 else:
-                    J[j, i:i+(k2-k1)] = dx[k1:k2]
-                    i += k2-k1
+                    param = param[0]
+                    #raise RuntimeError("didn't find any of '%s' in derivative graph for '%s'" %
+                                       #(param, wflow._parent.get_pathname()))
+
+            try:
+                k1, k2 = wflow.get_bounds(param)
+            except KeyError:
+                
+                # If you end up here, it is usually because you have a
+                # tuple of broadcast inputs containing only non-relevant
+                # variables. Derivative is zero, so take one and increment
+                # by its width.
+                
+                # TODO - We need to cache these when we remove
+                # boundcaching from the graph
+                val = wflow.scope.get(param)
+                i += flattened_size(param, val, wflow.scope)   
+                continue
 
-            j += 1
+            if isinstance(k1, list):
+                J[j, i:i+(len(k1))] = dx[k1:k2]
+                i += len(k1)
+            else:
+                J[j, i:i+(k2-k1)] = dx[k1:k2]
+                i += k2-k1
 
     #print inputs, '\n', outputs, '\n', J, dx
     return J
 
+def solve_linear(A, n_edge, rhs_indices, options):
+    """Generator that solves the linear system `A` once for each unit
+    right-hand side in `rhs_indices`, yielding a tuple of (solution, info)
+    for each. The value of info follows the scipy convention: 0 for
+    success, > 0 for the iteration count when convergence failed, and < 0
+    for an illegal input or breakdown.
+
+    The algorithm is chosen by ``options.lin_solver``:
+
+    scipy_gmres: one independent GMRES solve per right-hand side.
+
+    recycled_gmres: LGMRES, keeping the augmentation vectors from each
+    solve and handing them to the next one so that later right-hand sides
+    start from the Krylov subspace built up by earlier ones.
+
+    direct: apply the operator to each unit vector once to assemble a
+    sparse matrix, LU-factor it, and back-solve all right-hand sides.
+
+    If `A` is already an assembled sparse matrix, the direct solver factors
+    it as-is and the GMRES solvers are preconditioned with its incomplete LU
+    factorization.
+    """
+
+    if not rhs_indices:
+        return
+
+    solver = options.lin_solver
+
+    M = None
+    if issparse(A):
+        if solver == 'direct':
+            lu = splu(A.tocsc())
+        else:
+            ilu = spilu(A.tocsc())
+            M = LinearOperator((n_edge, n_edge), matvec=ilu.solve,
+                               dtype=float)
+    elif solver == 'direct':
+        lu = splu(assemble_operator(A, n_edge))
+
+    if solver == 'direct':
+        RHS = zeros((n_edge, len(rhs_indices)))
+        for col, irhs in enumerate(rhs_indices):
+            RHS[irhs, col] = 1.0
+        dx = lu.solve(RHS)
+        for col in range(len(rhs_indices)):
+            yield dx[:, col], 0
+        return
+
+    # Krylov vectors shared between solves when recycling.
+    outer_v = []
+
+    RHS = zeros((n_edge, 1))
+    for irhs in rhs_indices:
+
+        RHS[:, 0] = 0.0
+        RHS[irhs, 0] = 1.0
+
+        if solver == 'recycled_gmres':
+            dx, info = lgmres(A, RHS,
+                              tol=options.gmres_tolerance,
+                              maxiter=options.gmres_maxiter,
+                              M=M,
+                              outer_v=outer_v,
+                              store_outer_Av=True)
+        else:
+            # Call GMRES to solve the linear system
+            dx, info = gmres(A, RHS,
+                             tol=options.gmres_tolerance,
+                             maxiter=options.gmres_maxiter,
+                             M=M)
+        yield dx, info
+
+def assemble_operator(A, n_edge):
+    """Returns the linear operator `A` as a sparse CSC matrix by applying
+    it to each unit vector in turn.
+    """
+    data = []
+    rows = []
+    cols = []
+
+    arg = zeros(n_edge)
+    for icol in range(n_edge):
+        arg[icol] = 1.0
+        col = A.matvec(arg).flatten()
+        arg[icol] = 0.0
+
+        nonzero = col.nonzero()[0]
+        data.extend(col[nonzero])
+        rows.extend(nonzero)
+        cols.extend([icol]*len(nonzero))
+
+    return csc_matrix((data, (rows, cols)), shape=(n_edge, n_edge))
+
 def pre_process_dicts(obj, key, arg_or_result, shape_cache):
     '''If the component supplies apply_deriv or applyMinv or their adjoint
     counterparts, it expects the contents to be shaped like the original
@@ -565,7 +671,7 @@ def reduce_jacobian(J, i1, i2, idx, ish, o1, o2, odx, osh):
     """ Return the subportion of the Jacobian that is valid for a particular
     input and output slice.
 
-    J: 2D ndarray
+    J: 2D ndarray or scipy.sparse matrix
         Full Jacobian
 
     i1, i2: int, int
@@ -596,6 +702,11 @@ def reduce_jacobian(J, i1, i2, idx, ish, o1, o2, odx, osh):
         else: # The entire array, already flat
             ostring = 'o1:o2'
 
+        if issparse(J):
+            rows = arange(o1, o2) if not odx else atleast_1d(ox).flatten()
+            cols = arange(i1, i2) if not idx else atleast_1d(ix).flatten()
+            return J.tocsr()[rows, :][:, cols]
+
         if ':' not in ostring and len(ox) > 1:
             ostring = 'vstack(%s)' % ostring
         if ':' not in istring and len(ix) > 1:
@@ -606,6 +717,28 @@ def reduce_jacobian(J, i1, i2, idx, ish, o1, o2, odx, osh):
         return J[o1:o2, i1:i2]
 
 
+def color_columns(sparsity, forms=None):
+    """Return a list of colors, each a list of column indices, such that
+    no two columns of the same color have a nonzero entry in the same row
+    of the boolean array `sparsity`. If `forms` is given, columns of the
+    same color also have the same finite difference form. Columns are
+    colored greedily in order.
+    """
+    colors = []
+    for j in range(sparsity.shape[1]):
+        rows = sparsity[:, j]
+        for color, used in colors:
+            if (forms is None or forms[color[0]] == forms[j]) and \
+               not (used & rows).any():
+                color.append(j)
+                used |= rows
+                break
+        else:
+            colors.append(([j], rows.copy()))
+
+    return [color for color, used in colors]
+
+
 class FiniteDifference(object):
     """ Helper object for performing finite difference on a portion of a model.
     """
@@ -629,6 +762,13 @@ class FiniteDifference(object):
         self.step_type = options.fd_step_type
         self.step_type_custom = {}
         self.relative_threshold = 1.0e-4
+        self.n_workers = options.fd_workers
+        self.coloring = options.fd_coloring
+        self.coloring_check = options.fd_coloring_check
+        self.sparsity = None
+        self.declared = False
+        self.colors = None
+        self.since_check = 0
 
         driver = self.pa.wflow._parent
         driver_params = []
@@ -729,11 +869,231 @@ class FiniteDifference(object):
         self.y = zeros((out_size,))
         self.y2 = zeros((out_size,))
 
+        if self.coloring and len(pa.comps) == 1:
+            comp = self.scope.get(pa.comps[0])
+            if hasattr(comp, 'provide_sparsity'):
+                self.sparsity = self._declared_sparsity(comp)
+                self.declared = True
+
+    def _declared_sparsity(self, comp):
+        """Return the nonzero pattern of the Jacobian declared by the
+        `provide_sparsity` method of `comp`, the only component in our
+        block. It returns a dict keyed on (output, input) name pairs with a
+        boolean array of shape (output size, input size) or a single bool for
+        each pair. Pairs that aren't in the dict don't depend on each other.
+        Any of our inputs or outputs that isn't a whole variable of `comp`
+        is treated as depending on everything.
+        """
+        declared = comp.provide_sparsity()
+        prefix = comp.name + '.'
+
+        def local_name(path):
+            if path.startswith(prefix) and '[' not in path:
+                return path[len(prefix):]
+            return None
+
+        sparsity = zeros(self.J.shape, dtype=bool)
+        for srcs in self.inputs:
+            if isinstance(srcs, basestring):
+                srcs = [srcs]
+            for src in srcs:
+                j1, j2 = self.in_bounds[src]
+                iname = local_name(src)
+                for out in self.outputs:
+                    i1, i2 = self.out_bounds[out]
+                    oname = local_name(out)
+                    if iname is None or oname is None:
+                        sparsity[i1:i2, j1:j2] = True
+                    elif (oname, iname) in declared:
+                        pattern = asarray(declared[(oname, iname)], dtype=bool)
+                        if pattern.ndim:
+                            pattern = pattern.reshape((i2-i1, j2-j1))
+                        sparsity[i1:i2, j1:j2] |= pattern
+        return sparsity
+
     def calculate(self):
         """Return Jacobian for all inputs and outputs."""
         self.get_inputs(self.x)
         self.get_outputs(self.y_base)
 
+        steps = self.get_steps()
+        forms = [step[4] for step in steps]
+
+        if self.declared and self.colors is None:
+            self.colors = color_columns(self.sparsity, forms)
+
+        # A detected pattern is checked again every coloring_check finite
+        # differences by taking the steps one at a time.
+        check = False
+        if self.colors is not None and not self.declared and \
+           self.coloring_check:
+            self.since_check += 1
+            if self.since_check >= self.coloring_check:
+                check = True
+                self.since_check = 0
+
+        # Columns of the same color share no rows, so they can be stepped
+        # together in a single run.
+        if self.colors is None or check:
+            groups = [[step] for step in steps]
+        else:
+            groups = [[steps[j] for j in color] for color in self.colors]
+
+        for group, columns in zip(groups, self._run_groups(groups)):
+            for step, column in zip(group, columns):
+                self.J[:, step[3]] = column
+
+        # The pattern is detected from Jacobians taken one column at a
+        # time, at the current point and at a randomly perturbed one, so
+        # entries that happen to be zero at one point aren't lost.
+        if self.coloring and not self.declared:
+            if self.colors is None:
+                self.sparsity = (self.J != 0.0) | self._perturbed_pattern(steps)
+                self.colors = color_columns(self.sparsity, forms)
+            elif check:
+                pattern = self.J != 0.0
+                if (pattern & ~self.sparsity).any():
+                    self.sparsity |= pattern
+                    self.colors = color_columns(self.sparsity, forms)
+
+        # Return outputs to a clean state.
+        for src in self.outputs:
+            i1, i2 = self.out_bounds[src]
+            old_val = self.scope.get(src)
+
+            if isinstance(old_val, float):
+                new_val = float(self.y_base[i1:i2])
+            elif isinstance(old_val, ndarray):
+                shape = old_val.shape
+                if len(shape) > 1:
+                    new_val = self.y_base[i1:i2]
+                    new_val = new_val.reshape(shape)
+                else:
+                    new_val = self.y_base[i1:i2]
+            elif has_interface(old_val, IVariableTree):
+                new_val = old_val.copy()
+                self.pa.wflow._update(src, new_val, self.y_base[i1:i2])
+
+            src, _, idx = src.partition('[')
+            if idx:
+                old_val = self.scope.get(src)
+                if isinstance(new_val, ndarray):
+                    exec('old_val[%s = new_val.copy()' % idx)
+                else:
+                    exec('old_val[%s = new_val' % idx)
+                self.scope.set(src, old_val, force=True)
+            else:
+                if isinstance(new_val, ndarray):
+                    self.scope.set(src, new_val.copy(), force=True)
+                else:
+                    self.scope.set(src, new_val, force=True)
+
+        #print 'after FD', self.pa.name, self.J
+        return self.J
+
+    def _run_groups(self, groups):
+        """Return the columns of the Jacobian resulting from each group of
+        steps (see _group_columns), taken in forked workers if we have
+        more than one."""
+
+        # Avoid importing the resource allocation machinery until needed.
+        from openmdao.main.forkpool import can_fork, fork_map, \
+                                           max_local_workers
+
+        n_workers = self.n_workers
+        if n_workers == 0:
+            n_workers = max_local_workers()
+
+        if n_workers > 1 and len(groups) > 1 and can_fork():
+            # Each forked worker perturbs its own copy of the model, so
+            # there is no step to undo here.
+            return fork_map(self._group_columns, groups, n_workers,
+                            context=self._scratch_dirs)
+        else:
+            return [self._group_columns(group) for group in groups]
+
+    @contextmanager
+    def _scratch_dirs(self):
+        """Run the components of our block in copies of their execution
+        directories, within a scratch directory under the simulation root,
+        so that the files written by concurrent workers don't collide.
+        Components that share a directory share its copy. A component with
+        no directory of its own gets a copy of just the files in the
+        directory it would run in. Components within an assembly of the
+        block follow it unless their directory is absolute. Only used in
+        forked workers, so the model isn't restored afterwards.
+        """
+        from openmdao.main.component import SimulationRoot
+
+        root = SimulationRoot.get_root()
+        scratch = mkdtemp(prefix='fd_worker_', dir=root)
+        base = os.path.join(scratch, 'root')  # Copy of the root.
+        cwd = os.getcwd()
+        try:
+            comps = {}
+            for name in self.pa.itercomps:
+                comp = self.scope.get(name)
+                if getattr(comp, 'directory', None) is not None:
+                    path = comp.get_abs_directory()
+                    if SimulationRoot.legal_path(path):
+                        comps.setdefault(path, []).append(comp)
+
+            # Parents before children, so a whole tree is copied once.
+            for path in sorted(comps, key=len):
+                new_path = os.path.normpath(
+                    os.path.join(base, os.path.relpath(path, root)))
+                if not os.path.exists(new_path):
+                    if any(comp.directory for comp in comps[path]):
+                        shutil.copytree(path, new_path, symlinks=True,
+                                ignore=shutil.ignore_patterns('fd_worker_*'))
+                    else:
+                        os.makedirs(new_path)
+                        for fname in os.listdir(path):
+                            fpath = os.path.join(path, fname)
+                            if os.path.isfile(fpath):
+                                shutil.copy2(fpath, new_path)
+                for comp in comps[path]:
+                    comp.directory = new_path
+
+            new_cwd = os.path.join(base, os.path.relpath(cwd, root))
+            if not os.path.isdir(new_cwd):
+                new_cwd = scratch
+            os.chdir(new_cwd)
+            yield
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    def _perturbed_pattern(self, steps):
+        """Return the nonzero pattern of the Jacobian at a point moved
+        from the current one by a random fraction of each step."""
+
+        y_base = self.y_base.copy()
+        J = zeros(self.J.shape)
+        deltas = RandomState(0).uniform(0.5, 1.5, len(steps))
+        for step, delta in zip(steps, deltas):
+            self.set_value(step[0], delta*step[5], step[1], step[2], step[3])
+
+        try:
+            self.pa.run(ffd_order=1)
+            self.get_outputs(self.y_base)
+            groups = [[step] for step in steps]
+            for step, columns in zip(steps, self._run_groups(groups)):
+                J[:, step[3]] = columns[0]
+        finally:
+            for step, delta in zip(steps, deltas):
+                self.set_value(step[0], -delta*step[5], step[1], step[2],
+                               step[3])
+            self.y_base[:] = y_base
+
+        return J != 0.0
+
+    def get_steps(self):
+        """Return a list of the steps to take, one per column of the
+        Jacobian. Each is a tuple of the form (src, i1, i2, index, form,
+        fd_step)."""
+
+        steps = []
         for j, src, in enumerate(self.inputs):
 
             # Users can customize the FD per variable
@@ -760,97 +1120,123 @@ class FiniteDifference(object):
                     if current_val > self.relative_threshold:
                         fd_step = fd_step*current_val
 
-                #--------------------
-                # Forward difference
-                #--------------------
-                if form == 'forward':
+                steps.append((src, i1, i2, i, form, fd_step))
 
-                    # Step
-                    self.set_value(src, fd_step, i1, i2, i)
+        return steps
 
-                    self.pa.run(ffd_order=1)
-                    self.get_outputs(self.y)
+    def _group_columns(self, group):
+        """Take the given group of steps and return the resulting columns
+        of the Jacobian. The steps in a group of more than one must share a
+        form and have no nonzero rows in common."""
 
-                    # Forward difference
-                    self.J[:, i] = (self.y - self.y_base)/fd_step
+        if len(group) == 1:
+            return [self._step_column(group[0])]
 
-                    # Undo step
-                    self.set_value(src, -fd_step, i1, i2, i)
+        form = group[0][4]
+        if form == 'backward':
+            sign = -1.0
+        else:
+            sign = 1.0
 
-                #--------------------
-                # Backward difference
-                #--------------------
-                elif form == 'backward':
+        # Step
+        for src, i1, i2, i, form, fd_step in group:
+            self.set_value(src, sign*fd_step, i1, i2, i)
 
-                    # Step
-                    self.set_value(src, -fd_step, i1, i2, i)
+        self.pa.run(ffd_order=1)
+        self.get_outputs(self.y)
 
-                    self.pa.run(ffd_order=1)
-                    self.get_outputs(self.y)
+        if form == 'central':
 
-                    # Backward difference
-                    self.J[:, i] = (self.y_base - self.y)/fd_step
+            # Backward Step
+            for src, i1, i2, i, form, fd_step in group:
+                self.set_value(src, -2.0*fd_step, i1, i2, i)
 
-                    # Undo step
-                    self.set_value(src, fd_step, i1, i2, i)
+            self.pa.run(ffd_order=1)
+            self.get_outputs(self.y2)
 
-                #--------------------
-                # Central difference
-                #--------------------
-                elif form == 'central':
+            delta = (self.y - self.y2)/2.0
+            undo = 1.0
+        else:
+            delta = sign*(self.y - self.y_base)
+            undo = -sign
 
-                    # Forward Step
-                    self.set_value(src, fd_step, i1, i2, i)
+        # Undo step
+        for src, i1, i2, i, form, fd_step in group:
+            self.set_value(src, undo*fd_step, i1, i2, i)
 
-                    self.pa.run(ffd_order=1)
-                    self.get_outputs(self.y)
+        columns = []
+        for step in group:
+            rows = self.sparsity[:, step[3]]
+            column = zeros(delta.shape)
+            column[rows] = delta[rows]/step[5]
+            columns.append(column)
 
-                    # Backward Step
-                    self.set_value(src, -2.0*fd_step, i1, i2, i)
+        return columns
 
-                    self.pa.run(ffd_order=1)
-                    self.get_outputs(self.y2)
+    def _step_column(self, step):
+        """Take the given step (see get_steps) and return the resulting
+        column of the Jacobian."""
 
-                    # Central difference
-                    self.J[:, i] = (self.y - self.y2)/(2.0*fd_step)
+        src, i1, i2, i, form, fd_step = step
 
-                    # Undo step
-                    self.set_value(src, fd_step, i1, i2, i)
+        #--------------------
+        # Forward difference
+        #--------------------
+        if form == 'forward':
 
-        # Return outputs to a clean state.
-        for src in self.outputs:
-            i1, i2 = self.out_bounds[src]
-            old_val = self.scope.get(src)
+            # Step
+            self.set_value(src, fd_step, i1, i2, i)
 
-            if isinstance(old_val, float):
-                new_val = float(self.y_base[i1:i2])
-            elif isinstance(old_val, ndarray):
-                shape = old_val.shape
-                if len(shape) > 1:
-                    new_val = self.y_base[i1:i2]
-                    new_val = new_val.reshape(shape)
-                else:
-                    new_val = self.y_base[i1:i2]
-            elif has_interface(old_val, IVariableTree):
-                new_val = old_val.copy()
-                self.pa.wflow._update(src, new_val, self.y_base[i1:i2])
+            self.pa.run(ffd_order=1)
+            self.get_outputs(self.y)
 
-            src, _, idx = src.partition('[')
-            if idx:
-                old_val = self.scope.get(src)
-                if isinstance(new_val, ndarray):
-                    exec('old_val[%s = new_val.copy()' % idx)
-                else:
-                    exec('old_val[%s = new_val' % idx)
-                self.scope.set(src, old_val, force=True)
-            else:
-                if isinstance(new_val, ndarray):
-                    self.scope.set(src, new_val.copy(), force=True)
-                else:
-                    self.scope.set(src, new_val, force=True)
+            # Forward difference
+            column = (self.y - self.y_base)/fd_step
 
-        #print 'after FD', self.pa.name, self.J
-        return self.J
+            # Undo step
+            self.set_value(src, -fd_step, i1, i2, i)
+
+        #--------------------
+        # Backward difference
+        #--------------------
+        elif form == 'backward':
+
+            # Step
+            self.set_value(src, -fd_step, i1, i2, i)
+
+            self.pa.run(ffd_order=1)
+            self.get_outputs(self.y)
+
+            # Backward difference
+            column = (self.y_base - self.y)/fd_step
+
+            # Undo step
+            self.set_value(src, fd_step, i1, i2, i)
+
+        #--------------------
+        # Central difference
+        #--------------------
+        elif form == 'central':
+
+            # Forward Step
+            self.set_value(src, fd_step, i1, i2, i)
+
+            self.pa.run(ffd_order=1)
+            self.get_outputs(self.y)
+
+            # Backward Step
+            self.set_value(src, -2.0*fd_step, i1, i2, i)
+
+            self.pa.run(ffd_order=1)
+            self.get_outputs(self.y2)
+
+            # Central difference
+            column = (self.y - self.y2)/(2.0*fd_step)
+
+            # Undo step
+            self.set_value(src, fd_step, i1, i2, i)
+
+        return column
 
     def get_inputs(self, x):
         """Return matrix of flattened values from input edges."""
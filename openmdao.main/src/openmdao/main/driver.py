@@ -10,7 +10,7 @@ from zope.interface import implementedBy
 
 # pylint: disable-msg=E0611,F0401
 
-from openmdao.main.case import Case
+from openmdao.main.case import Case, CaseSchema, CompactCase
 from openmdao.main.component import Component
 from openmdao.main.dataflow import Dataflow
 from openmdao.main.datatypes.api import Bool, Enum, Float, Int, List, Slot, \
@@ -46,6 +46,27 @@ class GradientOptions(VariableTree):
                         'or scaled to the bounds ( high-low) step sizes',
                         framework_var=True)
 
+    fd_workers = Int(1, low=0, desc='Number of local worker processes used '
+                     'to take finite difference steps concurrently. Each worker '
+                     'is forked from the current process. Set to 0 to use as '
+                     'many as the local resource allocator allows.',
+                     framework_var=True)
+
+    fd_coloring = Bool(False, desc='Set to True to step structurally '
+                       'independent inputs together. Which inputs can share '
+                       'a step is found from the sparsity declared by a '
+                       "component's provide_sparsity method, or else from "
+                       'the nonzero pattern of the Jacobians taken one step '
+                       'per input by the first finite difference of each '
+                       'block.',
+                       framework_var=True)
+
+    fd_coloring_check = Int(10, low=0, desc='Number of finite differences '
+                            'of a block between checks of a detected '
+                            'sparsity, each of which takes one step per input '
+                            'again. Set to 0 to never check.',
+                            framework_var=True)
+
     force_fd = Bool(False, desc="Set to True to force finite difference " +
                                 "of this driver's entire workflow in a" +
                                 "single block.",
@@ -56,6 +77,20 @@ class GradientOptions(VariableTree):
     #                          'by adding sets of component names.')
 
     # Analytic solution with GMRES
+    lin_solver = Enum('scipy_gmres',
+                      ['scipy_gmres', 'recycled_gmres', 'direct'],
+                      desc='Linear solver for the analytic gradient: one GMRES '
+                      'solve per right-hand side (scipy_gmres), LGMRES that '
+                      'reuses Krylov vectors between right-hand sides '
+                      '(recycled_gmres), or a sparse LU factorization of the '
+                      'assembled system shared by all right-hand sides (direct).',
+                      framework_var=True)
+    sparse_jacobian = Bool(False, desc='Set to True to assemble the '
+                           'component Jacobians into a single sparse matrix '
+                           'once per linearization. The direct solver '
+                           'factors it and the GMRES solvers use its '
+                           'incomplete LU factorization as a preconditioner.',
+                           framework_var=True)
     gmres_tolerance = Float(1.0e-9, desc='Tolerance for GMRES', framework_var=True)
     gmres_maxiter = Int(100, desc='Maximum number of iterations for GMRES', framework_var=True)
 
@@ -92,6 +127,11 @@ class Driver(Component):
 
         self._required_compnames = None
 
+        # Expanded printvars and their evaluators, see _get_printvars().
+        self._printvar_cache = None
+        self._record_vars = None
+        self._case_schema = None  # shared by the cases we record
+
         # This flag is triggered by adding or removing any parameters,
         # constraints, or objectives.
         self._invalidated = False
@@ -104,6 +144,7 @@ class Driver(Component):
         """callback when new workflow is slotted"""
         if newwf is not None:
             newwf._parent = self
+            newwf.config_changed()
 
     def get_expr_scope(self):
         """Return the scope to be used to evaluate ExprEvaluators."""
@@ -115,6 +156,8 @@ class Driver(Component):
         a constraint/objective/parameter is set, removed, or cleared.
         """
         self._invalidated = True
+        self._printvar_cache = None
+        self._record_vars = None
         self._set_exec_state('INVALID')
 
     def is_valid(self):
@@ -480,35 +523,50 @@ class Driver(Component):
                 val = con.evaluate(self.parent)
                 case_output.append(["Constraint ( %s )" % name, val])
 
-        tmp_printvars = self.printvars[:]
-        tmp_printvars.append('%s.workflow.itername' % self.name)
-        iotypes[tmp_printvars[-1]] = 'out'
-
         # Additional user-requested variables
-        for printvar in tmp_printvars:
-
-            if '*' in printvar:
-                printvars = self._get_all_varpaths(printvar)
-            else:
-                printvars = [printvar]
-
-            for var in printvars:
+        printvars = self._get_printvars()
+        if self._record_vars is None or self._record_vars[0] is not printvars:
+            itername = '%s.workflow.itername' % self.name
+            iotypes[itername] = 'out'
+            record_vars = []
+            for var, expr in printvars + \
+                    [(itername, ExprEvaluator(itername, scope=self.parent,
+                                              compiled=True))]:
                 iotype = iotypes.get(var)
                 if iotype is None:
                     iotype = self.parent.get_metadata(var, 'iotype')
                     iotypes[var] = iotype
-                if iotype == 'in':
-                    val = ExprEvaluator(var, scope=self.parent).evaluate()
-                    case_input.append([var, val])
-                elif iotype == 'out':
-                    val = ExprEvaluator(var, scope=self.parent).evaluate()
-                    case_output.append([var, val])
-                else:
+                if iotype not in ('in', 'out'):
                     msg = "%s is not an input or output" % var
                     self.raise_exception(msg, ValueError)
+                record_vars.append((var, iotype, expr))
+            self._record_vars = (printvars, record_vars)
 
-        #case = Case(case_input, case_output, case_uuid=self.case_id , parent_uuid=self.parent_case_id)
-        case = Case(case_input, case_output, parent_uuid=self._case_id)
+        for var, iotype, expr in self._record_vars[1]:
+            if iotype == 'in':
+                case_input.append([var, expr.evaluate()])
+            else:
+                case_output.append([var, expr.evaluate()])
+
+        # The names are normally the same every iteration, so the recorded
+        # cases can share a schema rather than each holding its own dicts.
+        in_names = tuple([name for name, val in case_input])
+        out_names = tuple([name for name, val in case_output])
+        schema = self._case_schema
+        if schema is None or schema.inputs != in_names \
+                          or schema.outputs != out_names:
+            try:
+                schema = CaseSchema(in_names, out_names)
+            except ValueError:  # duplicate names, e.g. a printvar is a param
+                schema = None
+            self._case_schema = schema
+
+        if schema is None:
+            case = Case(case_input, case_output, parent_uuid=self._case_id)
+        else:
+            case = CompactCase(schema, [val for name, val in case_input] +
+                                       [val for name, val in case_output],
+                               parent_uuid=self._case_id)
 
 
 
@@ -517,6 +575,29 @@ class Driver(Component):
         for recorder in self.recorders:
             recorder.record(case)
 
+    def _get_printvars(self):
+        """ Return a list of (name, ExprEvaluator) for the variables in
+        printvars, with any wildcards expanded. The list is cached until
+        printvars, our configuration or any workflow changes. Adding or
+        removing an existing component from a workflow doesn't change the
+        configuration of its parent, so workflows are checked separately.
+        """
+        key = (tuple(self.printvars), self.parent._depgraph._config_count,
+               Workflow.change_count)
+        if self._printvar_cache is None or self._printvar_cache[0] != key:
+            printvars = []
+            for printvar in self.printvars:
+                if '*' in printvar:
+                    names = self._get_all_varpaths(printvar)
+                else:
+                    names = [printvar]
+                for name in names:
+                    printvars.append((name, ExprEvaluator(name,
+                                                          scope=self.parent,
+                                                          compiled=True)))
+            self._printvar_cache = (key, printvars)
+        return self._printvar_cache[1]
+
     def _get_all_varpaths(self, pattern, header=''):
         ''' Return a list of all varpaths in the driver's workflow that
         match the specified pattern.
@@ -2,6 +2,8 @@
 Exception classes for OpenMDAO.
 """
 
+import sys
+
 class ConstraintError(ValueError):
     """Raised when a constraint is violated."""
     pass
@@ -34,6 +36,16 @@ class TracedError(Exception):
     
     def __repr__(self):
         return "%s%s" % (self.__class__.__name__, self.args)
+
+    def __reduce__(self):
+        # Keep the traceback when returned from a remote server. The
+        # original exception may not unpickle there, because its class only
+        # exists in the model's egg or its __init__ needs other arguments,
+        # so just its class name and message are sent.
+        exc_class = self.orig_exc.__class__
+        return (_restore_traced_error,
+                (self.__class__, exc_class.__module__, exc_class.__name__,
+                 str(self.orig_exc), self.traceback))
     
     def reraise(self, with_traceback=True):
         if with_traceback:
@@ -42,6 +54,24 @@ class TracedError(Exception):
             raise self.orig_exc
     
 
+def _restore_traced_error(cls, module, name, msg, tback):
+    """Return a `cls` instance for a pickled :class:`TracedError`. The
+    original exception is recreated from its message if its class has
+    already been imported here and can be created that way, and otherwise
+    it's replaced by a :class:`RuntimeError` naming the class.
+    """
+    exc_class = getattr(sys.modules.get(module), name, None)
+    orig_exc = None
+    if isinstance(exc_class, type) and issubclass(exc_class, Exception):
+        try:
+            orig_exc = exc_class(msg)
+        except Exception:
+            pass
+    if orig_exc is None:
+        orig_exc = RuntimeError('%s: %s' % (name, msg))
+    return cls(orig_exc, tback)
+
+
 def traceback_str(exc):
     """Call this to get the traceback string associated with the given exception.
     Returns the exception string if there is no traceback.
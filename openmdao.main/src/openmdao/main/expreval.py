@@ -8,10 +8,13 @@ import math
 import ast
 import __builtin__
 
+from multiprocessing.managers import BaseProxy
+
 from openmdao.main.printexpr import _get_attr_node, _get_long_name, \
                                     transform_expression, ExprPrinter, \
                                     print_node
 from openmdao.main.index import INDEX, ATTR, CALL, SLICE, EXTSLICE
+from openmdao.main.interfaces import IComponent, obj_has_interface
 
 from openmdao.main.printexpr import transform_expression
 
@@ -64,6 +67,16 @@ else:
 from numpy import ndarray, ndindex, zeros, identity, complex, imag, issubdtype, array
 import numpy
 
+from openmdao.main.autodiff import ADValue, ADNamespace, AutoDiffError, \
+                                   seed, ad_functions
+
+# this dict replaces _expr_dict when an expression is differentiated by
+# evaluating it with ADValues
+_ad_dict = dict(_expr_dict)
+_ad_dict.update(ad_functions)
+_ad_dict['math'] = ADNamespace(math)
+_ad_dict['numpy'] = ADNamespace(numpy)
+
 
 _Missing = object()
 
@@ -79,6 +92,12 @@ def is_in_process(scope, vname):
             return False
     return True
 
+def _config_count(scope):
+    """Return the configuration counter of the dependency graph of scope,
+    or None if scope's graph doesn't keep one.
+    """
+    return getattr(getattr(scope, '_depgraph', None), '_config_count', None)
+
 def in_expr_locals(scope, name):
     """Return True if the given (dotted) name refers to something in our
     _expr_dict dict, e.g., math.sin.  Raises a KeyError if the name
@@ -138,10 +157,16 @@ class ExprTransformer(ast.NodeTransformer):
     accesses into a form that can be passed to a downstream object and
     executed there. For example, abc.d[xyz](1, pdq-10).value would translate
     to, e.g., scope.get('abc.d', [(0,xyz), (0,[1,pdq-10]), (1,'value')]).
+
+    If direct is True, plain dotted names that are reachable in-process
+    are translated into attribute accesses instead, e.g., abc.d.g becomes
+    _abc_.d.g, where _abc_ is bound to the child abc when the expression
+    is evaluated.
     """
-    def __init__(self, expreval, rhs=None, getter='get'):
+    def __init__(self, expreval, rhs=None, getter='get', direct=False):
         self.expreval = expreval
         self.rhs = rhs
+        self.direct = direct
         self._stack = []  # use this to see if we're inside of parens or
                           # brackets so that we always translate to 'get'
                           # even if we're on the lhs
@@ -183,6 +208,10 @@ class ExprTransformer(ast.NodeTransformer):
                                                       col_offset=1,
                                                       ctx=ast.Load()))]
         else:
+            if self.direct and not subs:
+                newnode = self._direct_node(name)
+                if newnode is not None:
+                    return ast.copy_location(newnode, node)
             fname = self.getter
             keywords = []
         names.append(fname)
@@ -194,6 +223,28 @@ class ExprTransformer(ast.NodeTransformer):
         return ast.copy_location(ast.Call(func=called_obj, args=args,
                                           ctx=node.ctx, keywords=keywords), node)
 
+    def _direct_node(self, name):
+        """Return an Attribute node that reads the given dotted name
+        directly, or None if some object along the way isn't in this process.
+        A child component of the scope is replaced by a local name so that
+        it only has to be looked up when the configuration changes.
+        """
+        scope = self.expreval.scope
+        obj = scope
+        for part in name.split('.'):
+            obj = getattr(obj, part, _Missing)
+            if obj is _Missing or isinstance(obj, BaseProxy):
+                return None
+
+        parts = name.split('.')
+        if len(parts) > 1 and _config_count(scope) is not None:
+            child = getattr(scope, parts[0])
+            if obj_has_interface(child, IComponent):
+                local = '_%s_' % parts[0]
+                self.expreval._direct_refs[local] = weakref.ref(child)
+                return _get_attr_node([local]+parts[1:])
+        return _get_attr_node(['scope']+parts)
+
     def visit_Name(self, node, subs=None):
         return self._name_to_node(node, node.id, subs)
 
@@ -448,13 +499,19 @@ class ExprEvaluator(object):
     For a description of the format of the 'index' arg of set/get that is
     generated by ExprEvaluator, see the doc string for the
     ``openmdao.main.index.process_index_entry`` function.
+
+    If `compiled` is True, variables that can be reached in the current
+    process are read with plain attribute access rather than through
+    the getter, and the expression is only reparsed after the
+    configuration of its scope changes.
     """
 
-    def __init__(self, text, scope=None, getter='get'):
+    def __init__(self, text, scope=None, getter='get', compiled=False):
         self._scope = None
         self.scope = scope
         self.text = text
         self.getter = getter
+        self.compiled = compiled
         self.var_names = set()
         self.cached_grad_eq = None
 
@@ -466,7 +523,9 @@ class ExprEvaluator(object):
     @text.setter
     def text(self, value):
         self._code = self._assignment_code = None
+        self._direct_refs = None
         self._examiner = self.cached_grad_eq = None
+        self._ad_ok = True
         self._text = value
 
     @property
@@ -484,7 +543,9 @@ class ExprEvaluator(object):
     def scope(self, value):
         if value is not self.scope:
             self._code = self._assignment_code = None
+            self._direct_refs = None
             self._examiner = self.cached_grad_eq = None
+            self._ad_ok = True
             if value is not None:
                 self._scope = weakref.ref(value)
             else:
@@ -557,6 +618,7 @@ class ExprEvaluator(object):
         # remove weakref to scope because it won't pickle
         state['_scope'] = self.scope
         state['_code'] = None  # <type 'code'> won't pickle either.
+        state['_direct_refs'] = None  # neither will weakrefs
         if state.get('_assignment_code'):
             state['_assignment_code'] = None # more unpicklable <type 'code'>
         return state
@@ -589,7 +651,14 @@ class ExprEvaluator(object):
         #varscanner = ExprVarScanner()
         #varscanner.visit(astree)
 
-        new_ast = ExprTransformer(self, getter=self.getter).visit(astree)
+        direct = self.compiled and self.getter == 'get'
+        if direct:
+            self._direct_refs = {}
+            self._direct_count = _config_count(self.scope)
+        else:
+            self._direct_refs = None
+        new_ast = ExprTransformer(self, getter=self.getter,
+                                  direct=direct).visit(astree)
 
         # compile the transformed AST
         ast.fix_missing_locations(new_ast)
@@ -629,11 +698,31 @@ class ExprEvaluator(object):
         try:
             if self._code is None:
                 self._parse()
+            if self._direct_refs is not None:
+                dct = self._get_direct_locals(scope)
+                if dct is None:
+                    self._parse()
+                    dct = self._get_direct_locals(scope)
+                return eval(self._code, _expr_dict, dct)
             return eval(self._code, _expr_dict, locals())
         except Exception, err:
             raise type(err)("can't evaluate expression "
                             "'%s': %s" % (self.text, str(err)))
 
+    def _get_direct_locals(self, scope):
+        """Return the locals dict for compiled code, or None if the code
+        must be reparsed because the configuration of scope has changed.
+        """
+        if self._direct_count != _config_count(scope):
+            return None
+        dct = {'scope': scope}
+        for local, ref in self._direct_refs.items():
+            obj = ref()
+            if obj is None:
+                return None
+            dct[local] = obj
+        return dct
+
     def refs(self, copy=True):
         """Returns a list of all variables referenced,
         including any array indices."""
@@ -700,10 +789,53 @@ class ExprEvaluator(object):
 
         return imag(yp/stepsize)
 
+    def _ad_gradient(self, grad_code, var_dict, inputs, wrt):
+        """Return the gradient dict for the variables in `wrt`, found by
+        evaluating our gradient code once with ADValues in place of those
+        variables.
+        """
+        ad_vars = {}
+        for name in inputs:
+            val = var_dict[name].real
+            ad_vars[name] = seed(name, val) if name in wrt else val
+
+        result = eval(grad_code, _ad_dict, {'var_dict': ad_vars})
+        if isinstance(result, ADValue):
+            derivs = result.derivs
+            result = result.value
+        else:
+            derivs = {}
+        if isinstance(result, ndarray) and result.dtype == object or \
+           (not derivs and any(name in wrt for name in inputs)):
+            # the seeds were lost somewhere, e.g. in an object array of
+            # ADValues built by array() or numpy.dot(), so we can't trust
+            # a zero gradient
+            raise AutoDiffError("result of '%s' is not differentiable in"
+                                " forward mode" % self.text)
+
+        gradient = {}
+        for var in wrt:
+            if var[0:4] == '@bin':
+                gradient[var] = 1.0
+            elif var not in inputs:
+                gradient[var] = 0.0
+            else:
+                J = derivs.get(var)
+                if J is None:
+                    J = zeros((numpy.size(result), numpy.size(var_dict[var])))
+                if isinstance(var_dict[var], ndarray) or \
+                   isinstance(result, ndarray):
+                    gradient[var] = J
+                else:
+                    gradient[var] = float(J[0, 0])
+        return gradient
+
     def evaluate_gradient(self, stepsize=1.0e-6, wrt=None, scope=None):
         """Return a dict containing the gradient of the expression with respect
-        to each of the referenced varpaths. The gradient is calculated by 1st
-        order central difference for now.
+        to each of the referenced varpaths. The gradient is calculated in a
+        single forward mode evaluation of the expression if every operation in
+        it can be differentiated that way, and otherwise by complex step or
+        1st order central difference.
 
         stepsize: float
             Step size for finite difference.
@@ -747,6 +879,13 @@ class ExprEvaluator(object):
 
         grad_code = self.cached_grad_eq
 
+        if self._ad_ok:
+            try:
+                return self._ad_gradient(grad_code, var_dict, inputs, wrt)
+            except Exception:
+                # don't try again for this expression
+                self._ad_ok = False
+
         gradient = {}
         for var in wrt:
 
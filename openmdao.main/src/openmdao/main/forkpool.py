@@ -0,0 +1,206 @@
+"""
+Support for evaluating a list of items concurrently in forked copies of the
+current process. The workers inherit the in-memory state of the model at the
+time of the fork, so nothing has to be saved to an egg, transferred, or
+reloaded before they can start working.
+"""
+
+import os
+import select
+import traceback
+
+from multiprocessing import Pipe
+
+from openmdao.main.resource import ResourceAllocationManager as RAM
+from openmdao.main.resource import LocalAllocator
+
+__all__ = ['can_fork', 'max_local_workers', 'fork_imap', 'fork_map',
+           'fork_call']
+
+
+def can_fork():
+    """ Return True if this platform can fork worker processes. """
+    return hasattr(os, 'fork')
+
+
+def max_local_workers():
+    """ Return the number of worker processes the local host will accept,
+    as reported by the first :class:`LocalAllocator` registered with the
+    :class:`ResourceAllocationManager`.
+    """
+    for allocator in RAM.list_allocators():
+        if isinstance(allocator, LocalAllocator):
+            count, _ = allocator.max_servers({}, load_adjusted=True)
+            return max(count, 1)
+    return 1
+
+
+def _serve(func, items, conn):
+    """ Evaluates the item of each index received on `conn` until sent
+    None, sending back ``(index, result, error)`` for each.
+    """
+    while True:
+        index = conn.recv()
+        if index is None:
+            return
+        try:
+            result = func(items[index])
+        except Exception:
+            conn.send((index, None, traceback.format_exc()))
+            return
+        conn.send((index, result, None))
+
+
+def _worker(func, items, conn, context):
+    """ Runs in the forked process. """
+    try:
+        if context is None:
+            _serve(func, items, conn)
+        else:
+            with context():
+                _serve(func, items, conn)
+    except EOFError:
+        pass  # No more items will be handed out.
+    except Exception:
+        conn.send((None, None, traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+def _fork_worker(func, items, context, others):
+    """ Fork a worker process, returning its pid and our connection to it.
+    `others` are our connections to the workers already forked.
+    """
+    conn, child_conn = Pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            conn.close()
+            for other in others:
+                other.close()
+            _worker(func, items, child_conn, context)
+        finally:
+            os._exit(0)
+    child_conn.close()
+    return pid, conn
+
+
+def fork_imap(func, items, n_workers, context=None):
+    """ Generator which returns ``(index, func(items[index]))`` for each
+    entry in `items` as the calls complete in `n_workers` forked processes.
+    Each worker is handed the index of the next item as soon as it finishes
+    its last one, so slow items don't hold up the rest. Closing the
+    generator stops the handing out of items; the workers finish the items
+    they have and exit. Arguments are as for :func:`fork_map`.
+
+    Raises :class:`RuntimeError` containing the remote traceback if any
+    evaluation fails or a worker dies.
+    """
+    indices = iter(range(len(items)))
+    conns = {}  # Our connection to each worker, by file number.
+    pids = {}   # Process id of each worker, by file number.
+
+    try:
+        for _ in range(max(n_workers, 1)):
+            index = next(indices, None)
+            if index is None:
+                break
+            pid, conn = _fork_worker(func, items, context, conns.values())
+            conns[conn.fileno()] = conn
+            pids[conn.fileno()] = pid
+            conn.send(index)
+
+        while conns:
+            ready, _, _ = select.select(conns.keys(), [], [])
+            for fileno in ready:
+                conn = conns[fileno]
+                try:
+                    index, result, error = conn.recv()
+                except EOFError:
+                    status = os.waitpid(pids.pop(fileno), 0)[1]
+                    raise RuntimeError('Worker process died, exit status %s'
+                                       % status)
+                if error is not None:
+                    raise RuntimeError('Worker process failed:\n%s' % error)
+
+                yield index, result
+
+                index = next(indices, None)
+                conn.send(index)
+                if index is None:
+                    conn.close()
+                    del conns[fileno]
+    finally:
+        for conn in conns.values():
+            conn.close()
+        for pid in pids.values():
+            os.waitpid(pid, 0)
+
+
+def fork_map(func, items, n_workers, context=None):
+    """ Return the list of ``func(item)`` for each entry in `items`, with the
+    calls spread over `n_workers` forked processes. Results must be
+    picklable. Any change `func` makes to the model happens in the
+    workers only.
+
+    func: callable
+        Called in a worker with a single item.
+
+    items: list
+        Items to be evaluated.
+
+    n_workers: int
+        Number of worker processes to fork.
+
+    context: callable
+        If given, called in each worker to return a context manager that
+        the worker's calls of `func` are made within, for instance to
+        give each worker its own directory.
+
+    The workers are plain forks rather than daemonic
+    :class:`multiprocessing.Process` objects, so `func` may itself call
+    :func:`fork_map`, for instance to finite difference a model with
+    worker processes while evaluating a case in a worker.
+
+    Raises :class:`RuntimeError` containing the remote traceback if any
+    evaluation fails or a worker dies.
+    """
+    results = [None]*len(items)
+    for index, result in fork_imap(func, items, n_workers, context):
+        results[index] = result
+    return results
+
+
+def fork_call(func, arg):
+    """ Return ``func(arg)`` evaluated in a forked copy of this process, so
+    any change `func` makes to the model is discarded. Like
+    :func:`fork_map`, this may be used within a :func:`fork_map` worker.
+    The result must be picklable.
+
+    Raises :class:`RuntimeError` containing the remote traceback if the
+    evaluation fails or the process dies.
+    """
+    reader, writer = Pipe(duplex=False)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            reader.close()
+            try:
+                writer.send((func(arg), None))
+            except Exception:
+                writer.send((None, traceback.format_exc()))
+        finally:
+            os._exit(0)
+
+    writer.close()
+    try:
+        result, error = reader.recv()
+    except EOFError:
+        result, error = None, 'Worker process died'
+    finally:
+        reader.close()
+        os.waitpid(pid, 0)
+
+    if error is not None:
+        raise RuntimeError('Worker process failed:\n%s' % error)
+    return result
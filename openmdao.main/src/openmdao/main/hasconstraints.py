@@ -7,7 +7,7 @@
 import operator
 import ordereddict
 
-from numpy import ndarray
+from numpy import ndarray, zeros
 
 from openmdao.main.expreval import ExprEvaluator
 from openmdao.main.pseudocomp import PseudoComponent, _remove_spaces
@@ -216,6 +216,45 @@ class Constraint(object):
                (other.lhs, other.comparator, other.rhs)
 
 
+class _ConstraintBlock(object):
+    """Evaluates a sequence of constraints into a single preallocated
+    float array. The pseudocomps and array slices of the constraints are
+    only looked up again after the configuration of the scope changes.
+    """
+
+    def __init__(self):
+        self._key = None
+        self._entries = []
+        self._vals = zeros(0)
+
+    def evaluate(self, scope, constraints):
+        """Returns an array containing the values of the given constraints.
+        The array is reused by the next call.
+        """
+        key = (id(scope), scope._depgraph._config_count)
+        if key != self._key:
+            self._entries = []
+            start = 0
+            for constraint in constraints:
+                end = start + constraint.size
+                self._entries.append((getattr(scope, constraint.pcomp_name),
+                                      start, end))
+                start = end
+            self._vals = zeros(start)
+            self._key = key
+
+        vals = self._vals
+        for pcomp, start, end in self._entries:
+            if not pcomp.is_valid():
+                pcomp.update_outputs(['out0'])
+            val = pcomp.out0
+            if isinstance(val, ndarray):
+                vals[start:end] = val.flat
+            else:
+                vals[start] = val
+        return vals
+
+
 class _HasConstraintsBase(object):
     _do_not_promote = ['get_expr_depends', 'get_referenced_compnames',
                        'get_referenced_varpaths']
@@ -223,6 +262,7 @@ class _HasConstraintsBase(object):
     def __init__(self, parent, allowed_types=None):
         self._parent = parent
         self._constraints = ordereddict.OrderedDict()
+        self._block = _ConstraintBlock()
 
     def remove_constraint(self, key):
         """Removes the constraint with the given string."""
@@ -460,6 +500,23 @@ class HasEqConstraints(_HasConstraintsBase):
             result.extend(constraint.evaluate(scope))
         return result
 
+    def eval_eq_constraint_array(self, scope=None):
+        """Returns an array of constraint values. The array is overwritten
+        by the next call.
+        """
+        return self._block.evaluate(_get_scope(self, scope),
+                                    self._constraints.values())
+
+    def calc_eq_constraint_gradient(self, inputs=None):
+        """Returns the gradient of the constraint values with respect to
+        `inputs` (by default, the parameters of our parent), with one row per
+        entry of :meth:`eval_eq_constraint_array`.
+        """
+        if inputs is None:
+            inputs = self._parent.list_param_group_targets()
+        return self._parent.workflow.calc_gradient(inputs,
+                                        self.list_eq_constraint_targets())
+
     def list_eq_constraint_targets(self):
         """Returns a list of outputs suitable for calc_gradient()."""
         return ["%s.out0" % c.pcomp_name for c in self._constraints.values()]
@@ -565,6 +622,23 @@ class HasIneqConstraints(_HasConstraintsBase):
             result.extend(constraint.evaluate(scope))
         return result
 
+    def eval_ineq_constraint_array(self, scope=None):
+        """Returns an array of constraint values. The array is overwritten
+        by the next call.
+        """
+        return self._block.evaluate(_get_scope(self, scope),
+                                    self._constraints.values())
+
+    def calc_ineq_constraint_gradient(self, inputs=None):
+        """Returns the gradient of the constraint values with respect to
+        `inputs` (by default, the parameters of our parent), with one row per
+        entry of :meth:`eval_ineq_constraint_array`.
+        """
+        if inputs is None:
+            inputs = self._parent.list_param_group_targets()
+        return self._parent.workflow.calc_gradient(inputs,
+                                        self.list_ineq_constraint_targets())
+
     def list_ineq_constraint_targets(self):
         """Returns a list of outputs suitable for calc_gradient()."""
         return ["%s.out0" % c.pcomp_name for c in self._constraints.values()]
@@ -584,6 +658,7 @@ class HasConstraints(object):
         self._parent = parent
         self._eq = HasEqConstraints(parent)
         self._ineq = HasIneqConstraints(parent)
+        self._block = _ConstraintBlock()
 
     def _item_count(self):
         """This is used by the replace function to determine if a delegate from
@@ -735,6 +810,39 @@ class HasConstraints(object):
         return self._eq.eval_eq_constraints(scope) + \
                self._ineq.eval_ineq_constraints(scope)
 
+    def eval_eq_constraint_array(self, scope=None):
+        """Returns an array of equality constraint values."""
+        return self._eq.eval_eq_constraint_array(scope)
+
+    def eval_ineq_constraint_array(self, scope=None):
+        """Returns an array of inequality constraint values."""
+        return self._ineq.eval_ineq_constraint_array(scope)
+
+    def eval_constraint_array(self, scope=None):
+        """Returns an array of constraint values, equality constraints
+        first. The array is overwritten by the next call.
+        """
+        return self._block.evaluate(_get_scope(self, scope),
+                                    self.get_constraints().values())
+
+    def calc_eq_constraint_gradient(self, inputs=None):
+        """Returns the gradient of the equality constraint values."""
+        return self._eq.calc_eq_constraint_gradient(inputs)
+
+    def calc_ineq_constraint_gradient(self, inputs=None):
+        """Returns the gradient of the inequality constraint values."""
+        return self._ineq.calc_ineq_constraint_gradient(inputs)
+
+    def calc_constraint_gradient(self, inputs=None):
+        """Returns the gradient of the constraint values with respect to
+        `inputs` (by default, the parameters of our parent), with one row per
+        entry of :meth:`eval_constraint_array`.
+        """
+        if inputs is None:
+            inputs = self._parent.list_param_group_targets()
+        return self._parent.workflow.calc_gradient(inputs,
+                                        self.list_constraint_targets())
+
     def list_constraints(self):
         """Return a list of strings containing constraint expressions."""
         return self._eq.list_constraints() + self._ineq.list_constraints()
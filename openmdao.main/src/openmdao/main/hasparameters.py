@@ -1051,16 +1051,25 @@ class HasParameters(object):
                              (len(values), self.total_parameters()))
         if case is None:
             scope = self._get_scope(scope)
-            start = 0
-            for param in self._parameters.values():
-                size = param.size
-                if size == 1:
-                    param.set(values[start], scope)
-                    start += 1
-                else:
-                    end = start + size
-                    param.set(values[start:end], scope)
-                    start = end
+
+            # Invalidate everything downstream of the targets in one pass
+            # once they have all been set.
+            batch = hasattr(scope, 'hold_invalidation') and \
+                    scope.hold_invalidation()
+            try:
+                start = 0
+                for param in self._parameters.values():
+                    size = param.size
+                    if size == 1:
+                        param.set(values[start], scope)
+                        start += 1
+                    else:
+                        end = start + size
+                        param.set(values[start:end], scope)
+                        start = end
+            finally:
+                if batch:
+                    scope.release_invalidation()
         else:
             start = 0
             for param in self._parameters.values():
@@ -709,6 +709,16 @@ class IHasEqConstraints(Interface):
         left-hand-side.
         """
 
+    def eval_eq_constraint_array(scope=None):
+        """Evaluates the constraint expressions into a single float array
+        that is reused between calls.
+        """
+
+    def calc_eq_constraint_gradient(inputs=None):
+        """Returns the gradient of the constraint values with respect to
+        the given inputs.
+        """
+
 
 class IHasIneqConstraints(Interface):
     """An Interface for objects containing inequality constraints."""
@@ -736,6 +746,16 @@ class IHasIneqConstraints(Interface):
         is the evaluation of the left-hand-side.
         """
 
+    def eval_ineq_constraint_array(scope=None):
+        """Evaluates the constraint expressions into a single float array
+        that is reused between calls.
+        """
+
+    def calc_ineq_constraint_gradient(inputs=None):
+        """Returns the gradient of the constraint values with respect to
+        the given inputs.
+        """
+
 
 class IHasConstraints(IHasEqConstraints, IHasIneqConstraints):
     """An Interface for objects containing both equality and inequality constraints."""
@@ -754,6 +774,16 @@ class IHasConstraints(IHasEqConstraints, IHasIneqConstraints):
     def eval_constraints(scope=None):
         """Evaluates the constraint expressions and returns a list of values."""
 
+    def eval_constraint_array(scope=None):
+        """Evaluates the constraint expressions into a single float array
+        that is reused between calls, equality constraints first.
+        """
+
+    def calc_constraint_gradient(inputs=None):
+        """Returns the gradient of the constraint values with respect to
+        the given inputs.
+        """
+
 
 class IHasObjectives(Interface):
     """An Interface for objects having a multiple objectives."""
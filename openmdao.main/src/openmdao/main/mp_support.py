@@ -1235,6 +1235,15 @@ class OpenMDAO_Proxy(BaseProxy):
         This version optionally encrypts the channel and sends the current
         thread's credentials with method arguments.
         """
+        self._send_call(methodname, args, kwds)
+        return self._recv_reply()
+
+    def _send_call(self, methodname, args=None, kwds=None):
+        """
+        Send a request to call a method of the referrent. The reply must be
+        read with :meth:`_recv_reply` before any other call is made by this
+        thread. Once sent, :meth:`_fileno` may be used to wait for the reply.
+        """
         args = args or ()
         kwds = kwds or {}
 
@@ -1280,7 +1289,21 @@ class OpenMDAO_Proxy(BaseProxy):
             logging.error(msg)
             raise RuntimeError(msg)
 
-        kind, result = decrypt(conn.recv(), session_key)
+    def _fileno(self):
+        """ Return file descriptor of this thread's connection. """
+        return self._tls.connection.fileno()
+
+    def _reply_ready(self):
+        """ Return True if a reply is waiting on this thread's connection. """
+        return self._tls.connection.poll()
+
+    def _recv_reply(self):
+        """
+        Receive the reply to a request sent by :meth:`_send_call` and return
+        a copy of the result.
+        """
+        conn = self._tls.connection
+        kind, result = decrypt(conn.recv(), self._tls.session_key)
 
         if kind == '#RETURN':
             return result
@@ -15,11 +15,13 @@ import signal
 import socket
 import sys
 import time
+import traceback
 
 from multiprocessing import current_process
 
 from openmdao.main.component import SimulationRoot
 from openmdao.main.container import Container
+from openmdao.main.exceptions import TracedError
 from openmdao.main.factory import Factory
 from openmdao.main.factorymanager import create, get_available_types, \
                                          get_signature
@@ -523,6 +525,75 @@ class ObjServer(object):
         self.tlo = Container.load_from_eggfile(egg_filename, log=self._logger)
         return self.tlo
 
+    @rbac('owner')
+    def run_cases(self, cases, seqnos, itername='', events=(),
+                  egg_filename=None, stop_on_error=False, inputs=None):
+        """
+        Run `cases` on the model loaded by :meth:`load_model` and return
+        them with their outputs updated, replacing a round trip per input,
+        run and output with a single request. Errors are reported in the
+        `msg` and `exc` of the failed case.
+
+        cases: list(Case)
+            Cases to be evaluated.
+
+        seqnos: list(int)
+            Initial execution count for the model's workflow for each case.
+
+        itername: string
+            Iteration coordinates of the requesting driver.
+
+        events: list(string)
+            Events to be set before each case is run.
+
+        egg_filename: string
+            If not None, the model is reloaded from this egg between cases.
+
+        stop_on_error: bool
+            If True, return as soon as a case fails, without running the
+            remaining cases.
+
+        inputs: dict
+            If not None, values to set (keyed on pathname) each time the
+            model is reloaded, before the case inputs are applied.
+        """
+        self._logger.debug('run_cases %d cases', len(cases))
+        if self.tlo is None:
+            raise RuntimeError('no model has been loaded')
+
+        results = []
+        for i, (case, seqno) in enumerate(zip(cases, seqnos)):
+            reloaded = i and egg_filename
+            if reloaded:
+                self.load_model(egg_filename)
+            tlo = self.tlo
+            try:
+                if reloaded and inputs:
+                    for name, value in inputs.items():
+                        tlo.set(name, value)
+                for name in events:
+                    tlo.set(name, True)
+                case.apply_inputs(tlo)
+            except Exception as exc:
+                case.msg = 'Exception setting case inputs: %s' % exc
+            else:
+                try:
+                    tlo.set_itername(itername, seqno)
+                    tlo.run(case_id=case.uuid)
+                except Exception as exc:
+                    self._logger.error('Caught exception: %r', exc)
+                    case.msg = str(exc)
+                    case.exc = TracedError(exc, traceback.format_exc())
+                else:
+                    try:
+                        case.update_outputs(tlo)
+                    except Exception as exc:
+                        case.msg = 'Exception getting case outputs: %s' % exc
+            results.append(case)
+            if case.msg is not None and stop_on_error:
+                break
+        return results
+
     @rbac('owner')
     def pack_zipfile(self, patterns, filename):
         """
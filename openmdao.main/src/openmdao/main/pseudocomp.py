@@ -156,7 +156,8 @@ class PseudoComponent(object):
         else:
             self._srcunits = None
 
-        self._srcexpr = ConnectedExprEvaluator(xformed_src, scope=self)
+        self._srcexpr = ConnectedExprEvaluator(xformed_src, scope=self,
+                                               compiled=True)
 
         # this is just the equation string (for debugging)
         if self._orig_dest:
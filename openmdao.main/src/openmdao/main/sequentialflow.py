@@ -7,10 +7,10 @@ import sys
 from math import isnan
 from StringIO import StringIO
 
-from openmdao.main.array_helpers import flattened_size, \
+from openmdao.main.array_helpers import flattened_size, flattened_value, \
                                         flatten_slice, is_differentiable_val
 from openmdao.main.derivatives import calc_gradient, calc_gradient_adjoint, \
-                                      applyJ, applyJT, applyMinvT
+                                      applyJ, applyJT, applyMinvT, get_bounds
 
 from openmdao.main.exceptions import RunStopped
 from openmdao.main.pseudoassembly import PseudoAssembly, to_PA_var, from_PA_var
@@ -23,20 +23,28 @@ from openmdao.main.depgraph import find_related_pseudos, \
                                     find_all_connecting
 from openmdao.main.interfaces import IDriver, IImplicitComponent, ISolver
 from openmdao.main.mp_support import has_interface
-from openmdao.util.graph import edges_to_dict, list_deriv_vars
+from openmdao.util.graph import edges_to_dict, flatten_list_of_iters, \
+                                 list_deriv_vars
 
 try:
-    from numpy import ndarray, zeros
+    from numpy import arange, array, concatenate, ndarray, ones, unique, zeros
+    from scipy.sparse import coo_matrix, issparse
 except ImportError as err:
     import logging
     logging.warn("In %s: %r", __file__, err)
-    from openmdao.main.numpy_fallback import ndarray, zeros
+    from openmdao.main.numpy_fallback import array, ndarray, ones, zeros
 
 __all__ = ['SequentialWorkflow']
 
 class SequentialWorkflow(Workflow):
     """A Workflow that is a simple sequence of components."""
 
+    # Everything that is built from the current derivative graph. Swapped
+    # out as a unit when a different set of inputs and outputs is requested.
+    _derivative_attrs = ('_derivative_graph', '_edges', '_comp_edges',
+                         '_matvec_plan', 'res', '_J_cache', '_J_keys',
+                         '_bounds_cache', '_shape_cache')
+
     def __init__(self, parent=None, scope=None, members=None):
         """ Create an empty flow. """
         self._explicit_names = [] # names the user adds
@@ -47,12 +55,19 @@ class SequentialWorkflow(Workflow):
         # Bookkeeping
         self._edges = None
         self._comp_edges = None
+        self._matvec_plan = None
         self._derivative_graph = None
         self.res = None
         self._upscoped = False
         self._J_cache = {}
+        self._J_keys = {}
         self._bounds_cache = {}
         self._shape_cache = {}
+        self._derivative_key = None
+        self._derivative_cache = {}
+        self._derivative_count = None
+        self._fd_options_key = None
+        self._nondiff_cache = {}
 
     def __iter__(self):
         """Returns an iterator over the components in the workflow."""
@@ -87,13 +102,20 @@ class SequentialWorkflow(Workflow):
 
         self._edges = None
         self._comp_edges = None
+        self._matvec_plan = None
         self._derivative_graph = None
         self.res = None
         self._upscoped = False
         self._names = None
         self._J_cache = {}
+        self._J_keys = {}
         self._bounds_cache = {}
         self._shape_cache = {}
+        self._derivative_key = None
+        self._derivative_cache = {}
+        self._derivative_count = None
+        self._fd_options_key = None
+        self._nondiff_cache = {}
 
     def sever_edges(self, edges):
         """Temporarily remove the specified edges but save
@@ -370,6 +392,7 @@ class SequentialWorkflow(Workflow):
         # if for some reason the number of edges has changed.
         if self.res is None or nEdge != self.res.shape[0]:
             self.res = zeros((nEdge, 1))
+            self._matvec_plan = None
 
         return nEdge
 
@@ -455,59 +478,132 @@ class SequentialWorkflow(Workflow):
         else:
             self._explicit_names = src._explicit_names[:]
 
-    def matvecFWD(self, arg):
-        '''Callback function for performing the matrix vector product of the
-        workflow's full Jacobian with an incoming vector arg.'''
+    def _index(self, node):
+        """ Return an object that picks the entries belonging to `node` out
+        of the residual vector: a slice for contiguous bounds or an integer
+        array for index lists."""
+        i1, i2 = self.get_bounds(node)
+        if isinstance(i1, list):
+            return array(i1, dtype=int), len(i1)
+        return slice(i1, i2), i2-i1
+
+    def _get_matvec_plan(self):
+        """ Compiles the bookkeeping needed by matvecFWD and matvecREV into
+        per-component index objects and preallocated buffers so that each
+        matrix vector product is just a handful of array operations plus the
+        calls to applyJ/applyJT. The plan lives until the configuration or
+        the derivative graph changes."""
+
+        if self._matvec_plan is not None:
+            return self._matvec_plan
 
+        dgraph = self._derivative_graph
         comps = self._comp_edge_list()
 
-        if '@fake' in comps:
-            del comps['@fake']
-        result = zeros(len(arg))
-
-        # We can call applyJ on each component one-at-a-time, and poke the
-        # results into the result vector.
+        fwd = []
+        rev = []
         for compname, data in comps.iteritems():
+            if compname == '@fake':
+                continue
 
             comp_inputs = data['inputs']
             comp_outputs = data['outputs']
             comp_residuals = data['residuals']
 
-            inputs = {}
-            outputs = {}
-            out_bounds = []
+            if '~' in compname:
+                comp = dgraph.node[compname]['pa_object']
+            else:
+                comp = self.scope.get(compname)
 
+            # Forward: gather inputs and outputs, scatter outputs.
+            gather = []
+            zero = []
+            scatter = []
             for varname in comp_inputs:
-                node = '%s.%s' % (compname, varname)
-                i1, i2 = self.get_bounds(node)
+                idx, width = self._index('%s.%s' % (compname, varname))
+                gather.append((varname, idx, zeros(width), None))
 
-                if isinstance(i1, list):
-                    inputs[varname] = arg[i1].copy()
+            for varname in comp_outputs:
+                idx, width = self._index('%s.%s' % (compname, varname))
+                scatter.append((varname, idx))
+                if varname in comp_residuals:
+                    zero.append((varname, zeros(width)))
                 else:
-                    inputs[varname] = arg[i1:i2].copy()
+                    gather.append((varname, idx, zeros(width), zeros(width)))
 
+            fwd.append((compname, comp, comp_residuals, gather, zero,
+                        scatter))
+
+            # Reverse: gather outputs, accumulate into inputs and outputs.
+            gather = []
+            zero = []
             for varname in comp_outputs:
                 node = '%s.%s' % (compname, varname)
-                i1, i2 = self.get_bounds(node)
-                out_bounds.append((varname, i1, i2))
 
-                if isinstance(i1, list):
-                    if varname in comp_residuals:
-                        outputs[varname] = zeros((1, 1))
-                    else:
-                        inputs[varname] = arg[i1].copy()
-                        outputs[varname] = arg[i1].copy()
-                else:
-                    if varname in comp_residuals:
-                        outputs[varname] = zeros((i2-i1))
-                    else:
-                        inputs[varname] = arg[i1:i2].copy()
-                        outputs[varname] = arg[i1:i2].copy()
+                # Ouputs define unique edges, so don't duplicate anything
+                if is_subvar_node(dgraph, node):
+                    if dgraph.base_var(node).split('.', 1)[1] in comp_outputs:
+                        continue
 
-            if '~' in compname:
-                comp = self._derivative_graph.node[compname]['pa_object']
-            else:
-                comp = self.scope.get(compname)
+                idx, width = self._index(node)
+                gather.append((varname, idx, zeros(width), None))
+                if varname not in comp_residuals:
+                    zero.append((varname, idx, zeros(width)))
+
+            for varname in comp_inputs:
+                idx, width = self._index('%s.%s' % (compname, varname))
+                zero.append((varname, idx, zeros(width)))
+
+            rev.append((compname, comp, comp_residuals, gather, zero,
+                        hasattr(comp, 'applyMinvT')))
+
+        # Each parameter adds an equation
+        fwd_params = []
+        rev_params = []
+        for src, targets in self._edges.iteritems():
+            if '@in' in src or '@fake' in src:
+                if not isinstance(targets, list):
+                    targets = [targets]
+
+                for target in targets:
+                    fwd_params.append(self._index(target)[0])
+                rev_params.append(self._index(targets[0])[0])
+
+            # A fake output needs to make it into the result vector to prevent
+            # the solution from blowing up. Its derivative will be zero
+            # regardless.
+            if isinstance(targets, list):
+                targets = targets[0]
+            if '@fake' in targets:
+                rev_params.append(self._index(src)[0])
+
+        self._matvec_plan = (fwd, fwd_params, rev, rev_params)
+        return self._matvec_plan
+
+    def matvecFWD(self, arg):
+        '''Callback function for performing the matrix vector product of the
+        workflow's full Jacobian with an incoming vector arg.'''
+
+        fwd, fwd_params, _, _ = self._get_matvec_plan()
+        result = zeros(len(arg))
+
+        # We can call applyJ on each component one-at-a-time, and poke the
+        # results into the result vector.
+        for compname, comp, comp_residuals, gather, zero, scatter in fwd:
+
+            inputs = {}
+            outputs = {}
+
+            for varname, idx, ibuf, obuf in gather:
+                ibuf[:] = arg[idx]
+                inputs[varname] = ibuf
+                if obuf is not None:
+                    obuf[:] = ibuf
+                    outputs[varname] = obuf
+
+            for varname, obuf in zero:
+                obuf[:] = 0.0
+                outputs[varname] = obuf
 
             # Preconditioning
             # Currently not implemented in forward mode, mostly because this
@@ -520,24 +616,12 @@ class SequentialWorkflow(Workflow):
                    self._shape_cache.get(compname), self._J_cache.get(compname))
             #print inputs, outputs
 
-            for varname, i1, i2 in out_bounds:
-                if isinstance(i1, list):
-                    result[i1] = outputs[varname].copy()
-                else:
-                    result[i1:i2] = outputs[varname].copy()
+            for varname, idx in scatter:
+                result[idx] = outputs[varname]
 
         # Each parameter adds an equation
-        for src, targets in self._edges.iteritems():
-            if '@in' in src or '@fake' in src:
-                if not isinstance(targets, list):
-                    targets = [targets]
-
-                for target in targets:
-                    i1, i2 = self.get_bounds(target)
-                    #if isinstance(i1, list):
-                    #    result[i1] = arg[i1]
-                    #else:
-                    result[i1:i2] = arg[i1:i2]
+        for idx in fwd_params:
+            result[idx] = arg[idx]
 
         #print arg, result
         return result
@@ -546,92 +630,205 @@ class SequentialWorkflow(Workflow):
         '''Callback function for performing the matrix vector product of the
         workflow's full Jacobian with an incoming vector arg.'''
 
-        dgraph = self._derivative_graph
-        comps = self._comp_edge_list()
+        _, _, rev, rev_params = self._get_matvec_plan()
         result = zeros(len(arg))
 
         # We can call applyJ on each component one-at-a-time, and poke the
         # results into the result vector.
-        for compname, data in comps.iteritems():
-            if compname == '@fake':
-                continue
-
-            comp_inputs = data['inputs']
-            comp_outputs = data['outputs']
-            comp_residuals = data['residuals']
+        for compname, comp, comp_residuals, gather, zero, precon in rev:
 
             inputs = {}
             outputs = {}
-            out_bounds = []
-
-            for varname in comp_outputs:
-                node = '%s.%s' % (compname, varname)
 
-                # Ouputs define unique edges, so don't duplicate anything
-                if is_subvar_node(dgraph, node):
-                    if dgraph.base_var(node).split('.', 1)[1] in comp_outputs:
-                        continue
-
-                i1, i2 = self.get_bounds(node)
-                if isinstance(i1, list):
-                    inputs[varname] = arg[i1].copy()
-                    if varname not in comp_residuals:
-                        outputs[varname] = zeros(len(i1))
-                        out_bounds.append((varname, i1, i2))
-                else:
-                    inputs[varname] = arg[i1:i2].copy()
-                    if varname not in comp_residuals:
-                        outputs[varname] = zeros(i2-i1)
-                        out_bounds.append((varname, i1, i2))
-
-            for varname in comp_inputs:
-                node = '%s.%s' % (compname, varname)
-
-                i1, i2 = self.get_bounds(node)
-                if isinstance(i1, list):
-                    outputs[varname] = zeros(len(i1))
-                else:
-                    outputs[varname] = zeros(i2-i1)
-                out_bounds.append((varname, i1, i2))
+            for varname, idx, ibuf, _ in gather:
+                ibuf[:] = arg[idx]
+                inputs[varname] = ibuf
 
-            if '~' in compname:
-                comp = self._derivative_graph.node[compname]['pa_object']
-            else:
-                comp = self.scope.get(compname)
+            for varname, idx, obuf in zero:
+                obuf[:] = 0.0
+                outputs[varname] = obuf
 
             # Preconditioning
-            if hasattr(comp, 'applyMinvT'):
+            if precon:
                 inputs = applyMinvT(comp, inputs, self._shape_cache)
 
             applyJT(comp, inputs, outputs, comp_residuals,
                     self._shape_cache, self._J_cache.get(compname))
             #print inputs, outputs
 
-            for varname, i1, i2 in out_bounds:
-                if isinstance(i1, list):
-                    result[i1] += outputs[varname]
-                else:
-                    result[i1:i2] += outputs[varname]
+            for varname, idx, _ in zero:
+                result[idx] += outputs[varname]
 
         # Each parameter adds an equation
-        for src, target in self._edges.iteritems():
-            if '@in' in src or '@fake' in src:
-                if isinstance(target, list):
-                    target = target[0]
-
-                i1, i2 = self.get_bounds(target)
-                result[i1:i2] += arg[i1:i2]
-
-            # A fake output needs to make it into the result vector to prevent
-            # the solution from blowing up. Its derivative will be zero
-            # regardless.
-            if '@fake' in target:
-                i1, i2 = self.get_bounds(src)
-                result[i1:i2] += arg[i1:i2]
+        for idx in rev_params:
+            result[idx] += arg[idx]
 
         #print arg, result
         return result
 
+    def assemble_jacobian(self):
+        """ Returns the operator applied by matvecFWD as a scipy.sparse CSR
+        matrix. Cached component Jacobians (dense or sparse) are inserted
+        block by block. Components that only provide apply_deriv, have
+        residuals, or are connected through array slices are probed
+        locally, one column per entry they read from the residual vector.
+        Must be called after calc_derivatives.
+        """
+
+        fwd, fwd_params, _, _ = self._get_matvec_plan()
+        n_edge = self.res.shape[0]
+
+        # Later writes to a row replace earlier ones, just like the
+        # assignments in matvecFWD, so remember who wrote each row last.
+        owner = -ones(n_edge, dtype=int)
+        blocks = []
+
+        for k, (compname, comp, comp_residuals, gather, zero,
+                scatter) in enumerate(fwd):
+
+            J = self._J_cache.get(compname)
+            names = [item[0] for item in gather] + [item[0] for item in scatter]
+
+            if J is not None and not comp_residuals and \
+               not any('[' in name for name in names):
+                rows, cols, vals = self._jacobian_blocks(comp, J, gather,
+                                                         scatter, owner, k)
+            else:
+                rows, cols, vals = self._probe_jacobian(compname, comp,
+                                                        comp_residuals, gather,
+                                                        zero, scatter, owner, k)
+            blocks.append((k, rows, cols, vals))
+
+        # Each parameter adds an equation
+        k = len(fwd)
+        for idx in fwd_params:
+            rows = _as_indices(idx)
+            owner[rows] = k
+            blocks.append((k, rows, rows, ones(len(rows))))
+
+        all_rows = []
+        all_cols = []
+        all_vals = []
+        for k, rows, cols, vals in blocks:
+            keep = owner[rows] == k
+            all_rows.append(rows[keep])
+            all_cols.append(cols[keep])
+            all_vals.append(vals[keep])
+
+        if not blocks:
+            return coo_matrix((n_edge, n_edge)).tocsr()
+
+        return coo_matrix((concatenate(all_vals),
+                           (concatenate(all_rows), concatenate(all_cols))),
+                          shape=(n_edge, n_edge)).tocsr()
+
+    def _claim_rows(self, rows, owner, k):
+        """ Marks `rows` as written by component `k` and returns a mask of the
+        ones that it had not already written through another variable."""
+        fresh = owner[rows] != k
+        owner[rows] = k
+        return fresh
+
+    def _jacobian_blocks(self, comp, J, gather, scatter, owner, k):
+        """ Returns COO triplets for a component whose Jacobian is cached,
+        mirroring what applyJ does with it."""
+
+        input_keys, output_keys = list_deriv_vars(comp)
+        if comp._provideJ_bounds is None:
+            comp._provideJ_bounds = get_bounds(comp, input_keys, output_keys, J)
+        ibounds, obounds = comp._provideJ_bounds
+
+        outnames = set([varname for varname, _ in scatter])
+
+        rows = []
+        cols = []
+        vals = []
+        for okey, oidx in scatter:
+            orows = _as_indices(oidx)
+            fresh = self._claim_rows(orows, owner, k)
+            if not fresh.any():
+                continue
+            o1, o2, _ = obounds[okey]
+
+            # Explicit outputs form a fake residual.
+            rows.append(orows[fresh])
+            cols.append(orows[fresh])
+            vals.append(-ones(fresh.sum()))
+
+            used = set()
+            for ikey, iidx, _, _ in gather:
+                if ikey in outnames:
+                    continue
+                i1, i2, _ = ibounds[ikey]
+                if (i1, i2) in used:
+                    continue
+                used.add((i1, i2))
+
+                Jsub = J[o1:o2, i1:i2]
+                if issparse(Jsub):
+                    Jsub = Jsub.tocoo()
+                    r, c, v = Jsub.row, Jsub.col, Jsub.data
+                else:
+                    r, c = Jsub.nonzero()
+                    v = Jsub[r, c]
+                keep = fresh[r]
+                rows.append(orows[r[keep]])
+                cols.append(_as_indices(iidx)[c[keep]])
+                vals.append(v[keep])
+
+        if not rows:
+            return array([], dtype=int), array([], dtype=int), zeros(0)
+        return concatenate(rows), concatenate(cols), concatenate(vals)
+
+    def _probe_jacobian(self, compname, comp, comp_residuals, gather, zero,
+                        scatter, owner, k):
+        """ Returns COO triplets for a component by calling applyJ once for
+        each residual vector entry that it reads."""
+
+        gather_idx = [_as_indices(idx) for _, idx, _, _ in gather]
+        if gather_idx:
+            probe_cols = unique(concatenate(gather_idx))
+        else:
+            probe_cols = []
+
+        scatter_idx = []
+        for varname, idx in scatter:
+            orows = _as_indices(idx)
+            scatter_idx.append((varname, orows,
+                                self._claim_rows(orows, owner, k)))
+
+        rows = []
+        cols = []
+        vals = []
+        for icol in probe_cols:
+            inputs = {}
+            outputs = {}
+
+            for (varname, _, ibuf, obuf), ind in zip(gather, gather_idx):
+                ibuf[:] = (ind == icol)
+                inputs[varname] = ibuf
+                if obuf is not None:
+                    obuf[:] = ibuf
+                    outputs[varname] = obuf
+
+            for varname, obuf in zero:
+                obuf[:] = 0.0
+                outputs[varname] = obuf
+
+            applyJ(comp, inputs, outputs, comp_residuals,
+                   self._shape_cache.get(compname), self._J_cache.get(compname))
+
+            for varname, orows, fresh in scatter_idx:
+                value = outputs[varname].flatten()
+                nonzero = (value != 0.0) & fresh
+                rows.append(orows[nonzero])
+                cols.append(icol*ones(nonzero.sum(), dtype=int))
+                vals.append(value[nonzero])
+
+        if not rows:
+            return array([], dtype=int), array([], dtype=int), zeros(0)
+        return concatenate(rows), concatenate(cols), concatenate(vals)
+
     def derivative_graph(self, inputs=None, outputs=None, fd=False,
                          severed=None, group_nondif=True):
         """Returns the local graph that we use for derivatives.
@@ -775,12 +972,7 @@ class SequentialWorkflow(Workflow):
             for name in comps:
                 if name.startswith('~') or name in pa_excludes:
                     continue  # don't want nested pseudoassemblies
-                comp = self.scope.get(name)
-                if not hasattr(comp, 'apply_deriv') and \
-                   not hasattr(comp, 'apply_derivT') and \
-                   not hasattr(comp, 'provideJ'):
-                    nondiff.add(name)
-                elif comp.force_fd is True:
+                if not self._is_differentiable(name):
                     nondiff.add(name)
                 elif not dgraph.node[name].get('differentiable', True):
                     nondiff.add(name)
@@ -804,7 +996,7 @@ class SequentialWorkflow(Workflow):
                     continue
 
                 # differentiable connections
-                if is_differentiable_val(self.scope.get(src)):
+                if self._is_differentiable(src):
                     continue
 
                 #Nothing else is differentiable
@@ -841,6 +1033,71 @@ class SequentialWorkflow(Workflow):
             pseudo.add_to_graph(self.scope._depgraph, dgraph)
             pseudo.clean_graph(self.scope._depgraph, dgraph)
 
+    def _is_differentiable(self, name):
+        """Return True if the named component provides derivatives, or if
+        the named variable has a differentiable value. The answers only
+        change with the configuration, so they are shared by all of the
+        derivative graphs built until then.
+        """
+        diff = self._nondiff_cache.get(name)
+        if diff is None:
+            obj = self.scope.get(name)
+            if '.' in name:
+                diff = is_differentiable_val(obj)
+            else:
+                diff = (hasattr(obj, 'apply_deriv') or
+                        hasattr(obj, 'apply_derivT') or
+                        hasattr(obj, 'provideJ')) and obj.force_fd is not True
+            self._nondiff_cache[name] = diff
+        return diff
+
+    def _select_derivative_graph(self, inputs, outputs, fd):
+        """Make the derivative graph for the given inputs and outputs the
+        current one, along with everything built from it. Graphs for other
+        sets of inputs and outputs are kept until the configuration of the
+        scope changes, so a driver that alternates between gradient requests
+        doesn't rebuild them each time.
+        """
+        count = self.scope._depgraph._config_count
+        if count != self._derivative_count:
+            self._derivative_cache = {}
+            self._nondiff_cache = {}
+            self._derivative_key = None
+            self._derivative_count = count
+
+        # The finite difference settings are read when the pseudo-assemblies
+        # of a graph are first differenced, and the Jacobians cached with the
+        # graph were taken with them, so all graphs are dropped if they
+        # change.
+        fd_options = self._fd_options()
+        if fd_options != self._fd_options_key:
+            self._derivative_cache = {}
+            self._derivative_key = None
+            self._fd_options_key = fd_options
+
+        key = (_frozen_names(inputs), _frozen_names(outputs), fd)
+        if key == self._derivative_key:
+            return
+
+        if self._derivative_key is not None:
+            self._derivative_cache[self._derivative_key] = \
+                [getattr(self, name) for name in self._derivative_attrs]
+
+        state = self._derivative_cache.pop(key, None)
+        if state is None:
+            state = [None, None, None, None, None, {}, {}, {}, {}]
+        for name, value in zip(self._derivative_attrs, state):
+            setattr(self, name, value)
+
+        self._derivative_key = key
+
+    def _fd_options(self):
+        """Return a tuple of the parent driver's finite difference settings."""
+        options = self._parent.gradient_options
+        return tuple([getattr(options, name) for name in
+                      ('fd_form', 'fd_step', 'fd_step_type', 'fd_workers',
+                       'fd_coloring', 'fd_coloring_check')])
+
     def edge_list(self):
         """ Return the list of edges for the derivatives of this workflow. """
 
@@ -936,18 +1193,58 @@ class SequentialWorkflow(Workflow):
             else:
                 comp = self.scope.get(compname)
 
+            # Reuse the last Jacobian if the component is still at the
+            # point it was linearized about.
             J = self._J_cache.get(compname)
+            if J is not None:
+                key = self._J_keys.get(compname)
+                if key is None or key != \
+                   self._linearization_key(compname, comp, data['inputs']):
+                    J = None
+
             if compname not in self._shape_cache:
                 self._shape_cache[compname] = {}
             if J is None:
                 J = comp.calc_derivatives(first, second, savebase,
                                           data['inputs'], data['outputs'])
                 if J is not None:
+                    # Sparse Jacobians are sliced by row and column.
+                    if issparse(J):
+                        J = J.tocsr()
                     self._J_cache[compname] = J
+                    self._J_keys[compname] = \
+                        self._linearization_key(compname, comp, data['inputs'])
 
             if self._stop:
                 raise RunStopped('Stop requested')
 
+    def _linearization_key(self, compname, comp, inputs):
+        """Return a key for the point that the given component (or
+        PseudoAssembly) is linearized about. It holds the execution counts
+        of the components involved and the values of the inputs that the
+        Jacobian is taken with respect to. Returns None if an input can't
+        be flattened, in which case the Jacobian is never reused.
+        """
+        if isinstance(comp, PseudoAssembly):
+            names = list(comp.comps) + list(comp.itercomps)
+            paths = flatten_list_of_iters(comp.inputs)
+        else:
+            names = [compname]
+            paths = ['.'.join((compname, name)) for name in inputs]
+
+        # Finite difference runs happen before the key is stored, so they
+        # don't count as a change of point.
+        key = [getattr(self.scope.get(name), 'exec_count', None)
+               for name in names]
+        for path in paths:
+            try:
+                val = flattened_value(path, self.scope.get(path))
+            except TypeError:
+                return None
+            key.append(val.tostring())
+
+        return tuple(key)
+
     def calc_gradient(self, inputs=None, outputs=None, upscope=False, mode='auto'):
         """Returns the gradient of the passed outputs with respect to
         all passed inputs.
@@ -975,8 +1272,6 @@ class SequentialWorkflow(Workflow):
             correct mode.
         """
 
-        self._J_cache = {}
-
         # User may request full-model finite difference.
         if self._parent.gradient_options.force_fd == True:
             mode = 'fd'
@@ -988,9 +1283,17 @@ class SequentialWorkflow(Workflow):
             self._derivative_graph = None
             self._edges = None
             self._comp_edges = None
+            self._matvec_plan = None
+            self._J_cache = {}
+            self._J_keys = {}
+            self._derivative_key = None
+            self._derivative_cache = {}
 
             self._upscoped = upscope
 
+        else:
+            self._select_derivative_graph(inputs, outputs, mode == 'fd')
+
         dgraph = self.derivative_graph(inputs, outputs, fd=(mode == 'fd'))
 
         if 'mapped_inputs' in dgraph.graph:
@@ -1278,6 +1581,21 @@ class SequentialWorkflow(Workflow):
         # return arrays and suspects to make it easier to check from a test
         return Jbase.flatten(), J.flatten(), io_pairs, suspects
 
+def _frozen_names(names):
+    """ Return a hashable version of a list of variable names and groups of
+    names, or None."""
+    if names is None:
+        return None
+    return tuple([tuple(name) if isinstance(name, list) else name
+                  for name in names])
+
+def _as_indices(idx):
+    """ Return the residual vector entries picked by `idx` (a slice or an
+    integer array) as an integer array."""
+    if isinstance(idx, slice):
+        return arange(idx.start, idx.stop)
+    return idx
+
 def _flattened_names(name, val, names=None):
     """ Return list of names for values in `val`.
     Note that this expands arrays into an entry for each index!.
@@ -1,8 +1,10 @@
 import unittest
 import copy
+import cPickle
 import array
 
-from openmdao.main.api import Component, Assembly, Case, set_as_top
+from openmdao.main.api import Component, Assembly, Case, CaseSchema, \
+                              CompactCase, set_as_top
 from openmdao.main.datatypes.api import Int, List
 from openmdao.main.numpy_fallback import array as nparray
 
@@ -29,6 +31,17 @@ class Simple(Component):
         self.d = self.a - self.b
         self.c_lst = [x*2 for x in self.a_lst]
 
+def _count_invalidations(top):
+    """ Return a list that gets the names passed to each invalidate_deps()
+    of `top`'s dependency graph. """
+    calls = []
+    invalidate = top._depgraph.invalidate_deps
+    def counting_invalidate(scope, vnames):
+        calls.append(vnames)
+        return invalidate(scope, vnames)
+    top._depgraph.invalidate_deps = counting_invalidate
+    return calls
+
 class CaseTestCase(unittest.TestCase):
 
     def setUp(self):
@@ -55,6 +68,17 @@ class CaseTestCase(unittest.TestCase):
         self.assertEqual(subcase['comp1.b'], 4)
         self.assertEqual(len(subcase.get_outputs()),1)
         self.assertEqual(subcase.get_outputs()[0][0], 'comp2.d')
+
+    def test_apply_inputs_invalidates_once(self):
+        self.assertEqual(self.top.get_valid(['comp1.c', 'comp2.d']),
+                         [True, True])
+        calls = _count_invalidations(self.top)
+        case = Case(inputs=[('comp1.a', 3), ('comp1.b', 5),
+                            ('comp1.a_lst', [7, 8, 9])])
+        case.apply_inputs(self.top)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.top.get_valid(['comp1.c', 'comp2.d']),
+                         [False, False])
         
     def test_case_access(self):
         self.assertEqual(self.case['comp1.a'], 2)
@@ -175,6 +199,102 @@ class CaseTestCase(unittest.TestCase):
                                                              ('comp1.vt.v2',2.)
                                                              ]))
 
+class CompactCaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.top = set_as_top(Assembly())
+        self.top.add('comp1', Simple())
+        self.top.add('comp2', Simple())
+        self.top.connect('comp1.c', 'comp2.a')
+        self.top.connect('comp1.d', 'comp2.b')
+        self.top.connect('comp1.c_lst', 'comp2.a_lst')
+        self.top.driver.workflow.add(['comp1','comp2'])
+
+        self.schema = CaseSchema(['comp1.a', 'comp1.b', 'comp1.a_lst'],
+                                 ['comp2.c+comp2.d', 'comp2.c_lst[2]',
+                                  'comp2.d'])
+        self.case = case = CompactCase(self.schema, label='blah blah')
+        case.add_inputs([('comp1.a',2),('comp1.b',4),('comp1.a_lst', [4,5,6])])
+        case.apply_inputs(self.top)
+        self.top.run()
+        case.update_outputs(self.top)
+
+    def test_case_access(self):
+        self.assertEqual(self.case['comp1.a'], 2)
+        self.assertEqual(self.case['comp2.c+comp2.d'], 12)
+        self.assertEqual(self.case['comp2.c_lst[2]'], 24)
+        self.assertEqual(self.case.keys(iotype='out'),
+                         ['comp2.c+comp2.d', 'comp2.c_lst[2]', 'comp2.d'])
+        self.assertEqual(len(self.case), 6)
+        self.assertTrue('comp1.b' in self.case)
+        self.assertFalse('comp1.c' in self.case)
+        try:
+            self.case['comp1.c']
+        except KeyError as err:
+            self.assertEqual(str(err), '"\'comp1.c\' not found"')
+        else:
+            self.fail('KeyError expected')
+
+    def test_same_as_case(self):
+        case = Case(inputs=[('comp1.a',2),('comp1.b',4),
+                            ('comp1.a_lst', [4,5,6])],
+                    outputs=['comp2.c+comp2.d', 'comp2.c_lst[2]', 'comp2.d'],
+                    label='blah blah')
+        case.apply_inputs(self.top)
+        self.top.run()
+        case.update_outputs(self.top)
+        self.assertEqual(case, self.case)
+        self.assertEqual(self.case, case)
+        self.assertEqual(sorted(case.items(flatten=True)),
+                         sorted(self.case.items(flatten=True)))
+        self.assertEqual(str(case).split('\n')[3:],
+                         str(self.case).split('\n')[3:])
+
+    def test_shared_schema(self):
+        # cases extended the same way still share a schema
+        case1 = CompactCase(self.schema, [1., 2., [], 0., 0., 0.])
+        case2 = CompactCase(self.schema, [3., 4., [], 0., 0., 0.])
+        case1.add_output('comp1.c', 5.)
+        case2.add_output('comp1.c', 6.)
+        self.assertTrue(case1.schema is case2.schema)
+        self.assertEqual(case2.get_values(['comp1.c', 'comp1.a']), [6., 3.])
+
+        # all float values are packed into a buffer of doubles
+        case = CompactCase(self.schema, [1., 2., 3., 4., 5., 6.])
+        self.assertTrue(isinstance(case._values, array.array))
+        case['comp1.a_lst'] = [1]
+        self.assertEqual(case['comp1.a_lst'], [1])
+        self.assertEqual(case['comp1.b'], 2.)
+
+        self.assertRaises(ValueError, CompactCase, self.schema, [1.])
+        self.assertRaises(ValueError, CaseSchema, ['x', 'x'])
+
+    def test_apply_inputs_invalidates_once(self):
+        calls = _count_invalidations(self.top)
+        case = CompactCase(self.schema)
+        case.add_inputs([('comp1.a', 3), ('comp1.b', 5),
+                         ('comp1.a_lst', [7, 8, 9])])
+        case.apply_inputs(self.top)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.top.get_valid(['comp1.c', 'comp2.d']),
+                         [False, False])
+
+    def test_subcase(self):
+        subcase = self.case.subcase(['comp1.b', 'comp2.d'])
+        self.assertEqual(self.case.timestamp, subcase.timestamp)
+        self.assertEqual(subcase.items(), [('comp1.b', 4), ('comp2.d', 8)])
+        self.assertTrue(subcase.schema is
+                        self.case.subcase(['comp2.d', 'comp1.b']).schema)
+
+    def test_pickle(self):
+        uuid = self.case.uuid
+        for case in (copy.deepcopy(self.case),
+                     cPickle.loads(cPickle.dumps(self.case)),
+                     cPickle.loads(cPickle.dumps(self.case, -1))):
+            self.assertEqual(case, self.case)
+            self.assertEqual(case.uuid, uuid)
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -224,6 +224,28 @@ class VariableTestCase(unittest.TestCase):
         self.assertEqual(12.0,self.top.oneinp.no_unit)
         self.assertEqual(12.0,self.top.oneinp.unit)
 
+    def test_transfer_plan(self):
+        # Plain, indexed and boundary connections, before and after a
+        # change in configuration.
+        self.top.add('x', Float(5.0, iotype='in'))
+        self.top.connect('x', 'oneinp.no_unit')
+        self.top.connect('oneout.ratio1', 'oneinp.ratio1')
+        self.top.connect('oneout.arrout[2]', 'oneinp.arrinp[0]')
+        self.top.run()
+        self.assertEqual(5.0, self.top.oneinp.no_unit)
+        self.assertEqual(3.54, self.top.oneinp.ratio1)
+        self.assertEqual(3.0, self.top.oneinp.arrinp[0])
+
+        self.top.x = 7.0
+        self.top.run()
+        self.assertEqual(7.0, self.top.oneinp.no_unit)
+
+        self.top.replace('oneinp', Oneinp())
+        self.top.run()
+        self.assertEqual(7.0, self.top.oneinp.no_unit)
+        self.assertEqual(3.54, self.top.oneinp.ratio1)
+        self.assertEqual(3.0, self.top.oneinp.arrinp[0])
+
     def _parse_list(self, liststr):
         liststr = liststr[1:len(liststr)-2]
         return set([s.strip("'") for s in liststr.split(', ') if s.strip()])
@@ -539,6 +539,24 @@ class DepGraphTestCase(unittest.TestCase):
         else:
             self.fail("Exception expected")
 
+    def test_invalidate_after_disconnect(self):
+        dep, scope = _make_graph(comps=['A','B'],
+                                 connections=[('A.out1','B.in1')],
+                                 inputs=['in1','in2'],
+                                 outputs=['out1','out2'])
+
+        _set_all_valid(dep)
+        dep.invalidate_deps(scope, ['A.out1'])
+        self.assertEqual(set(['A.out1','B.in1','B','B.out1','B.out2']),
+                         set(nodes_matching_all(dep, valid=False)))
+
+        # the downstream closure of A.out1 must not outlive the connection
+        dep.disconnect('A.out1', 'B.in1')
+        _set_all_valid(dep)
+        dep.invalidate_deps(scope, ['A.out1'])
+        self.assertEqual(set(['A.out1']),
+                         set(nodes_matching_all(dep, valid=False)))
+
     def test_invalidate_input_as_output(self):
         dep, scope = _make_graph(comps=['A','B'],
                                  connections=[('A.in1','B.in1')],
@@ -13,6 +13,8 @@ try:
 except ImportError as err:
     from openmdao.main.numpy_fallback import zeros, array, identity, random
 
+from scipy.sparse import csr_matrix
+
 import openmdao.main.derivatives
 from openmdao.main.api import Component, VariableTree, Driver, Assembly, set_as_top
 from openmdao.main.datatypes.api import Array, Float, VarTree, Int
@@ -1329,6 +1331,84 @@ Max RelError: [^ ]+ for comp.f_xy / comp.x
         assert_rel_error(self, J[3, 0], 4.0, .001)
         assert_rel_error(self, J[4, 0], 5.0, .001)
 
+    def test_lin_solvers(self):
+
+        self.top = set_as_top(Assembly())
+
+        exp1 = ['y1 = 2.0*x1 + 3.0*x2',
+                'y2 = 4.0*x1*x2']
+        deriv1 = ['dy1_dx1 = 2.0',
+                  'dy1_dx2 = 3.0',
+                  'dy2_dx1 = 4.0*x2',
+                  'dy2_dx2 = 4.0*x1']
+        exp2 = ['y1 = 0.5*x1 - x2']
+        deriv2 = ['dy1_dx1 = 0.5',
+                  'dy1_dx2 = -1.0']
+
+        self.top.add('comp1', ExecCompWithDerivatives(exp1, deriv1))
+        self.top.add('comp2', ExecCompWithDerivatives(exp2, deriv2))
+        self.top.driver.workflow.add(['comp1', 'comp2'])
+        self.top.connect('comp1.y1', 'comp2.x1')
+        self.top.connect('comp1.y2', 'comp2.x2')
+
+        self.top.comp1.x1 = 3.0
+        self.top.comp1.x2 = 5.0
+        self.top.run()
+
+        inputs = ['comp1.x1', 'comp1.x2']
+        outputs = ['comp2.y1', 'comp1.y2']
+        for solver in ['scipy_gmres', 'recycled_gmres', 'direct']:
+            self.top.driver.gradient_options.lin_solver = solver
+            for mode in ['forward', 'adjoint']:
+                J = self.top.driver.workflow.calc_gradient(inputs, outputs,
+                                                           mode=mode)
+
+                assert_rel_error(self, J[0, 0], 1.0 - 20.0, .001)
+                assert_rel_error(self, J[0, 1], 1.5 - 12.0, .001)
+                assert_rel_error(self, J[1, 0], 20.0, .001)
+                assert_rel_error(self, J[1, 1], 12.0, .001)
+
+    def test_derivative_graph_cache(self):
+
+        self.top = set_as_top(Assembly())
+
+        exp1 = ['y1 = 2.0*x1']
+        deriv1 = ['dy1_dx1 = 2.0']
+        exp2 = ['y1 = 3.0*x1']
+        deriv2 = ['dy1_dx1 = 3.0']
+
+        self.top.add('comp1', ExecCompWithDerivatives(exp1, deriv1))
+        self.top.add('comp2', ExecCompWithDerivatives(exp2, deriv2))
+        self.top.driver.workflow.add(['comp1', 'comp2'])
+        self.top.connect('comp1.y1', 'comp2.x1')
+        self.top.run()
+
+        wflow = self.top.driver.workflow
+        J = wflow.calc_gradient(['comp1.x1'], ['comp2.y1'])
+        assert_rel_error(self, J[0, 0], 6.0, .001)
+        graph1 = wflow._derivative_graph
+
+        J = wflow.calc_gradient(['comp2.x1'], ['comp2.y1'])
+        assert_rel_error(self, J[0, 0], 3.0, .001)
+        graph2 = wflow._derivative_graph
+        self.assertTrue(graph2 is not graph1)
+
+        # Alternating between the two doesn't rebuild either graph.
+        J = wflow.calc_gradient(['comp1.x1'], ['comp2.y1'])
+        assert_rel_error(self, J[0, 0], 6.0, .001)
+        self.assertTrue(wflow._derivative_graph is graph1)
+
+        J = wflow.calc_gradient(['comp2.x1'], ['comp2.y1'])
+        assert_rel_error(self, J[0, 0], 3.0, .001)
+        self.assertTrue(wflow._derivative_graph is graph2)
+
+        # A change in configuration does.
+        self.top.disconnect('comp1.y1', 'comp2.x1')
+        self.top.run()
+        J = wflow.calc_gradient(['comp2.x1'], ['comp2.y1'])
+        assert_rel_error(self, J[0, 0], 3.0, .001)
+        self.assertTrue(wflow._derivative_graph is not graph2)
+
     def test_one_array_comp_fd(self):
 
         top = set_as_top(Assembly())
@@ -2815,6 +2895,15 @@ class Comp2(Component):
         output_keys = ('y1', 'y2')
         return input_keys, output_keys
 
+class Comp2_sparse(Comp2):
+    """ two-input, two-output with a sparse Jacobian"""
+
+    def provideJ(self):
+        """Analytical first derivatives"""
+
+        self.J = csr_matrix(array([[3.0, 0.0], [7.0, 11.0]]))
+        return self.J
+
 class Comp2_array(Component):
     """ two-input, two-output"""
 
@@ -3035,6 +3124,73 @@ class Testcase_applyJT(unittest.TestCase):
         diff = J.T - Jt
         self.assertEqual(diff.max(), 0.0)
 
+    def test_matvec_plan(self):
+
+        top = set_as_top(Assembly())
+        top.add('comp1', Comp2())
+        top.add('comp2', Comp2())
+        top.connect('comp1.y1', 'comp2.x1')
+
+        top.driver.workflow.add(['comp1', 'comp2'])
+
+        src = ['comp1.x1', 'comp1.x2']
+        resp = ['comp2.y1', 'comp2.y2']
+        J1 = top.driver.workflow.calc_gradient(src, resp, mode='forward')
+
+        plan = top.driver.workflow._matvec_plan
+        self.assertTrue(plan is not None)
+
+        # Repeated products reuse the plan and its buffers.
+        arg = zeros((5, ))
+        arg[0] = 1.0
+        r1 = top.driver.workflow.matvecFWD(arg)
+        r2 = top.driver.workflow.matvecFWD(arg)
+        self.assertTrue(top.driver.workflow._matvec_plan is plan)
+        self.assertEqual(abs(r1 - r2).max(), 0.0)
+
+        top.driver.workflow.config_changed()
+        self.assertEqual(top.driver.workflow._matvec_plan, None)
+
+        J2 = top.driver.workflow.calc_gradient(src, resp, mode='adjoint')
+        diff = J1 - J2
+        assert_rel_error(self, diff.max(), 0.0, 1e-8)
+
+
+    def test_sparse_jacobian(self):
+
+        top = set_as_top(Assembly())
+        top.add('comp1', Comp2_sparse())
+        top.add('comp2', Comp2())
+        top.add('comp3', Comp2_array())
+        top.connect('comp1.y1', 'comp2.x1')
+        top.connect('comp2.y2', 'comp3.x[0, 1]')
+
+        top.driver.workflow.add(['comp1', 'comp2', 'comp3'])
+        top.run()
+
+        src = ['comp1.x1', 'comp1.x2']
+        resp = ['comp2.y1', 'comp3.y']
+        J1 = top.driver.workflow.calc_gradient(src, resp, mode='forward')
+
+        # Assembled matrix matches the matrix-free operator.
+        wflow = top.driver.workflow
+        n_edge = wflow.res.shape[0]
+        A = wflow.assemble_jacobian().todense()
+        arg = zeros((n_edge, ))
+        for j in range(n_edge):
+            arg[j] = 1.0
+            col = wflow.matvecFWD(arg)
+            arg[j] = 0.0
+            self.assertAlmostEqual(abs(A[:, j].flatten() - col).max(), 0.0)
+
+        top.driver.gradient_options.sparse_jacobian = True
+        for solver in ['scipy_gmres', 'recycled_gmres', 'direct']:
+            top.driver.gradient_options.lin_solver = solver
+            for mode in ['forward', 'adjoint']:
+                J2 = wflow.calc_gradient(src, resp, mode=mode)
+                diff = abs(J1 - J2)
+                assert_rel_error(self, diff.max(), 0.0, 1e-8)
+
 
 class PreComp(Component):
     '''Comp with preconditioner'''
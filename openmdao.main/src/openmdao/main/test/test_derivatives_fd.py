@@ -2,12 +2,19 @@
 Specific unit testing for finite difference.
 """
 
+import glob
+import os
+import shutil
+import tempfile
+import time
 import unittest
 
 import numpy as np
 
-from openmdao.main.api import Component, VariableTree, Driver, Assembly, set_as_top
-from openmdao.main.datatypes.api import Float
+from openmdao.main.api import Component, VariableTree, Driver, Assembly, \
+                              set_as_top, SimulationRoot
+from openmdao.main.datatypes.api import Array, Float
+from openmdao.main.forkpool import fork_map
 from openmdao.main.test.test_derivatives import SimpleDriver
 from openmdao.test.execcomp import ExecCompWithDerivatives, ExecComp
 from openmdao.util.testutil import assert_rel_error
@@ -41,6 +48,26 @@ class MyComp(Component):
                  2.0*self.x5*self.x5 + 2.0*self.x6*self.x6 + \
                  2.0*self.x7*self.x7
 
+class MyFileComp(Component):
+
+    x1 = Float(1.0, iotype='in')
+    x2 = Float(1.0, iotype='in')
+    x3 = Float(1.0, iotype='in')
+    x4 = Float(1.0, iotype='in')
+
+    y = Float(0.0, iotype='out')
+
+    def execute(self):
+        ''' Passes the inputs through a file, like an external code '''
+
+        with open('inputs.dat', 'w') as out:
+            out.write('%r %r %r %r' % (self.x1, self.x2, self.x3, self.x4))
+        time.sleep(0.05)
+        with open('inputs.dat', 'r') as inp:
+            x1, x2, x3, x4 = [float(x) for x in inp.read().split()]
+        self.y = x1*x1 + 2.0*x2*x2 + 3.0*x3*x3 + 4.0*x4*x4
+
+
 class MyCompDerivs(Component):
 
     x1 = Float(1.0, iotype='in')
@@ -66,6 +93,52 @@ class MyCompDerivs(Component):
         return input_keys, output_keys
 
 
+class MyCompBanded(Component):
+
+    x = Array(np.ones(6), iotype='in')
+    y = Array(np.zeros(6), iotype='out')
+
+    def execute(self):
+        ''' Each output depends on two neighboring inputs '''
+
+        self.y = self.x**2
+        self.y[1:] += 3.0*self.x[:-1]
+
+
+class MyCompSwitched(Component):
+
+    x = Array(np.ones(6), iotype='in')
+    coupled = Float(0.0, iotype='in')
+    y = Array(np.zeros(6), iotype='out')
+
+    def execute(self):
+        ''' Neighboring inputs only matter once coupled is set '''
+
+        self.y = self.x**2
+        if self.coupled:
+            self.y[1:] += self.coupled*self.x[:-1]
+
+
+class MyCompProduct(Component):
+
+    x = Array(np.ones(6), iotype='in')
+    y = Array(np.zeros(6), iotype='out')
+
+    def execute(self):
+        ''' Products of neighboring inputs '''
+
+        self.y = self.x**2
+        self.y[1:] += self.x[:-1]*self.x[1:]
+
+
+class MyCompDeclared(MyCompBanded):
+
+    def provide_sparsity(self):
+        ''' Diagonal and subdiagonal '''
+
+        return {('y', 'x'): np.eye(6, dtype=bool) | np.eye(6, k=-1, dtype=bool)}
+
+
 class TestFiniteDifference(unittest.TestCase):
 
     def test_fd_step(self):
@@ -223,6 +296,224 @@ class TestFiniteDifference(unittest.TestCase):
         self.assertEqual(model.comp.exec_count - old_count, 2)
         self.assertEqual(model.comp.derivative_exec_count, 1)
 
+    def test_linearization_cache(self):
+
+        model = set_as_top(Assembly())
+        model.add('comp', MyCompDerivs())
+        model.add('fdcomp', MyComp())
+        model.driver.workflow.add(['comp', 'fdcomp'])
+        model.run()
+
+        inputs = ['comp.x1', 'comp.x2', 'fdcomp.x1']
+        outputs = ['comp.y', 'fdcomp.y']
+        J = model.driver.workflow.calc_gradient(inputs=inputs, outputs=outputs)
+        count = model.fdcomp.exec_count
+
+        # Same point, so nothing is linearized again.
+        J = model.driver.workflow.calc_gradient(inputs=inputs, outputs=outputs)
+        self.assertEqual(model.comp.derivative_exec_count, 1)
+        self.assertEqual(model.fdcomp.exec_count, count)
+
+        # Same point, but new finite difference settings.
+        model.driver.gradient_options.fd_step = 1.0e-5
+        J = model.driver.workflow.calc_gradient(inputs=inputs, outputs=outputs)
+        self.assertEqual(model.fdcomp.exec_count - count, 1)
+        model.driver.gradient_options.fd_form = 'central'
+        J = model.driver.workflow.calc_gradient(inputs=inputs, outputs=outputs)
+        self.assertEqual(model.fdcomp.exec_count - count, 3)
+        J = model.driver.workflow.calc_gradient(inputs=inputs, outputs=outputs)
+        self.assertEqual(model.fdcomp.exec_count - count, 3)
+        self.assertEqual(model.comp.derivative_exec_count, 3)
+        model.driver.gradient_options.fd_step = 1.0e-6
+        model.driver.gradient_options.fd_form = 'forward'
+
+        # New point.
+        model.comp.x1 = 2.0
+        model.fdcomp.x1 = 3.0
+        model.run()
+        count = model.fdcomp.exec_count
+        J = model.driver.workflow.calc_gradient(inputs=inputs, outputs=outputs)
+        self.assertEqual(model.comp.derivative_exec_count, 4)
+        self.assertEqual(model.fdcomp.exec_count - count, 1)
+        assert_rel_error(self, J[0, 0], 8.0, 0.0001)
+        assert_rel_error(self, J[1, 2], 12.0, 0.0001)
+
+        # Changing an input without running still counts as a new point.
+        model.comp.x1 = 3.0
+        J = model.driver.workflow.calc_gradient(inputs=inputs, outputs=outputs)
+        self.assertEqual(model.comp.derivative_exec_count, 5)
+
+    def test_fd_workers(self):
+
+        model = set_as_top(Assembly())
+        model.add('comp', MyComp())
+        model.driver.workflow.add(['comp'])
+        model.driver.gradient_options.fd_form = 'central'
+        model.run()
+
+        inputs = ['comp.x1', 'comp.x2', 'comp.x3', 'comp.x4']
+        J1 = model.driver.workflow.calc_gradient(inputs=inputs,
+                                                 outputs=['comp.y'])
+        count = model.comp.exec_count
+
+        model.driver.gradient_options.fd_workers = 2
+        model.driver.workflow.config_changed()
+        J2 = model.driver.workflow.calc_gradient(inputs=inputs,
+                                                 outputs=['comp.y'])
+
+        # Steps were taken in the workers, not here.
+        self.assertEqual(model.comp.exec_count, count)
+        for j in range(len(inputs)):
+            assert_rel_error(self, J2[0, j], J1[0, j], 0.0001)
+
+    def test_fd_workers_nested(self):
+
+        model = set_as_top(Assembly())
+        model.add('comp', MyComp())
+        model.driver.workflow.add(['comp'])
+        model.driver.gradient_options.fd_workers = 2
+        inputs = ['comp.x1', 'comp.x2', 'comp.x3', 'comp.x4']
+
+        def gradient(x1):
+            model.comp.x1 = x1
+            model.run()
+            count = model.comp.exec_count
+            J = model.driver.workflow.calc_gradient(inputs=inputs,
+                                                    outputs=['comp.y'])
+            return J, model.comp.exec_count - count
+
+        # Finite difference workers forked from within forked workers.
+        results = fork_map(gradient, [1.0, 2.0, 3.0], 2)
+        for x1, (J, runs) in zip([1.0, 2.0, 3.0], results):
+            assert_rel_error(self, J[0, 0], 4.0*x1, 0.0001)
+            self.assertEqual(runs, 0)
+
+    def test_fd_workers_files(self):
+
+        tmpdir = os.path.realpath(tempfile.mkdtemp())
+        orig_dir = os.getcwd()
+        SimulationRoot.chroot(tmpdir)
+        try:
+            model = set_as_top(Assembly())
+            model.add('comp', MyFileComp())
+            model.driver.workflow.add(['comp'])
+            model.driver.gradient_options.fd_workers = 4
+            model.run()
+
+            # Each worker writes its file in its own scratch directory.
+            inputs = ['comp.x1', 'comp.x2', 'comp.x3', 'comp.x4']
+            J = model.driver.workflow.calc_gradient(inputs=inputs,
+                                                    outputs=['comp.y'])
+            for j in range(len(inputs)):
+                assert_rel_error(self, J[0, j], 2.0*(j+1), 0.0001)
+            self.assertEqual(glob.glob(os.path.join(tmpdir, 'fd_worker_*')), [])
+        finally:
+            SimulationRoot.chroot(orig_dir)
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def test_fd_coloring(self):
+
+        model = set_as_top(Assembly())
+        model.add('comp', MyCompBanded())
+        model.driver.workflow.add(['comp'])
+        model.driver.gradient_options.fd_coloring = True
+        model.comp.x = np.arange(1.0, 7.0)
+        model.run()
+
+        J1 = model.driver.workflow.calc_gradient(inputs=['comp.x'],
+                                                 outputs=['comp.y'])
+        x1 = model.comp.x.copy()
+
+        model.comp.x = np.arange(2.0, 8.0)
+        model.run()
+        count = model.comp.exec_count
+        J2 = model.driver.workflow.calc_gradient(inputs=['comp.x'],
+                                                 outputs=['comp.y'])
+
+        # Two colors, so two runs instead of six.
+        self.assertEqual(model.comp.exec_count - count, 2)
+
+        for J, x in ((J1, x1), (J2, model.comp.x)):
+            expected = np.diag(2.0*x) + np.diag(3.0*np.ones(5), -1)
+            for i in range(6):
+                for j in range(6):
+                    assert_rel_error(self, J[i, j], expected[i, j], 0.0001)
+
+    def test_fd_coloring_zero_entries(self):
+
+        model = set_as_top(Assembly())
+        model.add('comp', MyCompProduct())
+        model.driver.workflow.add(['comp'])
+        model.driver.gradient_options.fd_coloring = True
+
+        # The subdiagonal is zero here, but isn't dropped from the pattern.
+        model.comp.x = np.zeros(6)
+        model.run()
+        model.driver.workflow.calc_gradient(inputs=['comp.x'],
+                                            outputs=['comp.y'])
+
+        x = np.arange(2.0, 8.0)
+        model.comp.x = x.copy()
+        model.run()
+        count = model.comp.exec_count
+        J = model.driver.workflow.calc_gradient(inputs=['comp.x'],
+                                                outputs=['comp.y'])
+        self.assertEqual(model.comp.exec_count - count, 2)
+
+        expected = np.diag(2.0*x) + np.diag(x[1:], -1)
+        expected[1:, 1:] += np.diag(x[:-1])
+        for i in range(6):
+            for j in range(6):
+                assert_rel_error(self, J[i, j], expected[i, j], 0.0001)
+
+    def test_fd_coloring_check(self):
+
+        model = set_as_top(Assembly())
+        model.add('comp', MyCompSwitched())
+        model.driver.workflow.add(['comp'])
+        model.driver.gradient_options.fd_coloring = True
+        model.driver.gradient_options.fd_coloring_check = 2
+        model.comp.x = np.arange(1.0, 7.0)
+
+        runs = []
+        for coupled in (0.0, 3.0, 3.0, 3.0):
+            model.comp.coupled = coupled
+            model.comp.x += 1.0
+            model.run()
+            count = model.comp.exec_count
+            J = model.driver.workflow.calc_gradient(inputs=['comp.x'],
+                                                    outputs=['comp.y'])
+            runs.append(model.comp.exec_count - count)
+
+        # Diagonal found at the start, the coupling by the first check, and
+        # after that two colors.
+        self.assertEqual(runs, [13, 1, 6, 2])
+
+        expected = np.diag(2.0*model.comp.x) + np.diag(3.0*np.ones(5), -1)
+        for i in range(6):
+            for j in range(6):
+                assert_rel_error(self, J[i, j], expected[i, j], 0.0001)
+
+    def test_fd_coloring_declared(self):
+
+        model = set_as_top(Assembly())
+        model.add('comp', MyCompDeclared())
+        model.driver.workflow.add(['comp'])
+        model.driver.gradient_options.fd_coloring = True
+        model.comp.x = np.arange(1.0, 7.0)
+        model.run()
+
+        # Declared pattern is used from the start.
+        count = model.comp.exec_count
+        J = model.driver.workflow.calc_gradient(inputs=['comp.x'],
+                                                outputs=['comp.y'])
+        self.assertEqual(model.comp.exec_count - count, 2)
+
+        expected = np.diag(2.0*model.comp.x) + np.diag(3.0*np.ones(5), -1)
+        for i in range(6):
+            for j in range(6):
+                assert_rel_error(self, J[i, j], expected[i, j], 0.0001)
+
     def test_smarter_nondifferentiable_blocks(self):
 
         top = set_as_top(Assembly())
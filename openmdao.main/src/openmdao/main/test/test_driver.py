@@ -59,8 +59,13 @@ class DriverTestCase(unittest.TestCase):
         assert(options.get_metadata("fd_step")["framework_var"])
         assert(options.get_metadata("fd_step_type")["framework_var"])
         assert(options.get_metadata("force_fd")["framework_var"])
+        assert(options.get_metadata("fd_workers")["framework_var"])
+        assert(options.get_metadata("fd_coloring")["framework_var"])
+        assert(options.get_metadata("fd_coloring_check")["framework_var"])
         assert(options.get_metadata("gmres_tolerance")["framework_var"])
         assert(options.get_metadata("gmres_maxiter")["framework_var"])
+        assert(options.get_metadata("lin_solver")["framework_var"])
+        assert(options.get_metadata("sparse_jacobian")["framework_var"])
 
         assert(Driver().get_metadata("gradient_options")["framework_var"])        
         
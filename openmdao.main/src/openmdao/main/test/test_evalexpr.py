@@ -617,6 +617,77 @@ class ExprEvalTestCase(unittest.TestCase):
         assert_rel_error(self, c2d_grad[2,2], 4.0, 0.00001)
         assert_rel_error(self, c2d_grad[3,3], 6.0, 0.00001)
 
+    def test_eval_gradient_forward(self):
+        top = set_as_top(Assembly())
+        top.add('comp1', A())
+        top.run()
+
+        # differentiated in one forward mode pass
+        exp = ExprEvaluator('max(comp1.c1d**2) + sum(sin(comp1.a1d))',
+                            top.driver)
+        grad = exp.evaluate_gradient(scope=top)
+        self.assertTrue(exp._ad_ok)
+        self.assertEqual(grad['comp1.c1d'].shape, (1, 4))
+        self.assertEqual(list(grad['comp1.c1d'][0]), [0., 0., 0., 6.])
+        for i, x in enumerate(top.comp1.a1d):
+            assert_rel_error(self, grad['comp1.a1d'][0, i], cos(x), 1e-12)
+
+        exp = ExprEvaluator('comp1.a1d[1:3]*comp1.f', top.driver)
+        top.comp1.f = 3.
+        grad = exp.evaluate_gradient(scope=top)
+        self.assertTrue(exp._ad_ok)
+        self.assertEqual(grad['comp1.a1d[1:3]'].tolist(),
+                         [[3., 0.], [0., 3.]])
+        self.assertEqual(grad['comp1.f'].tolist(), [[1.], [2.]])
+
+        # gamma can't be differentiated that way, so we fall back
+        exp = ExprEvaluator('gamma(comp1.f)', top.driver)
+        grad = exp.evaluate_gradient(scope=top)
+        self.assertFalse(exp._ad_ok)
+        assert_rel_error(self, grad['comp1.f'], 2.*(1.5-0.5772156649), 0.001)
+
+        # an object array of ADValues isn't differentiated, so we fall back
+        # instead of reporting a zero gradient
+        top.comp1.f = 3.
+        exp = ExprEvaluator('array([comp1.f, 2.*comp1.f])', top.driver)
+        grad = exp.evaluate_gradient(scope=top)
+        self.assertFalse(exp._ad_ok)
+        assert_rel_error(self, grad['comp1.f'][0, 0], 1.0, 0.0001)
+        assert_rel_error(self, grad['comp1.f'][1, 0], 2.0, 0.0001)
+
+        # nor is one mixed with an ADValue, which would keep only the
+        # derivatives of the ADValue
+        exp = ExprEvaluator('comp1.c1d + numpy.dot(2.*numpy.eye(4), comp1.a1d)',
+                            top.driver)
+        grad = exp.evaluate_gradient(scope=top)
+        self.assertFalse(exp._ad_ok)
+        for i in range(4):
+            assert_rel_error(self, grad['comp1.c1d'][i, i], 1.0, 0.0001)
+            assert_rel_error(self, grad['comp1.a1d'][i, i], 2.0, 0.0001)
+        self.assertEqual(grad['comp1.a1d'][0, 1], 0.0)
+
+    def test_eval_gradient_forward_compare(self):
+        top = set_as_top(Assembly())
+        top.add('comp1', A())
+
+        # comparisons use the value, so the right branch is differentiated
+        exp = ExprEvaluator('comp1.f**2 if comp1.f > 2. else 3.*comp1.f',
+                            top.driver)
+        top.comp1.f = 3.
+        grad = exp.evaluate_gradient(scope=top)
+        self.assertTrue(exp._ad_ok)
+        assert_rel_error(self, grad['comp1.f'], 6.0, 0.00001)
+
+        top.comp1.f = 1.
+        grad = exp.evaluate_gradient(scope=top)
+        self.assertTrue(exp._ad_ok)
+        assert_rel_error(self, grad['comp1.f'], 3.0, 0.00001)
+
+        exp = ExprEvaluator('comp1.f if comp1.f <= 1. else -comp1.f',
+                            top.driver)
+        grad = exp.evaluate_gradient(scope=top)
+        assert_rel_error(self, grad['comp1.f'], 1.0, 0.00001)
+
     def test_eval_gradient_lots_of_vars(self):
         top = set_as_top(Assembly())
         top.add('comp1', B())
@@ -646,6 +717,23 @@ class ExprEvalTestCase(unittest.TestCase):
         xformed = exp.scope_transform(self.top.comp, self.top)
         self.assertEqual(xformed, 'var+abs(comp.x)*a.a1d[2]')
 
+    def test_compiled(self):
+        exp = ExprEvaluator('comp.x+2*comp.y-a.a1d[2]', self.top,
+                            compiled=True)
+        self.assertEqual(new_text(exp),
+                         "_comp_.x+2*_comp_.y-scope.get('a.a1d',[(0,2)])")
+        self.assertEqual(exp.evaluate(), 3.14+84.-3.)
+        self.assertEqual(exp.get_referenced_varpaths(),
+                         set(['comp.x', 'comp.y', 'a.a1d']))
+
+        self.top.comp.y = 1.
+        self.assertEqual(exp.evaluate(), 3.14+2.-3.)
+
+        # replacing a component is a config change, so comp gets looked up again
+        self.top.add('comp', Comp())
+        self.top.comp.x = 1.
+        self.assertEqual(exp.evaluate(), 1.-3.)
+
     def test_connected_expr(self):
         ConnectedExprEvaluator("var1[x]", self.top)._parse()
         try:
@@ -9,6 +9,7 @@ from openmdao.main.hasconstraints import HasConstraints, HasEqConstraints, HasIn
 from openmdao.test.execcomp import ExecComp
 from openmdao.units.units import PhysicalQuantity
 import openmdao.main.pseudocomp as pcompmod
+from openmdao.util.testutil import assert_rel_error
 
 @add_delegate(HasConstraints)
 class MyDriver(Driver):
@@ -331,6 +332,31 @@ class HasConstraintsTestCase(unittest.TestCase):
     def test_eval_ineq_constraint(self):
         self._check_ineq_eval_constraints(MyInEqDriver())
 
+    def test_eval_constraint_array(self):
+        drv = self.asm.add('driver', MyDriver())
+        drv.workflow.add(['comp1', 'comp2', 'comp3', 'comp4'])
+        drv.add_constraint('comp1.c < comp1.d')
+        drv.add_constraint('comp3.arr < comp4.b')
+        drv.add_constraint('comp1.a = comp2.b')
+
+        vals = drv.eval_constraint_array(self.asm)
+        self.assertEqual(list(vals), [-1., 4., -1., 0., 1.])
+        self.assertEqual(list(vals), drv.eval_constraints(self.asm))
+        self.assertEqual(list(drv.eval_ineq_constraint_array(self.asm)),
+                         [4., -1., 0., 1.])
+
+        self.asm.comp1.a = 5.
+        self.assertEqual(list(drv.eval_constraint_array(self.asm)),
+                         [3., 4., -1., 0., 1.])
+
+        drv.remove_constraint('comp3.arr < comp4.b')
+        self.assertEqual(list(drv.eval_constraint_array(self.asm)), [3., 4.])
+
+        self.asm.run()
+        J = drv.calc_ineq_constraint_gradient(['comp1.b'])
+        self.assertEqual(J.shape, (1, 1))
+        assert_rel_error(self, J[0, 0], 2., .0001)
+
     def test_pseudocomps(self):
         self.asm.add('driver', MyDriver())
         self.asm.driver.workflow.add(['comp1','comp2','comp3','comp4'])
@@ -135,6 +135,31 @@ class HasParametersTestCase(unittest.TestCase):
         #except ValueError as err:
             #self.assertEqual(str(err), "parameter value (-1.0) is outside of allowed range [0.0 to 1e+99]")
 
+    def test_set_params_invalidates_once(self):
+        self.top.add('comp2', ExecComp(exprs=['e=2.0*c']))
+        self.top.connect('comp.c', 'comp2.c')
+        self.top.driver.workflow.add('comp2')
+        self.top.driver.add_parameter('comp.x', 0., 1.e99)
+        self.top.driver.add_parameter('comp.y', 0., 1.e99)
+        self.top.run()
+        self.assertEqual(self.top.get_valid(['comp.c', 'comp2.e']),
+                         [True, True])
+
+        calls = []
+        invalidate = self.top._depgraph.invalidate_deps
+        def counting_invalidate(scope, vnames):
+            calls.append(vnames)
+            return invalidate(scope, vnames)
+        self.top._depgraph.invalidate_deps = counting_invalidate
+
+        self.top.driver.set_parameters([22., 33.])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.top.get_valid(['comp.c', 'comp2.e']),
+                         [False, False])
+
+        self.top.run()
+        self.assertEqual(self.top.comp2.e, 110.)
+
     def test_add_connected_param(self):
         self.top.create_passthrough('comp.x')
         code = "self.top.driver.add_parameter('comp.x', 0., 1.e99)"
@@ -15,6 +15,10 @@ class Workflow(object):
     in some order.
     """
 
+    # Incremented whenever the configuration of any workflow changes, so a
+    # cache that depends on several workflows can cheaply check them all.
+    change_count = 0
+
     def __init__(self, parent=None, scope=None, members=None):
         """Create a Workflow.
 
@@ -151,7 +155,7 @@ class Workflow(object):
         """Notifies the Workflow that workflow configuration
         (dependencies, etc.) has changed.
         """
-        pass
+        Workflow.change_count += 1
 
     def remove(self, comp):
         """Remove a component from this Workflow by name."""